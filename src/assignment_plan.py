@@ -0,0 +1,141 @@
+"""
+The plan of setting the charges and radii of a structure: which atoms
+of the structure are written, the row of the itp of each of them (for
+its charge) and the names used to find it in the force fields (for its
+radius). It is made once for a layout of the structure (its atoms ids,
+names and residues) and the topology, and then the charges and radii
+of any structure with the same layout are one take each, in the order
+of the atoms.
+The plan is saved and loaded as a NumPy archive (no pickle), with the
+rows of each force field it was applied to.
+"""
+
+import sys
+import typing
+import hashlib
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+import parse_charmm_data
+
+
+# Columns of the structure and of the topology which set the plan
+LAYOUT_COLUMNS: list[str] = \
+    ['atom_id', 'atom_name', 'residue_name', 'residue_number']
+TOPOLOGY_COLUMNS: list[str] = \
+    ['atomnr', 'atomtype', 'resnr', 'resname', 'atomname', 'charge']
+
+
+def update_digest(digest: typing.Any,  # A hashlib object, updated
+                  df_i: pd.DataFrame,  # Table to hash
+                  columns: list[str]  # Its columns to hash
+                  ) -> None:
+    """add the length and the columns of the table to the hash"""
+    digest.update(np.int64(len(df_i)).tobytes())
+    for column in columns:
+        values: np.ndarray = df_i[column].to_numpy()
+        if values.dtype == object or not values.dtype.isnative:
+            values = values.astype(str)
+        digest.update(np.ascontiguousarray(values).tobytes())
+
+
+def layout_key(pdb: pd.DataFrame,  # The structure
+               itp: pd.DataFrame  # Atoms of the topology
+               ) -> str:
+    """return the hash of the layout of the structure and topology"""
+    digest = hashlib.sha256()
+    update_digest(digest, pdb, LAYOUT_COLUMNS)
+    update_digest(digest, itp, TOPOLOGY_COLUMNS)
+    return digest.hexdigest()
+
+
+def same_layout(pdb: pd.DataFrame,  # A structure
+                other: pd.DataFrame,  # An other one, e.g. the last model
+                columns: typing.Optional[list[str]] = None  # To compare
+                ) -> bool:
+    """if the structures have the same atoms and values in the columns
+    (LAYOUT_COLUMNS by default); the categorical columns are compared
+    by their codes, without hashing or making strings"""
+    if len(pdb) != len(other):
+        return False
+    for column in LAYOUT_COLUMNS if columns is None else columns:
+        values: pd.Series = pdb[column]
+        reference: pd.Series = other[column]
+        if isinstance(values.dtype, pd.CategoricalDtype) and \
+           isinstance(reference.dtype, pd.CategoricalDtype):
+            if not (values.cat.categories.equals(reference.cat.categories)
+                    and np.array_equal(values.cat.codes.to_numpy(),
+                                       reference.cat.codes.to_numpy())):
+                return False
+        elif not np.array_equal(values.to_numpy(), reference.to_numpy()):
+            return False
+    return True
+
+
+@dataclass
+class AssignmentPlan:
+    """Index arrays of the atoms of a layout"""
+    key: str  # Hash of the layout, see layout_key
+    rows: np.ndarray  # Positions of the written atoms in the structure
+    itp_rows: np.ndarray  # Row of the itp of each of them, -1 for none
+    ff_resnames: np.ndarray  # Residue names to look for in the ff
+    ff_atom_names: np.ndarray  # Atom names to look for in the ff
+    # Rows of each force field (by its name) of the atoms, -1 for none
+    ff_rows: dict[str, np.ndarray] = field(default_factory=dict)
+
+    def charges(self,
+                itp: pd.DataFrame  # Atoms of the topology of the plan
+                ) -> np.ndarray:
+        """return the charges of the written atoms, NaN for none"""
+        charge: np.ndarray = itp['charge'].to_numpy(dtype=float)
+        return np.where(self.itp_rows >= 0,
+                        charge.take(self.itp_rows, mode='clip'),
+                        np.nan)
+
+    def radii(self,
+              name: str,  # Name of the force field
+              force_field: parse_charmm_data.ForceField
+              ) -> np.ndarray:
+        """return the radii of the written atoms, the rows of the force
+        field are found once"""
+        if name not in self.ff_rows:
+            self.ff_rows[name] = \
+                force_field.pair_ids(self.ff_resnames, self.ff_atom_names)
+        return force_field.radii(self.ff_rows[name])
+
+    def save(self,
+             fname: str  # Name of the archive, .npz
+             ) -> None:
+        """write the plan"""
+        arrays: dict[str, np.ndarray] = {
+            'key': np.array(self.key),
+            'rows': self.rows,
+            'itp_rows': self.itp_rows,
+            'ff_resnames': self.ff_resnames.astype(str),
+            'ff_atom_names': self.ff_atom_names.astype(str),
+            'ff_names': np.array(list(self.ff_rows), dtype=str)}
+        for i, rows in enumerate(self.ff_rows.values()):
+            arrays[f'ff_rows_{i}'] = rows
+        np.savez(fname, **arrays)
+
+    @classmethod
+    def load(cls,
+             fname: str  # Name of the archive, .npz
+             ) -> 'AssignmentPlan':
+        """read a plan written by save"""
+        with np.load(fname, allow_pickle=False) as entry:
+            return cls(str(entry['key']),
+                       entry['rows'],
+                       entry['itp_rows'],
+                       entry['ff_resnames'],
+                       entry['ff_atom_names'],
+                       {str(name): entry[f'ff_rows_{i}']
+                        for i, name in enumerate(entry['ff_names'])})
+
+
+if __name__ == '__main__':
+    PLAN: AssignmentPlan = AssignmentPlan.load(sys.argv[1])
+    print(f'{sys.argv[1]}: {len(PLAN.rows)} atoms, force fields: '
+          f'{list(PLAN.ff_rows)}, key: {PLAN.key}')
@@ -0,0 +1,207 @@
+"""
+Convert many structures with the same topology and force fields: they
+are read once in the main process, and the structures are converted by
+a pool of processes which get them by fork (not pickled for each
+structure); each pqr is written by its process, next to its structure.
+
+    usage:
+        python batch_pqr.py <directory | glob | manifest> [processes]
+    e.g.:
+        python batch_pqr.py frames/
+        python batch_pqr.py 'run_*/conf.pdb' 8
+        python batch_pqr.py structures.txt
+    A manifest is a text file with a structure file per line (relative
+    to the manifest), empty lines and lines starting with # are skipped.
+    0 processes (default) for all the CPUs.
+With a manifest_file in the configs, the structures whose inputs did
+not change are not converted, see output_cache.
+"""
+
+import os
+import sys
+import copy
+import glob
+import time
+import typing
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import logger
+import my_tools
+import pqr_from_pdb
+import output_cache
+from colors_text import TextColor as bcolors
+
+
+# Extensions of the structures in a directory, maybe compressed
+STRUCTURE_EXTENSIONS: list[str] = ['pdb', 'gro']
+
+# Configs and inputs of the processes, set before the pool is started
+_SHARED: typing.Optional[tuple[pqr_from_pdb.AllConfig,
+                               pqr_from_pdb.SharedInputs,
+                               logger.logging.Logger]] = None
+
+
+def find_structures(source: str  # Directory, glob or manifest
+                    ) -> list[str]:
+    """return the structure files of the source, in order"""
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, item) for item in os.listdir(source)
+            if my_tools.split_extension(item)[1].split('.')[0] in
+            STRUCTURE_EXTENSIONS)
+    if glob.has_magic(source):
+        return sorted(glob.glob(source))
+    directory: str = os.path.dirname(source)
+    with my_tools.open_file(source, 'r') as f_r:
+        return [os.path.join(directory, line.strip()) for line in f_r
+                if line.strip() and not line.lstrip().startswith('#')]
+
+
+def set_shared(shared: tuple[pqr_from_pdb.AllConfig,
+                             pqr_from_pdb.SharedInputs,
+                             logger.logging.Logger]
+               ) -> None:
+    """set the inputs of the process"""
+    global _SHARED
+    _SHARED = shared
+
+
+def convert_structure(pdb_file: str  # Name of the structure file
+                      ) -> tuple[str, float, str, list[str]]:
+    """convert a structure with the shared inputs, return its name, the
+    time, the error (empty if none) and the files written"""
+    configs, inputs, log = _SHARED
+    start: float = time.perf_counter()
+    try:
+        converter = pqr_from_pdb.PdbToPqr(
+            pdb_file, log, copy.copy(configs), inputs)
+    except SystemExit as err:
+        return pdb_file, time.perf_counter() - start, str(err.code), []
+    except Exception as err:
+        return pdb_file, time.perf_counter() - start, repr(err), []
+    return pdb_file, time.perf_counter() - start, '', converter.outputs
+
+
+class BatchPqr:
+    """Convert the structures of a source by a pool of processes"""
+
+    info_msg: str = 'Message from BatchPqr:\n'
+
+    def __init__(self,
+                 source: str,  # Directory, glob or manifest
+                 log: logger.logging.Logger,
+                 configs: pqr_from_pdb.AllConfig = pqr_from_pdb.AllConfig(),
+                 workers: int = 0  # Processes, 0 for all the CPUs
+                 ) -> None:
+        structures: list[str] = find_structures(source)
+        if not structures:
+            log.error(msg := f'\tNo structure files in `{source}`\n')
+            sys.exit(f'{bcolors.FAIL}{self.__module__}:\n{msg}{bcolors.ENDC}')
+        workers = workers if workers > 0 else (os.cpu_count() or 1)
+        workers = min(workers, len(structures))
+        start: float = time.perf_counter()
+        inputs: pqr_from_pdb.SharedInputs = \
+            pqr_from_pdb.SharedInputs.read(configs, log)
+        # The force fields are compiled before the processes share them
+        for name in configs.force_fields or [configs.ff_file]:
+            inputs.force_fields.get(name)
+        cache: typing.Optional[output_cache.OutputCache] = None
+        hashes: dict[str, dict[str, str]] = {}
+        if configs.manifest_file:
+            cache = output_cache.OutputCache(configs.manifest_file,
+                                             configs.store_dir,
+                                             configs.store_size)
+            structures, hashes = self.find_changed(structures, configs,
+                                                   inputs, cache)
+            # Only this process writes the manifest
+            configs = copy.copy(configs)
+            configs.manifest_file = ''
+        self.results: list[tuple[str, float, str, list[str]]] = []
+        if structures:
+            self.results = self.run(structures,
+                                    (configs, inputs, log),
+                                    min(workers, len(structures)))
+        if cache is not None:
+            for pdb_file, _, error, outputs in self.results:
+                if not error:
+                    cache.record(pdb_file, hashes[pdb_file], outputs)
+            cache.save()
+        self.summary(time.perf_counter() - start, workers, log)
+        self.write_msg(log)
+
+    def find_changed(self,
+                     structures: list[str],
+                     configs: pqr_from_pdb.AllConfig,
+                     inputs: pqr_from_pdb.SharedInputs,
+                     cache: output_cache.OutputCache
+                     ) -> tuple[list[str], dict[str, dict[str, str]]]:
+        """return the structures whose outputs are not up to date in
+        the manifest, and the hashes of their inputs"""
+        shared: dict[str, str] = inputs.shared_digests(configs)
+        changed: list[str] = []
+        hashes: dict[str, dict[str, str]] = {}
+        for pdb_file in structures:
+            hashes[pdb_file] = cache.inputs(
+                pqr_from_pdb.structure_files(pdb_file, configs), shared)
+            if not cache.restore(pdb_file, cache.key(hashes[pdb_file])):
+                changed.append(pdb_file)
+        self.info_msg += (f'\tUp to date in `{configs.manifest_file}`: '
+                          f'{len(structures) - len(changed)} of '
+                          f'{len(structures)} structures\n')
+        return changed, hashes
+
+    @staticmethod
+    def run(structures: list[str],
+            shared: tuple[pqr_from_pdb.AllConfig,
+                          pqr_from_pdb.SharedInputs,
+                          logger.logging.Logger],
+            workers: int
+            ) -> list[tuple[str, float, str, list[str]]]:
+        """convert the structures, in this process if there is one
+        worker; the processes are forked with the inputs if possible,
+        otherwise the inputs are sent once to each of them"""
+        set_shared(shared)
+        if workers == 1:
+            return [convert_structure(item) for item in structures]
+        kwargs: dict[str, typing.Any] = {}
+        if 'fork' in multiprocessing.get_all_start_methods():
+            kwargs['mp_context'] = multiprocessing.get_context('fork')
+        else:
+            kwargs.update(initializer=set_shared, initargs=(shared,))
+        chunksize: int = max(1, len(structures) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers, **kwargs) as pool:
+            return list(pool.map(convert_structure,
+                                 structures,
+                                 chunksize=chunksize))
+
+    def summary(self,
+                seconds: float,  # Wall time of the batch
+                workers: int,  # Number of processes
+                log: logger.logging.Logger
+                ) -> None:
+        """add the throughput and the failed structures to the message"""
+        failed: list[tuple[str, float, str, list[str]]] = \
+            [item for item in self.results if item[2]]
+        done: int = len(self.results) - len(failed)
+        self.info_msg += (f'\tStructures converted: {done} of '
+                          f'{len(self.results)} by {workers} processes\n'
+                          f'\tWall time: {seconds:.2f} s, '
+                          f'{done / seconds:.2f} structures/s\n')
+        for pdb_file, _, error, _ in failed:
+            self.info_msg += f'\tFailed `{pdb_file}`: {error.strip()}\n'
+            log.error(f'\t`{pdb_file}` is not converted: {error}\n')
+
+    def write_msg(self,
+                  log: logger.logging.Logger  # To log
+                  ) -> None:
+        """write and log messages"""
+        print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
+              f'\t{self.info_msg}{bcolors.ENDC}')
+        log.info(self.info_msg)
+
+
+if __name__ == '__main__':
+    BatchPqr(sys.argv[1],
+             log=logger.setup_logger('batch_pqr.log'),
+             workers=int(sys.argv[2]) if len(sys.argv) > 2 else 0)
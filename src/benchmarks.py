@@ -0,0 +1,429 @@
+"""Benchmarks of the conversion steps on synthetic systems.
+Each benchmark writes its inputs in a temporary directory, times the
+current code path against the reference one and prints the results.
+
+    usage:
+        python benchmarks.py <benchmark> [number of atoms]
+    e.g.:
+        python benchmarks.py pdb_reader 1000000
+"""
+
+import os
+import sys
+import time
+import typing
+import tempfile
+import subprocess
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import logger
+import itp_cache
+import itp_to_df
+import pdb_to_df
+import pqr_frames
+import pqr_from_pdb
+from colors_text import TextColor as bcolors
+
+
+def write_synthetic_pdb(fname: str,  # Name of the PDB file to write
+                        n_atoms: int  # Number of atoms in the file
+                        ) -> None:
+    """write a PDB file of a water box like system with n_atoms"""
+    rng: np.random.Generator = np.random.default_rng(seed=2023)
+    xyz: np.ndarray = rng.uniform(-99.0, 999.0, size=(n_atoms, 3))
+    names: list[str] = ['OH2', 'H1', 'H2']
+    with open(fname, 'w', encoding='utf8') as f_w:
+        for i, (x_i, y_i, z_i) in enumerate(xyz):
+            f_w.write(f'{"ATOM":<6}{(i + 1) % 100000:>5} '
+                      f'{names[i % 3]:<4} {"SOL":>3} A'
+                      f'{(i // 3 + 1) % 10000:>4}    '
+                      f'{x_i:>8.3f}{y_i:>8.3f}{z_i:>8.3f}'
+                      f'{1.0:>6.2f}{0.0:>6.2f}          '
+                      f'{names[i % 3][0]:>2}\n')
+        f_w.write('TER\nEND\n')
+
+
+def read_pdb_lines(fname: str  # PDB file name
+                   ) -> pd.DataFrame:
+    """the per-line parser of the PDB, the reference of the block reader
+    of pdb_to_df.Pdb: each ATOM/HETATM line is cut by Python"""
+    rows: list[list[typing.Any]] = []
+    with open(fname, 'r', encoding='utf8') as f_i:
+        for line in f_i:
+            if line.startswith(tuple(pdb_to_df.RECORD_TYPES)):
+                rows.append([line[0:6].strip(),
+                             int(line[6:11]),
+                             line[12:16].strip(),
+                             line[17:20].strip(),
+                             int(line[22:26]),
+                             line[26:27].strip(),
+                             float(line[30:39]),
+                             float(line[39:47]),
+                             float(line[47:55]),
+                             float(line[55:61]),
+                             float(line[61:67]),
+                             line[76:78].strip()])
+    return pd.DataFrame(rows, columns=list(pdb_to_df.PDB_COLUMNS))
+
+
+def write_synthetic_itp(fname: str,  # Name of the itp file to write
+                        n_atoms: int  # Number of atoms in the file
+                        ) -> None:
+    """write an itp file of a chain of n_atoms with its bonds, angles
+    and dihedrals (about 3 * n_atoms bonded terms)"""
+    names: list[str] = [f'C{i % 1000}' for i in range(n_atoms)]
+    ids: np.ndarray = np.arange(1, n_atoms + 1)
+    with open(fname, 'w', encoding='utf8') as f_w:
+        f_w.write('[ moleculetype ]\n; Name nrexcl\nCHAIN 3\n\n'
+                  '[ atoms ]\n; atomnr atomtype resnr resname atomname '
+                  'chargegrp charge mass element\n')
+        f_w.writelines(f'{i:>7} CT2 1 CHN {names[i - 1]:>5} {i:>7} '
+                       f'{-0.18:>8.4f} {12.011:>8.3f} ; C.\n' for i in ids)
+        for section, width in [('bonds', 2), ('angles', 3),
+                                ('dihedrals', 4)]:
+            columns: list[str] = ['ai', 'aj', 'ak', 'ah'][:width]
+            f_w.write(f'\n[ {section} ]\n; {" ".join(columns)} typ cmt '
+                      f'name\n')
+            f_w.writelines(
+                f'{" ".join(str(i + j) for j in range(width))} 1 ; '
+                f'{"-".join(names[i + j - 1] for j in range(width))}\n'
+                for i in ids[:n_atoms - width + 1])
+
+
+def timeit(func: typing.Callable[[], typing.Any],  # Function to time
+           repeat: int = 3  # Number of runs, the best one is returned
+           ) -> float:
+    """return the best wall time of the function in seconds"""
+    best: float = np.inf
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(name: str,  # Name of the benchmark
+           results: dict[str, float],  # Label and time in seconds
+           n_atoms: int  # Size of the system
+           ) -> None:
+    """print the timings and the speedup against the first entry"""
+    reference: float = list(results.values())[0]
+    msg: str = f'{name} ({n_atoms} atoms):\n'
+    for label, seconds in results.items():
+        msg += (f'\t{label:<24}{seconds:>10.3f} s'
+                f'{n_atoms / seconds:>14.0f} atoms/s'
+                f'{reference / seconds:>8.1f}x\n')
+    print(f'{bcolors.OKGREEN}{msg}{bcolors.ENDC}')
+
+
+def bench_pdb_reader(n_atoms: int,  # Number of atoms in the PDB
+                     log: logger.logging.Logger
+                     ) -> None:
+    """per-line parser against the block reader of Pdb"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname: str = os.path.join(tmp_dir, 'bench.pdb')
+        write_synthetic_pdb(fname, n_atoms)
+        pdb = pdb_to_df.Pdb(fname, log)
+        results: dict[str, float] = {
+            'per-line parser': timeit(lambda: read_pdb_lines(fname)),
+            'block reader':
+                timeit(lambda: pdb.get_data(fname)),
+        }
+    report('pdb_reader', results, n_atoms)
+
+
+def peak_memory(func: typing.Callable[[], typing.Any]  # Function to run
+                ) -> tuple[float, typing.Any]:
+    """return the peak of the allocated memory (MiB) and the result"""
+    tracemalloc.start()
+    result: typing.Any = func()
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20, result
+
+
+def read_peak_rss(reset: bool = False  # Reset the peak to the resident
+                  ) -> int:
+    """return the peak resident memory of the process in KiB (VmHWM of
+    Linux); reset to the resident memory first if asked"""
+    if reset:
+        with open('/proc/self/clear_refs', 'w', encoding='utf8') as f_w:
+            f_w.write('5')
+    with open('/proc/self/status', 'r', encoding='utf8') as f_r:
+        for line in f_r:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+    return 0
+
+
+def peak_rss(statement: str,  # Python code, with the modules of src
+             setup: str = ''  # Run before, out of the measure
+             ) -> float:
+    """return the growth of the peak resident memory (MiB) of running
+    the statement in a new interpreter, which counts the buffers of
+    NumPy and pandas and no memory freed by an earlier run"""
+    src_dir: str = os.path.dirname(os.path.abspath(__file__))
+    code: str = (
+        'import sys\n'
+        f'sys.path.insert(0, {src_dir!r})\n'
+        'from benchmarks import read_peak_rss, read_pdb_lines\n'
+        f'{setup}\n'
+        'start = read_peak_rss(reset=True)\n'
+        f'result = {statement}\n'
+        'print(read_peak_rss() - start)')
+    result: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True,
+        text=True,
+        check=True)
+    return int(result.stdout.split()[-1]) / 2**10
+
+
+def bench_pdb_memory(n_atoms: int,  # Number of atoms in the PDB
+                     log: logger.logging.Logger
+                     ) -> None:
+    """memory of the object table of the per-line parser against the
+    compact table of the block reader: the peak of the traced
+    allocations and of the resident memory"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname: str = os.path.join(tmp_dir, 'bench.pdb')
+        write_synthetic_pdb(fname, n_atoms)
+        pdb = pdb_to_df.Pdb(fname, log)
+        del pdb.pdb_df
+        readers: dict[str, tuple[typing.Callable[[], pd.DataFrame], str]] = {
+            'per-line parser': (lambda: read_pdb_lines(fname),
+                                'read_pdb_lines(fname)'),
+            'compact table': (lambda: pdb.get_data(fname),
+                              'pdb.get_data(fname)'),
+        }
+        setup: str = ('import io, contextlib, logger, pdb_to_df\n'
+                      f'fname = {fname!r}\n'
+                      'with contextlib.redirect_stdout(io.StringIO()):\n'
+                      "    log = logger.setup_logger('benchmarks.log')\n"
+                      '    pdb = pdb_to_df.Pdb(fname, log, stream=True)')
+        results: dict[str, tuple[float, float, typing.Any]] = {
+            label: (peak_rss(statement, setup), *peak_memory(reader))
+            for label, (reader, statement) in readers.items()}
+    msg: str = f'pdb_memory ({n_atoms} atoms):\n'
+    for label, (rss, peak, df_i) in results.items():
+        table: float = df_i.memory_usage(deep=True).sum() / 2**20
+        msg += (f'\t{label:<24}rss{rss:>10.1f} MiB'
+                f'\tpeak{peak:>10.1f} MiB'
+                f'\ttable{table:>10.1f} MiB\n')
+    print(f'{bcolors.OKGREEN}{msg}{bcolors.ENDC}')
+
+
+def bench_residue_numbers(n_atoms: int,  # Largest system in the scaling
+                          log: logger.logging.Logger
+                          ) -> None:
+    """scaling of the residue renumbering from 10^4 atoms up to n_atoms,
+    with shuffled residue numbers as written by VMD"""
+    rng: np.random.Generator = np.random.default_rng(seed=2023)
+    results: dict[int, float] = {}  # Size of the system and the time
+    size: int = 10_000
+    while size <= n_atoms:
+        residues: np.ndarray = rng.permutation(size // 3 + 1)
+        df_i: pd.DataFrame = pd.DataFrame(
+            {'residue_number': np.repeat(residues, 3)[:size]})
+        results[size] = \
+            timeit(lambda: pdb_to_df.Pdb.check_residue_number(df_i))
+        size *= 10
+    msg: str = 'residue_numbers:\n'
+    for size, seconds in results.items():
+        msg += (f'\t{size:>10} atoms{seconds:>12.4f} s'
+                f'{size / seconds:>14.0f} atoms/s\n')
+    print(f'{bcolors.OKGREEN}{msg}{bcolors.ENDC}')
+    log.info(msg)
+
+
+def bench_itp_topology(n_terms: int,  # Largest number of bonded terms
+                       log: logger.logging.Logger
+                       ) -> None:
+    """scaling of loading all the sections of an itp file, with the
+    names of the bonded terms checked against the atoms, from 10^4 up
+    to n_terms bonded terms"""
+    results: dict[int, float] = {}  # Number of the terms and the time
+    size: int = 10_000
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname: str = os.path.join(tmp_dir, 'bench.itp')
+        while size <= n_terms:
+            write_synthetic_itp(fname, size // 3 + 2)
+            results[size] = timeit(lambda: itp_to_df.Itp(
+                fname, sections=itp_to_df.Itp.attributes), repeat=1)
+            size *= 10
+    msg: str = 'itp_topology:\n'
+    for size, seconds in results.items():
+        msg += (f'\t{size:>10} terms{seconds:>12.4f} s'
+                f'{size / seconds:>14.0f} terms/s\n')
+    print(f'{bcolors.OKGREEN}{msg}{bcolors.ENDC}')
+    log.info(msg)
+
+
+def bench_itp_cache(n_atoms: int,  # Number of atoms in the itp file
+                    log: logger.logging.Logger
+                    ) -> None:
+    """loading all the sections of an itp file by parsing its text, by
+    parsing and saving it in an empty cache (cold) and from the cache
+    (warm)"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname: str = os.path.join(tmp_dir, 'bench.itp')
+        write_synthetic_itp(fname, n_atoms)
+        cache = itp_cache.ItpCache(os.path.join(tmp_dir, 'cache'))
+
+        def load(cache_i: typing.Optional[itp_cache.ItpCache]) -> None:
+            itp_to_df.Itp(fname, sections=itp_to_df.Itp.attributes,
+                          cache=cache_i)
+
+        def cold() -> None:
+            cache.invalidate()
+            load(cache)
+
+        results: dict[str, float] = {
+            'text parser': timeit(lambda: load(None)),
+            'cold cache': timeit(cold),
+            'warm cache': timeit(lambda: load(cache)),
+        }
+    report('itp_cache', results, n_atoms)
+    log.info(f'itp_cache: {results}\n')
+
+
+def bench_itp_parallel(n_atoms: int,  # Number of atoms in the itp file
+                       log: logger.logging.Logger
+                       ) -> None:
+    """parsing all the sections of a large itp file by one process and
+    by pools of 2, 4, ... processes (up to the number of CPUs), the
+    results are checked to be the same"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname: str = os.path.join(tmp_dir, 'bench.itp')
+        write_synthetic_itp(fname, n_atoms)
+        serial = itp_to_df.Itp(fname, sections=itp_to_df.Itp.attributes)
+        results: dict[str, float] = {}
+        workers: int = 1
+        while workers <= max(os.cpu_count() or 1, 2):
+            results[f'{workers} workers'] = timeit(
+                lambda: itp_to_df.Itp(fname,
+                                      sections=itp_to_df.Itp.attributes,
+                                      workers=workers), repeat=1)
+            parallel = itp_to_df.Itp(fname,
+                                     sections=itp_to_df.Itp.attributes,
+                                     workers=workers)
+            for name in itp_to_df.Itp.attributes:
+                pd.testing.assert_frame_equal(getattr(serial, name),
+                                              getattr(parallel, name))
+            workers *= 2
+    report('itp_parallel', results, n_atoms)
+    log.info(f'itp_parallel ({os.cpu_count()} CPUs): {results}\n')
+
+
+def write_pqr_rows(fname: str,  # Name of the pqr file to write
+                   pqr_df: pd.DataFrame  # Table of PdbToPqr.mk_pqr_df
+                   ) -> None:
+    """the reference writer: one f-string per row of the table"""
+    with open(fname, 'w', encoding='utf8') as f_w:
+        for _, row in pqr_df.iterrows():
+            f_w.write(f"ATOM  {row['atom_id']:>5} "
+                      f"{row['atom_name']:<4} "
+                      f"{row['residue_name']:<3} "
+                      f"{row['chain_id']:>1} "
+                      f"{row['residue_number']:>5} "
+                      f"{row['x']:>8.3f}"
+                      f"{row['y']:>8.3f}"
+                      f"{row['z']:>8.3f} "
+                      f"{row['charge']:>7.4f} "
+                      f"{row['radius']:>6.4f}\n")
+        f_w.write('TER\n')
+        f_w.write('END\n')
+
+
+def bench_pqr_writer(n_atoms: int,  # Number of atoms in the pqr
+                     log: logger.logging.Logger
+                     ) -> None:
+    """per-row f-strings against the block writer of PdbToPqr, the
+    files are checked to be the same bytes"""
+    rng: np.random.Generator = np.random.default_rng(seed=2023)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname: str = os.path.join(tmp_dir, 'bench.pdb')
+        write_synthetic_pdb(fname, n_atoms)
+        pdb: pd.DataFrame = pdb_to_df.Pdb(fname, log).pdb_df
+        pdb['charge'] = np.round(rng.normal(scale=0.5, size=n_atoms), 4)
+        pdb['radius'] = rng.uniform(0.2, 2.2, size=n_atoms)
+        pqr_from_pdb.PdbToPqr.add_chain_identifier(pdb)
+        pqr_df: pd.DataFrame = pqr_from_pdb.PdbToPqr.mk_pqr_df(pdb)
+        rows_file: str = os.path.join(tmp_dir, 'rows.pqr')
+        block_file: str = os.path.join(tmp_dir, 'block.pqr')
+        results: dict[str, float] = {
+            'per-row f-strings':
+                timeit(lambda: write_pqr_rows(rows_file, pqr_df), repeat=1),
+            'block writer':
+                timeit(lambda: pqr_from_pdb.PdbToPqr.write_pqr(
+                    block_file, pqr_df)),
+        }
+        with open(rows_file, 'rb') as f_rows, open(block_file, 'rb') as f_b:
+            if f_rows.read() != f_b.read():
+                sys.exit(f'{bcolors.FAIL}pqr_writer: the files are not '
+                         f'the same{bcolors.ENDC}')
+    report('pqr_writer', results, n_atoms)
+    log.info(f'pqr_writer: {results}\n')
+
+
+def bench_trajectory_writer(n_atoms: int,  # Number of atoms of a frame
+                            log: logger.logging.Logger
+                            ) -> None:
+    """a frame by the block writer of PdbToPqr against the static text
+    of PqrFrames, and the raw write of the same bytes; the files are
+    checked to be the same bytes"""
+    rng: np.random.Generator = np.random.default_rng(seed=2023)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fname: str = os.path.join(tmp_dir, 'bench.pdb')
+        write_synthetic_pdb(fname, n_atoms)
+        pdb: pd.DataFrame = pdb_to_df.Pdb(fname, log).pdb_df
+        pdb['charge'] = np.round(rng.normal(scale=0.5, size=n_atoms), 4)
+        pdb['radius'] = rng.uniform(0.2, 2.2, size=n_atoms)
+        pqr_from_pdb.PdbToPqr.add_chain_identifier(pdb)
+        pqr_df: pd.DataFrame = pqr_from_pdb.PdbToPqr.mk_pqr_df(pdb)
+        writer: pqr_frames.PqrFrames = pqr_frames.PqrFrames(pqr_df)
+        coordinates: np.ndarray = pqr_df[['x', 'y', 'z']].to_numpy()
+        block_file: str = os.path.join(tmp_dir, 'block.pqr')
+        frame_file: str = os.path.join(tmp_dir, 'frame.pqr')
+        raw_file: str = os.path.join(tmp_dir, 'raw.pqr')
+        raw: bytes = writer.render(coordinates).tobytes()
+
+        def write_raw() -> None:
+            with open(raw_file, 'wb') as f_w:
+                f_w.write(raw)
+
+        results: dict[str, float] = {
+            'block writer':
+                timeit(lambda: pqr_from_pdb.PdbToPqr.write_pqr(
+                    block_file, pqr_df)),
+            'static text':
+                timeit(lambda: writer.write(frame_file, coordinates)),
+            'raw write': timeit(write_raw),
+        }
+        with open(block_file, 'rb') as f_b, open(frame_file, 'rb') as f_f:
+            if f_b.read() != f_f.read():
+                sys.exit(f'{bcolors.FAIL}trajectory_writer: the files are '
+                         f'not the same{bcolors.ENDC}')
+    report('trajectory_writer', results, n_atoms)
+    log.info(f'trajectory_writer: {results}\n')
+
+
+BENCHMARKS: dict[str, typing.Callable[[int, logger.logging.Logger], None]] = {
+    'pdb_reader': bench_pdb_reader,
+    'pdb_memory': bench_pdb_memory,
+    'residue_numbers': bench_residue_numbers,
+    'itp_topology': bench_itp_topology,
+    'itp_cache': bench_itp_cache,
+    'itp_parallel': bench_itp_parallel,
+    'pqr_writer': bench_pqr_writer,
+    'trajectory_writer': bench_trajectory_writer,
+}
+
+
+if __name__ == '__main__':
+    BENCHMARKS[sys.argv[1]](
+        int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000,
+        log=logger.setup_logger('benchmarks.log'))
@@ -0,0 +1,240 @@
+"""Reading the coordinates of uncompressed binary trajectories.
+The file is memory-mapped and the coordinates of a frame are returned
+as views into the map (no copy, no text parsing); only the headers are
+read to find where each frame starts.
+
+    Formats:
+        TRR: GROMACS full precision trajectory (XDR, big-endian),
+            positions in nm, single or double precision.
+        DCD: CHARMM/NAMD trajectory (Fortran unformatted records),
+            positions in Å, X, Y and Z in separate float32 blocks.
+
+    NONTE:
+    The trajectories have no names, the atoms are in the order of the
+    reference structure (PDB or GRO) and the topology (itp).
+"""
+
+import os
+import abc
+import sys
+import typing
+import numpy as np
+
+import logger
+import my_tools
+import pdb_to_df
+from colors_text import TextColor as bcolors
+
+
+class BinaryTrajectory(abc.ABC):
+    """Common part of the readers: the memory map of the file, the
+    offsets of the frames and the selection of the frames"""
+
+    info_msg: str = 'Message from BinaryTrajectory:\n'
+    scale: float  # Factor to convert the positions to Å
+    min_size: int  # Bytes of the headers before the first positions
+
+    def __init__(self,
+                 fname: str,  # Name of the trajectory file
+                 log: logger.logging.Logger
+                 ) -> None:
+        if my_tools.is_compressed(fname):
+            log.error(msg := f'\tCan not memory-map compressed `{fname}`\n')
+            sys.exit(f'{bcolors.FAIL}{self.__module__}:\n{msg}{bcolors.ENDC}')
+        self.fname: str = fname
+        if os.path.getsize(fname) < self.min_size:
+            log.error(msg := f'\tThe trajectory `{fname}` is empty or '
+                             'truncated\n')
+            sys.exit(f'{bcolors.FAIL}{self.__module__}:\n{msg}{bcolors.ENDC}')
+        self.data: np.memmap = np.memmap(fname, dtype=np.uint8, mode='r')
+        self.n_atoms: int
+        self.offsets: np.ndarray  # Start of the positions of each frame
+        self.n_atoms, self.offsets = self.scan()
+        self.info_msg += (f"\tMapped '{fname}': {len(self)} frames of "
+                          f"{self.n_atoms} atoms\n")
+        self.write_msg(log)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    @abc.abstractmethod
+    def scan(self) -> tuple[int, np.ndarray]:
+        """return the number of atoms and the offsets of the positions"""
+
+    @abc.abstractmethod
+    def coordinates(self,
+                    frame: int  # Index of the frame
+                    ) -> list[np.ndarray]:
+        """return x, y and z of the frame as views into the file, in the
+        unit of the file (see scale)"""
+
+    def check_size(self,
+                   end: int  # Byte after the part to read
+                   ) -> None:
+        """exit if the file ends before the byte"""
+        if end > len(self.data):
+            sys.exit(f'{bcolors.FAIL}{self.__module__}:\n\tThe trajectory '
+                     f'`{self.fname}` is truncated: {len(self.data)} bytes, '
+                     f'{end} needed{bcolors.ENDC}')
+
+    def select(self,
+               frames: typing.Optional[pdb_to_df.FrameSelection]
+               ) -> list[int]:
+        """return the indices of the selected frames, all if None"""
+        if frames is None:
+            return list(range(len(self)))
+        return pdb_to_df.select_frames(frames, len(self))
+
+    def view(self,
+             offset: int,  # Offset of the block in the file
+             dtype: str,  # Type of the numbers, with the byte order
+             count: int  # Number of the numbers
+             ) -> np.ndarray:
+        """return the numbers in the file as an array, without copy"""
+        size: int = np.dtype(dtype).itemsize * count
+        return self.data[offset:offset + size].view(dtype)
+
+    def write_msg(self,
+                  log: logger.logging.Logger  # To log
+                  ) -> None:
+        """write and log messages"""
+        print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
+              f'\t{self.info_msg}{bcolors.ENDC}')
+        log.info(self.info_msg)
+
+
+class Trr(BinaryTrajectory):
+    """
+    GROMACS TRR file, each frame is a header and the data blocks:
+        int magic (1993), string version ("GMX_trn_file")
+        ints: ir_size, e_size, box_size, vir_size, pres_size,
+              top_size, sym_size, x_size, v_size, f_size,
+              natoms, step, nre
+        reals: t, lambda
+        box, virial, pressure, x, v, f (each only if its size > 0)
+    All in XDR (big-endian); the size of the real (float or double) is
+    found from the sizes of the blocks.
+    """
+
+    scale: float = 10.0  # nm to Å
+    magic: int = 1993
+    n_sizes: int = 13  # Number of ints after the version string
+    min_size: int = 12 + 4 * n_sizes  # Header with an empty version
+
+    def scan(self) -> tuple[int, np.ndarray]:
+        """walk the headers of the frames"""
+        offsets: list[int] = []
+        n_atoms: int = 0
+        position: int = 0
+        while position < len(self.data):
+            self.check_size(position + 12)
+            head: np.ndarray = self.view(position, '>i4', 3)
+            if head[0] != self.magic:
+                sys.exit(f'{bcolors.FAIL}{self.__module__}:\n\tWrong magic '
+                         f'number in `{self.fname}` at byte {position}'
+                         f'{bcolors.ENDC}')
+            # magic, string length, xdr string length and padded string
+            position += 12 + (int(head[2]) + 3) // 4 * 4
+            self.check_size(position + 4 * self.n_sizes)
+            sizes: np.ndarray = self.view(position, '>i4', self.n_sizes)
+            position += 4 * self.n_sizes
+            (ir_size, e_size, box_size, vir_size, pres_size, top_size,
+             sym_size, x_size, v_size, f_size, n_atoms) = \
+                (int(item) for item in sizes[:11])
+            if x_size == 0:
+                sys.exit(f'{bcolors.FAIL}{self.__module__}:\n\tA frame '
+                         f'without positions in `{self.fname}`{bcolors.ENDC}')
+            self.real: str = '>f8' if x_size == n_atoms * 3 * 8 else '>f4'
+            position += 2 * np.dtype(self.real).itemsize  # t and lambda
+            position += ir_size + e_size + box_size + vir_size + \
+                pres_size + top_size + sym_size
+            offsets.append(position)
+            position += x_size + v_size + f_size
+            self.check_size(position)
+        return n_atoms, np.asarray(offsets, dtype=np.int64)
+
+    def coordinates(self,
+                    frame: int  # Index of the frame
+                    ) -> list[np.ndarray]:
+        """return x, y and z (nm) of the frame as views into the file"""
+        positions: np.ndarray = self.view(
+            self.offsets[frame], self.real, self.n_atoms * 3
+            ).reshape(self.n_atoms, 3)
+        return [positions[:, axis] for axis in range(3)]
+
+
+class Dcd(BinaryTrajectory):
+    """
+    CHARMM/NAMD DCD file, Fortran unformatted records (each record is
+    between two ints of its size):
+        header: 'CORD' and 20 ints (icntrl): number of frames, ...,
+                number of fixed atoms [8], unit cell flag [10],
+                4D flag [11], CHARMM version [19]
+        title: number of lines and lines of 80 chars
+        number of atoms
+    and for each frame:
+        unit cell: 6 doubles (only if the CHARMM flag and icntrl[10])
+        X, Y, Z: float32 each, the fourth dimension if icntrl[11]
+    The byte order is found from the size of the first record (84).
+    """
+
+    scale: float = 1.0  # Already in Å
+    header_size: int = 84  # Size of the first record
+    # The header, an empty title and the number of atoms with the markers
+    min_size: int = header_size + 8 + 12 + 12
+
+    def scan(self) -> tuple[int, np.ndarray]:
+        """read the header and compute the offsets of the frames"""
+        order: str = '<' if self.view(0, '<i4', 1)[0] == self.header_size \
+            else '>'
+        self.float: str = f'{order}f4'
+        icntrl: np.ndarray = self.view(8, f'{order}i4', 20)
+        if icntrl[8]:
+            sys.exit(f'{bcolors.FAIL}{self.__module__}:\n\tFixed atoms in '
+                     f'`{self.fname}` are not supported{bcolors.ENDC}')
+        is_charmm: bool = icntrl[19] != 0
+        position: int = self.header_size + 8
+        title_size: int = int(self.view(position, f'{order}i4', 1)[0])
+        position += title_size + 8
+        self.check_size(position + 12)
+        n_atoms: int = int(self.view(position + 4, f'{order}i4', 1)[0])
+        position += 12
+        record: int = 4 * n_atoms + 8  # One dimension with its markers
+        cell: int = 6 * 8 + 8 if is_charmm and icntrl[10] else 0
+        frame_size: int = \
+            cell + record * (4 if is_charmm and icntrl[11] else 3)
+        n_frames: int = -(-(len(self.data) - position) // frame_size)
+        self.check_size(position + frame_size * n_frames)
+        # The positions start after the unit cell and the first marker
+        return n_atoms, \
+            position + cell + 4 + frame_size * np.arange(n_frames)
+
+    def coordinates(self,
+                    frame: int  # Index of the frame
+                    ) -> list[np.ndarray]:
+        """return x, y and z (Å) of the frame as views into the file"""
+        record: int = 4 * self.n_atoms + 8
+        return [self.view(self.offsets[frame] + axis * record,
+                          self.float,
+                          self.n_atoms) for axis in range(3)]
+
+
+TRAJECTORIES: dict[str, type[BinaryTrajectory]] = {
+    'trr': Trr,
+    'dcd': Dcd,
+}
+
+
+def open_trajectory(fname: str,  # Name of the trajectory, .trr or .dcd
+                    log: logger.logging.Logger
+                    ) -> BinaryTrajectory:
+    """return the reader of the trajectory by its extension"""
+    extension: str = my_tools.split_extension(fname)[1]
+    if extension not in TRAJECTORIES:
+        log.error(msg := f'\tUnknown trajectory format: `{fname}`\n')
+        sys.exit(f'{bcolors.FAIL}{__name__}:\n{msg}{bcolors.ENDC}')
+    return TRAJECTORIES[extension](fname, log)
+
+
+if __name__ == '__main__':
+    open_trajectory(sys.argv[1], log=logger.setup_logger('traj.log'))
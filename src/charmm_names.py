@@ -0,0 +1,130 @@
+"""
+Read the aliases of the residue and atom names from CHARMM.names of the
+APBS server (the names of the PDB, AMBER, ... used in CHARMM.DAT):
+
+    <residue>
+        <name>WAT</name>
+        <useresname>TP3M</useresname>
+        <atom>
+            <name>O</name>
+            <useatomname>OH2</useatomname>
+        </atom>
+    </residue>
+The residue name is a plain name or a regular expression matched from
+its start, e.g. [NC]?...$ for all the amino acids; `$group` in the new
+name is the first group of the match, e.g. HI([PDE])$ -> HS$group.
+The plain names are kept in a dict and the patterns compiled once, and
+the matches of a residue name are kept for the next atoms.
+"""
+
+import re
+import sys
+import typing
+import itertools
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+
+import logger
+import my_tools
+from colors_text import TextColor as bcolors
+
+
+@dataclass
+class AliasRule:
+    """A <residue> of the file"""
+    resname: str  # Name, or pattern of the names, of the residue
+    useresname: str = ''  # Name in the force field, empty: the same
+    atoms: dict[str, str] = field(default_factory=dict)  # Old: new name
+
+
+class NameAliases:
+    """Find the names of a residue and atom in the force field"""
+
+    info_msg: str = 'Message from NameAliases:\n'
+
+    def __init__(self,
+                 fname: str,  # Name of the file, e.g. CHARMM.names
+                 log: logger.logging.Logger
+                 ) -> None:
+        self.rules: list[AliasRule] = self.read_file(fname, log)
+        self.exact: dict[str, list[int]] = {}  # Name: rules, in order
+        self.patterns: list[tuple[int, re.Pattern]] = []
+        for i, rule in enumerate(self.rules):
+            if re.escape(rule.resname) == rule.resname:
+                self.exact.setdefault(rule.resname, []).append(i)
+            else:
+                self.patterns.append((i, re.compile(rule.resname)))
+        self.matches: dict[str, list[tuple[str, dict[str, str]]]] = {}
+        self.info_msg += (f'\tNumber of rules: {len(self.rules)}, '
+                          f'patterns: {len(self.patterns)}\n')
+        self.write_msg(log)
+
+    def read_file(self,
+                  fname: str,
+                  log: logger.logging.Logger
+                  ) -> list[AliasRule]:
+        """parse the <residue> of the file, in order"""
+        self.info_msg += f'\tReading {fname}\n'
+        try:
+            with my_tools.open_file(fname, 'rb') as f_r:
+                root: ET.Element = ET.parse(f_r).getroot()
+        except ET.ParseError as err:
+            log.error(msg := f'\tThe file `{fname}` is not valid: {err}\n')
+            sys.exit(f'{bcolors.FAIL}{self.__module__}:\n{msg}{bcolors.ENDC}')
+        rules: list[AliasRule] = []
+        for residue in root.iter('residue'):
+            rule = AliasRule(residue.findtext('name', '').strip(),
+                             residue.findtext('useresname', '').strip())
+            for atom in residue.iter('atom'):
+                rule.atoms[atom.findtext('name', '').strip()] = \
+                    atom.findtext('useatomname', '').strip()
+            if rule.resname:
+                rules.append(rule)
+        return rules
+
+    def match(self,
+              resname: str  # Name of the residue
+              ) -> list[tuple[str, dict[str, str]]]:
+        """return the new residue name and the atom aliases of the rules
+        of the residue, in the order of the file"""
+        if resname in self.matches:
+            return self.matches[resname]
+        found: list[tuple[int, str]] = \
+            [(i, self.rules[i].useresname)
+             for i in self.exact.get(resname, [])]
+        for i, pattern in self.patterns:
+            if (result := pattern.match(resname)) is not None:
+                useresname: str = self.rules[i].useresname
+                if '$group' in useresname and result.groups():
+                    useresname = \
+                        useresname.replace('$group', result.group(1) or '')
+                found.append((i, useresname))
+        self.matches[resname] = [(useresname or resname, self.rules[i].atoms)
+                                 for i, useresname in sorted(found)]
+        return self.matches[resname]
+
+    def candidates(self,
+                   resname: str,  # Name of the residue
+                   atom_name: str  # Name of the atom
+                   ) -> typing.Iterator[tuple[str, str]]:
+        """yield the (resname, atom_name) to look for, the names as they
+        are first"""
+        rules: list[tuple[str, dict[str, str]]] = self.match(resname)
+        resnames: list[str] = \
+            list(dict.fromkeys([resname] + [item[0] for item in rules]))
+        atom_names: list[str] = list(dict.fromkeys(
+            [atom_name] + [item[1][atom_name] for item in rules
+                           if atom_name in item[1]]))
+        yield from itertools.product(resnames, atom_names)
+
+    def write_msg(self,
+                  log: logger.logging.Logger  # To log
+                  ) -> None:
+        """write and log messages"""
+        print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
+              f'\t{self.info_msg}{bcolors.ENDC}')
+        log.info(self.info_msg)
+
+
+if __name__ == '__main__':
+    NameAliases(sys.argv[1], log=logger.setup_logger('charmm_names.log'))
@@ -0,0 +1,178 @@
+"""Reading the GRO file (GROMACS coordinates) and returning the
+coordinates in the same DataFrame as the PDB reader (pdb_df).
+
+    NONTE:
+    The GRO file has no record type, occupancy, temperature, insertion
+    code or element, all the atoms are ATOM records, occupancy and
+    temperature are NaN and insertion_code and atom_symbol are empty.
+    Positions are converted from nm to Å. As GROMACS does, the width
+    of the positions is the distance between the decimal points of x
+    and y in the first atom line of each frame, so the files written
+    with more decimals are read too.
+"""
+
+
+import sys
+import typing
+import itertools
+import numpy as np
+import pandas as pd
+import logger
+import my_tools
+import pdb_to_df
+from colors_text import TextColor as bcolors
+
+
+# Spans (0-based, end exclusive) of the fields in the atoms lines, the
+# positions follow with the width of the file
+GRO_COLUMNS: dict[str, tuple[int, int]] = {
+    'residue_number': (0, 5),
+    'residue_name': (5, 10),
+    'atom_name': (10, 15),
+    'atom_id': (15, 20)
+}
+RESNAME_WIDTH: int = \
+    GRO_COLUMNS['residue_name'][1] - GRO_COLUMNS['residue_name'][0]
+POSITION_START: int = 20  # Where x starts in the atoms lines
+POSITION_WIDTH: int = 8  # Width of x, y and z with %8.3f
+LINE_WIDTH: int = 80  # Width of a line, velocities are not read
+NM_TO_ANGSTROM: float = 10.0
+
+
+def position_width(line: bytes  # First atom line of a frame
+                   ) -> int:
+    """return the width of each position field, the distance between
+    the decimal points of x and y as GROMACS reads it; 0 if there are
+    not two points"""
+    first: int = line.find(b'.', POSITION_START)
+    second: int = line.find(b'.', first + 1) if first >= 0 else -1
+    return second - first if second >= 0 else 0
+
+
+def atom_dtype(width: int  # Width of each position field
+               ) -> np.dtype:
+    """return the fixed-width view of an atom line, each field is a
+    bytes string"""
+    spans: dict[str, tuple[int, int]] = dict(GRO_COLUMNS)
+    for i, name in enumerate(['x', 'y', 'z']):
+        start: int = POSITION_START + i * width
+        spans[name] = (start, start + width)
+    return np.dtype({
+        'names': list(spans),
+        'formats': [f'S{end - start}' for start, end in spans.values()],
+        'offsets': [start for start, _ in spans.values()],
+        'itemsize': max(LINE_WIDTH, POSITION_START + 3 * width)})
+
+
+class Gro:
+    """
+    Read the GRO file, a multi-frame file (e.g. from gmx trjconv) can
+    be read frame by frame.
+    A frame in the GRO file has the format:
+        title string (free format, optional time in ps after 't=')
+        number of atoms (free format integer)
+        one line for each atom (fixed format, see below)
+        box vectors (free format, space separated reals)
+    The atoms lines are in the (C) format:
+        "%5d%-5s%5s%5d%8.3f%8.3f%8.3f%8.4f%8.4f%8.4f"
+        residue number, residue name, atom name, atom number,
+        position (x, y, z in nm), velocity (x, y, z in nm/ps, optional)
+    where the positions may have more decimals (and width), the same in
+    the whole frame. Blank lines after the last frame are ignored.
+    """
+
+    info_msg: str = 'Message:\n'  # Message to pass for logging and writing
+    resname_width: int = RESNAME_WIDTH  # Chars of the residue names
+
+    def __init__(self,
+                 fname: str,  # GRO file name
+                 log: logger.logging.Logger,
+                 stream: bool = False,  # Iterate over the frames instead
+                 frames: typing.Optional[pdb_to_df.FrameSelection] = None
+                 ) -> None:
+        self.info_msg += f"\tReading '{fname}' ...\n"
+        if frames is not None:
+            log.error(msg := '\tSelecting frames needs a PDB file\n')
+            sys.exit(f'{bcolors.FAIL}{self.__module__}:\n{msg}{bcolors.ENDC}')
+        if stream:
+            self.info_msg += '\tThe frames are read one by one\n'
+            self.frame_ids: typing.Iterable[int] = itertools.count()
+            self.frames: typing.Iterator[pd.DataFrame] = \
+                self.iter_frames(fname)
+        else:
+            self.pdb_df: pd.DataFrame = next(self.iter_frames(fname))
+            self.info_msg += f'\tNumber of atoms: {len(self.pdb_df)}\n'
+        self.__write_msg(log)
+        self.info_msg = ''  # Empety the msg
+
+    def iter_frames(self,
+                    fname: str  # GRO file name
+                    ) -> typing.Iterator[pd.DataFrame]:
+        """Yield the frames of the file one by one, only the lines of
+        the current frame are kept in memory"""
+        with my_tools.open_file(fname, 'rb') as f_i:
+            while title := f_i.readline():
+                count: bytes = f_i.readline()
+                if not (title.strip() or count.strip()) and \
+                   not any(line.strip() for line in f_i):
+                    break  # Blank lines at the end of the file
+                if not count.strip().isdigit():
+                    sys.exit(f'{bcolors.FAIL}{self.__module__}:\n\tThe '
+                             f'number of atoms `{count.strip().decode()}` in '
+                             f'`{fname}` is not an integer{bcolors.ENDC}')
+                n_atoms: int = int(count)
+                atom_lines: list[bytes] = \
+                    list(itertools.islice(f_i, n_atoms))
+                f_i.readline()  # Box
+                if len(atom_lines) != n_atoms:
+                    sys.exit(f'{bcolors.FAIL}{self.__module__}:\n\tThe '
+                             f'file `{fname}` ended in a frame{bcolors.ENDC}')
+                width: int = POSITION_WIDTH
+                if atom_lines:
+                    width = position_width(atom_lines[0])
+                if not width:
+                    sys.exit(f'{bcolors.FAIL}{self.__module__}:\n\tThe '
+                             f'positions in `{fname}` have no decimal '
+                             f'point{bcolors.ENDC}')
+                dtype: np.dtype = atom_dtype(width)
+                lines: np.ndarray = \
+                    np.array(atom_lines, dtype=f'S{dtype.itemsize}')
+                yield pd.DataFrame(self.decode_atoms(lines, dtype),
+                                   columns=list(pdb_to_df.PDB_COLUMNS),
+                                   copy=False)
+
+    @staticmethod
+    def decode_atoms(lines: np.ndarray,  # Atoms lines of one frame
+                     dtype: np.dtype  # From atom_dtype
+                     ) -> dict[str, typing.Any]:
+        """Decode the fixed columns of all the atoms at once, in the
+        compact table of pdb_to_df.Pdb"""
+        fields: np.ndarray = lines.view(dtype)
+        n_atoms: int = len(lines)
+        columns: dict[str, typing.Any] = {}
+        columns['records'] = np.zeros(n_atoms, dtype=np.int8)  # ATOM
+        for name in ['atom_name', 'residue_name']:
+            columns[name] = pdb_to_df.intern_names(fields[name])
+        for name in ['atom_id', 'residue_number']:
+            columns[name] = pdb_to_df.parse_fixed_integers(fields[name], name)
+        for name in ['x', 'y', 'z']:
+            columns[name] = (pdb_to_df.parse_fixed_numbers(fields[name]) *
+                             NM_TO_ANGSTROM).astype(np.float32)
+        for name in ['occupancy', 'temperature']:
+            columns[name] = np.full(n_atoms, np.nan, dtype=np.float32)
+        for name in ['insertion_code', 'atom_symbol']:
+            columns[name] = pd.Categorical.from_codes(
+                np.zeros(n_atoms, dtype=np.int8), [''])
+        return columns
+
+    def __write_msg(self,
+                    log: logger.logging.Logger
+                    ) -> None:
+        """write and log messages"""
+        print(f'{bcolors.OKCYAN}{self.__module__}:\n'
+              f'\t{self.info_msg}{bcolors.ENDC}')
+        log.info(self.info_msg)
+
+
+if __name__ == '__main__':
+    gro = Gro(sys.argv[1], log=logger.setup_logger('gro2df.log'))
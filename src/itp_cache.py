@@ -0,0 +1,161 @@
+"""On-disk cache of the parsed sections of the itp files.
+Each section DataFrame is saved as a NumPy archive (one array per
+column, no pickle) named by a hash of the contents of the itp file and
+the version of the parser, so a changed file or parser never hits an
+old entry. Used entries are touched and the least recently used ones
+are removed when the cache is larger than its size.
+
+    usage:
+        python itp_cache.py [clear] [cache directory]
+    the size of the cache is printed, or all its entries are removed.
+"""
+
+import os
+import sys
+import typing
+import hashlib
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import my_tools
+from colors_text import TextColor as bcolors
+
+
+# The cache directory can be moved with the STRUCT2APBS_CACHE variable,
+# otherwise it is in XDG_CACHE_HOME (~/.cache if not set)
+CACHE_DIR: str = \
+    os.environ.get('STRUCT2APBS_CACHE') or my_tools.cache_dir('itp')
+CACHE_SIZE: int = 1 << 28  # Largest size of the cache in bytes (256 MiB)
+CACHE_EXT: str = '.npz'
+
+
+class ItpCache:
+    """Save and load the sections of the parsed itp files"""
+
+    def __init__(self,
+                 cache_dir: str = CACHE_DIR,  # Directory of the entries
+                 max_size: int = CACHE_SIZE  # Bytes kept in the directory
+                 ) -> None:
+        self.cache_dir: str = cache_dir
+        self.max_size: int = max_size
+
+    @staticmethod
+    def key(raw: bytes,  # Contents of the itp file
+            version: str  # Version of the parser
+            ) -> str:
+        """return the name of the entries of a file"""
+        digest = hashlib.sha256(raw)
+        digest.update(version.encode())
+        return digest.hexdigest()
+
+    def path(self,
+             key: str,  # Key of the file
+             section: str  # Name of the section
+             ) -> str:
+        """return the name of the entry"""
+        return os.path.join(self.cache_dir, f'{key}_{section}{CACHE_EXT}')
+
+    def load(self,
+             key: str,  # Key of the file
+             section: str  # Name of the section
+             ) -> typing.Optional[pd.DataFrame]:
+        """return the saved section, None if it is not in the cache"""
+        path: str = self.path(key, section)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                columns: list[str] = entry['columns'].tolist()
+                df_i: pd.DataFrame = pd.DataFrame(
+                    {column: entry[f'column_{i}']
+                     for i, column in enumerate(columns)},
+                    index=pd.RangeIndex(*entry['index']))
+            os.utime(path)  # Recently used
+        except (OSError, KeyError, ValueError):
+            return None
+        return df_i
+
+    def save(self,
+             key: str,  # Key of the file
+             section: str,  # Name of the section
+             df_i: pd.DataFrame  # Section to save
+             ) -> None:
+        """write the section in the cache and remove the old entries,
+        the section is not saved if it can not be written back as it is
+        (e.g., an index which is not a range)"""
+        if not isinstance(df_i.index, pd.RangeIndex):
+            return
+        index: pd.RangeIndex = df_i.index
+        arrays: dict[str, np.ndarray] = {
+            'columns': np.asarray(df_i.columns, dtype=str),
+            'index': np.array([index.start, index.stop, index.step])}
+        for i, column in enumerate(df_i.columns):
+            values: np.ndarray = df_i[column].to_numpy()
+            if values.dtype == object:
+                values = values.astype(str)
+            arrays[f'column_{i}'] = values
+        tmp_file: str = ''
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.cache_dir,
+                                             suffix='.tmp',
+                                             delete=False) as f_w:
+                tmp_file = f_w.name
+                np.savez(f_w, **arrays)
+            os.replace(tmp_file, self.path(key, section))
+        except OSError as err:
+            if tmp_file and os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            print(f'{bcolors.WARNING}{self.__class__.__name__}:\n'
+                  f'\tThe section `{section}` could not be saved in the '
+                  f'cache: {err}{bcolors.ENDC}')
+            return
+        self.evict()
+
+    def entries(self) -> list[os.DirEntry]:
+        """return the entries, the least recently used first"""
+        try:
+            with os.scandir(self.cache_dir) as items:
+                files: list[os.DirEntry] = \
+                    [item for item in items if item.name.endswith(CACHE_EXT)]
+        except FileNotFoundError:
+            return []
+        return sorted(files, key=lambda item: item.stat().st_mtime_ns)
+
+    def size(self) -> int:
+        """return the size of all the entries in bytes"""
+        return sum(item.stat().st_size for item in self.entries())
+
+    def evict(self) -> None:
+        """remove the least recently used entries until the cache is not
+        larger than max_size"""
+        files: list[os.DirEntry] = self.entries()
+        total: int = sum(item.stat().st_size for item in files)
+        for item in files:
+            if total <= self.max_size:
+                break
+            total -= item.stat().st_size
+            try:
+                os.remove(item.path)
+            except FileNotFoundError:
+                pass
+
+    def invalidate(self,
+                   key: typing.Optional[str] = None  # Of the file, or all
+                   ) -> None:
+        """remove the entries of a file, or all the entries"""
+        for item in self.entries():
+            if key is None or item.name.startswith(f'{key}_'):
+                try:
+                    os.remove(item.path)
+                except FileNotFoundError:
+                    pass
+
+
+if __name__ == '__main__':
+    ARGS: list[str] = [arg for arg in sys.argv[1:] if arg != 'clear']
+    CACHE = ItpCache(ARGS[0]) if ARGS else ItpCache()
+    if 'clear' in sys.argv[1:]:
+        CACHE.invalidate()
+    print(f'{bcolors.OKCYAN}{CACHE.cache_dir}: {len(CACHE.entries())} '
+          f'entries, {CACHE.size() / 2**20:.1f} MiB{bcolors.ENDC}')
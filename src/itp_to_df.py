@@ -11,7 +11,9 @@
     the rest is user defined. So atom can be named as you like,
     cgnr made larger or smaller (if possible, the total charge of
     a charge group should be zero), and charges can be changed here
-    too.
+    too. The columns are read by their positions: nr, type, resnr,
+    residue, atom, cgnr, charge and the optional mass; the element is
+    the word after the ';' (e.g. "; O."), or found by the mass.
 
         [ bonds ] : no comment.
 
@@ -24,12 +26,57 @@
     dihedrals.
     """
 
+import io
+import os
+import re
 import sys
 import typing
+import functools
+import itertools
+import concurrent.futures
+import numpy as np
 import pandas as pd
+import my_tools
+import itp_cache
 from colors_text import TextColor as bcolors
 
 
+# The patterns start with a literal (e.g. the '\n' before a line and
+# not '^'), so they are searched fast in the large texts
+# Header of a section, e.g. "[ atoms ]", only spaces before it
+SECTION_HEADER: re.Pattern = re.compile(r'\[[ \t]*(\w+)[ \t]*\][^\n]*')
+# Comment lines (headers of the columns) of a section
+COMMENT_LINE: re.Pattern = re.compile(r'\n([ \t]*;[^\n]*)')
+# Lines without data: comments, preprocessor directives and empty lines
+NO_DATA_LINE: re.Pattern = \
+    re.compile(r'\n(?=[ \t]*(?:[;#]|\n|$))[^\n]*')
+# Name after the ';' of each data line, empty if there is none
+LINE_NAME: re.Pattern = re.compile(r'[^;\n]*(?:;[ \t]*(\S*))?[^\n]*\n')
+# Eighth column (the mass in [ atoms ]) of each data line, empty if the
+# line has only seven
+EIGHTH_COLUMN: re.Pattern = \
+    re.compile(r'[ \t]*(?:[^\s;]+[ \t]*){7}([^\s;]*)[^\n]*\n')
+# Same chars as free_char_line, when they are tokens of their own
+SPECIAL_TOKEN: re.Pattern = re.compile(r'(?<!\S)(?:;|#|:|\.\.\.)(?!\S)')
+# Included file: #include "name.itp" or #include <name.itp>
+INCLUDE: re.Pattern = re.compile(r'#include[ \t]+["<]([^">\n]+)[">]')
+CHUNK_SIZE: int = 1 << 24  # Bytes read from the file at once (16 MiB)
+PARALLEL_SIZE: int = 1 << 23  # Smallest section parsed in parts (8 Mi)
+# Version of the DataFrames made by the parser, a part of the key of the
+# cached sections (itp_cache); change it when the DataFrames change
+PARSER_VERSION: str = '4'
+# Masses (amu) of the common elements, to find the element of an atom
+# without one in the itp file; the nearest one within ELEMENT_TOLERANCE
+ELEMENT_MASSES: dict[str, float] = {
+    'H': 1.008, 'C': 12.011, 'N': 14.007, 'O': 15.999, 'F': 18.998,
+    'Na': 22.990, 'Mg': 24.305, 'Al': 26.982, 'Si': 28.086, 'P': 30.974,
+    'S': 32.06, 'Cl': 35.45, 'K': 39.098, 'Ca': 40.078, 'Fe': 55.845,
+    'Cu': 63.546, 'Zn': 65.38, 'Br': 79.904, 'Rb': 85.468, 'I': 126.904,
+    'Cs': 132.905
+}
+ELEMENT_TOLERANCE: float = 0.1
+
+
 # A helper function needed by most of the classes to clean the lines
 def free_char_line(line: str  # line of the itp file
                    ) -> list[str]:  # Free from chars
@@ -42,550 +89,595 @@ def free_char_line(line: str  # line of the itp file
     return l_line
 
 
+def line_start(text: str,  # Text of the file or a section
+               position: int  # A position in the text
+               ) -> int:
+    """return the position of the start of the line"""
+    return text.rfind('\n', 0, position) + 1
+
+
+def split_section(section: str  # All the text of a section
+                  ) -> tuple[list[list[str]], str]:
+    """return the comment lines (as tokens) and the data lines"""
+    comments: list[list[str]] = [
+        free_char_line(line) for line in COMMENT_LINE.findall(f'\n{section}')]
+    data: str = NO_DATA_LINE.sub('', f'\n{section}')
+    return comments, f'{data[1:]}\n' if data else ''
+
+
+def read_columns(data: str,  # Data lines of a section
+                 n_columns: int,  # Number of the leading columns to read
+                 dtype: typing.Any  # Type of the columns
+                 ) -> np.ndarray:
+    """decode the first columns of all the lines at once, the text
+    after ';' in each line is ignored"""
+    if not data:
+        return np.empty((0, n_columns), dtype=dtype)
+    return np.loadtxt(io.StringIO(data),
+                      dtype=dtype,
+                      comments=';',
+                      usecols=range(n_columns),
+                      ndmin=2)
+
+
+def line_names(data: str  # Data lines of a section
+               ) -> list[str]:
+    """return the name after the ';' of each line"""
+    return LINE_NAME.findall(data)
+
+
+def split_chunks(text: str,  # Text of a section
+                 n_chunks: int  # Number of the parts
+                 ) -> list[str]:
+    """split the text in parts of about the same size, at the ends of
+    the lines"""
+    bounds: list[int] = [0]
+    for i in range(1, n_chunks):
+        end: int = text.find('\n', len(text) * i // n_chunks)
+        if end == -1:
+            break
+        if end + 1 > bounds[-1]:
+            bounds.append(end + 1)
+    bounds.append(len(text))
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def parse_chunk(chunk: str,  # Whole lines of a section
+                n_columns: int,  # Number of the leading columns to read
+                dtype: typing.Any,  # Type of the columns
+                free_chars: bool  # Drop special chars, no names (atoms)
+                ) -> tuple[list[list[str]], np.ndarray, list[str]]:
+    """return the comment lines, the first columns and the names after
+    ';' of the data lines"""
+    comments: list[list[str]]  # Tokens of the comment lines
+    data: str  # Lines of the data
+    comments, data = split_section(chunk)
+    if free_chars:
+        return comments, \
+            read_columns(SPECIAL_TOKEN.sub(' ', data), n_columns, dtype), []
+    return comments, read_columns(data, n_columns, dtype), line_names(data)
+
+
+def parse_section(section: str,  # All the text of a section
+                  n_columns: int,  # Number of the leading columns to read
+                  dtype: typing.Any,  # Type of the columns
+                  free_chars: bool = False,  # See parse_chunk
+                  workers: int = 1  # Processes for a large section
+                  ) -> tuple[list[list[str]], np.ndarray, list[str]]:
+    """parse the section at once, or a large one in parts of whole lines
+    in a pool of processes; the results are the same"""
+    if workers < 1:
+        workers = os.cpu_count() or 1
+    if workers == 1 or len(section) < PARALLEL_SIZE:
+        return parse_chunk(section, n_columns, dtype, free_chars)
+    chunks: list[str] = split_chunks(section, workers)
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        results: list[tuple[list[list[str]], np.ndarray, list[str]]] = \
+            list(pool.map(parse_chunk,
+                          chunks,
+                          itertools.repeat(n_columns),
+                          itertools.repeat(dtype),
+                          itertools.repeat(free_chars)))
+    return ([line for result in results for line in result[0]],
+            np.concatenate([result[1] for result in results]),
+            [name for result in results for name in result[2]])
+
+
 class Itp:
     """read itp file and return a DataFrame of the information
-    within the file"""
+    within the file.
+    Only the boundaries of the sections are found when the file is
+    read, each DataFrame is made on its first access and kept; the
+    sections can also be parsed at once by their attribute names, e.g.:
+        Itp(fname, sections=['atoms'])
+    With a cache (itp_cache.ItpCache) the sections parsed before from
+    the same contents are loaded from it and the text is not parsed.
+    Sections larger than PARALLEL_SIZE are parsed in parts of whole
+    lines by `workers` processes, with the same results.
+    """
+
+    attributes: list[str] = ['atoms', 'bonds', 'angles', 'dihedrals',
+                             'molecules', 'atomtypes']
+
     def __init__(self,
-                 fname: str  # Name of the itp file
+                 fname: str,  # Name of the itp file
+                 sections: typing.Optional[list[str]] = None,  # To parse now
+                 cache: typing.Optional[itp_cache.ItpCache] = None,
+                 workers: int = 1  # Processes for large sections, 0: all
                  ) -> None:
         print(f"{bcolors.OKBLUE}Reading '{fname}' ...{bcolors.ENDC}")
-        self.get_itp(fname)
-
-    def get_itp(self,
-                fname: str  # Name of the itp file
-                ) -> None:
-        """read the file line by line and call related methods"""
-        atoms: bool = False  # Flag of 'atoms' occurrence
-        bonds: bool = False  # Flag of 'bonds' occurrence
-        angles: bool = False  # Flag of 'angles' occurrence
-        dihedrals: bool = False  # Flag of 'dihedrals' occurrence
-        impropers: bool = False  # Flag of 'impropers' occurrence
-        moleculetype: bool = False  # Flag of 'moleculetype' occurrence
-        atomtypes: bool = False  # Flag of 'moleculetype' occurrence
-        atoms_info: list[str] = []  # to append atoms lines
-        bonds_info: list[str] = []  # to append bonds lines
-        angles_info: list[str] = []  # to append angles lines
-        dihedrals_info: list[str] = []  # to append dihedrals lines
-        moleculetype_info: list[str] = []  # to append dihedrals lines
-        atomtypes_info: list[str] = []  # to append atomtypes lines
-        with open(fname, 'r', encoding='utf8') as f_r:
-            while True:
-                line: str = f_r.readline()
-                if line.strip():
-                    if line.strip().startswith('['):
-                        wilds: list[str]  # Parts of the line
-                        wilds = line.strip().split()
-                        if wilds[1] == 'atoms':
-                            atoms, bonds, angles, dihedrals, impropers,\
-                                moleculetype, atomtypes = \
-                                True, False, False, False, False, \
-                                False, False
-                        elif wilds[1] == 'bonds':
-                            atoms, bonds, angles, dihedrals, impropers,\
-                                moleculetype, atomtypes = \
-                                False, True, False, False, False, \
-                                False, False
-                        elif wilds[1] == 'angles':
-                            atoms, bonds, angles, dihedrals, impropers,\
-                                moleculetype, atomtypes = \
-                                False, False, True, False, False, \
-                                False, False
-                        elif wilds[1] == 'dihedrals':
-                            atoms, bonds, angles, dihedrals, impropers,\
-                                moleculetype, atomtypes = \
-                                False, False, False, True, False, \
-                                False, False
-                        elif wilds[1] == 'moleculetype':
-                            atoms, bonds, angles, dihedrals, impropers,\
-                                moleculetype, atomtypes = \
-                                False, False, False, False, False, \
-                                True, False
-                        elif wilds[1] == 'atomtypes':
-                            atoms, bonds, angles, dihedrals, impropers,\
-                                moleculetype, atomtypes = \
-                                False, False, False, False, False, \
-                                False, True
-                        else:
-                            atoms, bonds, angles, dihedrals, impropers,\
-                                moleculetype, atomtypes = \
-                                False, False, False, False, False, \
-                                False, False
-                    else:
-                        if moleculetype:
-                            moleculetype_info.append(line)
-                        if atoms:
-                            atoms_info.append(line)
-                        if bonds:
-                            bonds_info.append(line)
-                        if angles:
-                            angles_info.append(line)
-                        if dihedrals:
-                            if 'impropers' not in free_char_line(line):
-                                impropers = False
-                            else:
-                                impropers = True
-                                dihedrals = False
-                        if dihedrals and not impropers:
-                            dihedrals_info.append(line)
-                        if atomtypes:
-                            atomtypes_info.append(line)
-                if not line:
-                    break
-        atom = AtomsInfo(atoms_info)
-        molecules = MoleculeInfo(moleculetype_info)
-        bond = BondsInfo(atoms=atom.df, bonds=bonds_info)
-        angle = AnglesInfo(atoms=atom.df, angles=angles_info)
-        dihedral = DihedralsInfo(atoms=atom.df, dihedrals=dihedrals_info)
-        atomtype = AtomsTypes(atomtypes_info)
-        self.atoms = atom.df
-        self.bonds = bond.df
-        self.angles = angle.df
-        self.dihedrals = dihedral.df
-        self.molecules = molecules.df
-        self.atomtypes = atomtype.df
+        self.workers: int = workers
+        self.raw: bytes = self.read_file(fname)
+        self.cache: typing.Optional[itp_cache.ItpCache] = cache
+        self.cache_key: str = \
+            '' if cache is None else cache.key(self.raw, PARSER_VERSION)
+        for name in sections or []:
+            if name not in self.attributes:
+                sys.exit(f'{bcolors.FAIL}{self.__class__.__name__}:\n'
+                         f'\tUnknown section `{name}`, it must be one of '
+                         f'{self.attributes}\n{bcolors.ENDC}')
+            getattr(self, name)
+
+    @staticmethod
+    def read_file(fname: str  # Name of the itp file
+                  ) -> bytes:
+        """read the file in large chunks"""
+        with my_tools.open_file(fname, 'rb') as f_r:
+            return b''.join(iter(lambda: f_r.read(CHUNK_SIZE), b''))
+
+    @functools.cached_property
+    def text(self) -> str:
+        """all the text of the file, with '\\n' as the end of lines"""
+        return io.TextIOWrapper(io.BytesIO(self.raw), encoding='utf8').read()
+
+    @functools.cached_property
+    def headers(self) -> list[tuple[str, int, int]]:
+        """the name, start and end of the body of each section, in the
+        order of the file"""
+        text: str = self.text
+        matches: list[re.Match] = [
+            match for match in SECTION_HEADER.finditer(text)
+            if not text[line_start(text, match.start()):match.start()].strip()]
+        headers: list[tuple[str, int, int]] = []
+        for header, following in zip(matches, matches[1:] + [None]):
+            end: int = len(text) if following is None else following.start()
+            headers.append((header.group(1), header.end() + 1, end))
+        return headers
+
+    @functools.cached_property
+    def spans(self) -> dict[str, list[tuple[int, int]]]:
+        """the start and end of the body of each section, the parts of a
+        section repeated in the file are kept in order"""
+        spans: dict[str, list[tuple[int, int]]] = {}
+        for name, start, end in self.headers:
+            spans.setdefault(name, []).append((start, end))
+        return spans
+
+    def section(self,
+                name: str  # Name of the section in the file
+                ) -> list[str]:
+        """return the text of each part of the section"""
+        return [self.text[start:end]
+                for start, end in self.spans.get(name, [])]
+
+    def from_cache(self,
+                   name: str,  # Name of the attribute
+                   parse: typing.Callable[[], pd.DataFrame]  # If not cached
+                   ) -> pd.DataFrame:
+        """return the section from the cache, or parse and save it"""
+        if self.cache is None:
+            return parse()
+        df_i: typing.Optional[pd.DataFrame] = \
+            self.cache.load(self.cache_key, name)
+        if df_i is None:
+            df_i = parse()
+            self.cache.save(self.cache_key, name, df_i)
+        return df_i
+
+    @functools.cached_property
+    def atoms(self) -> pd.DataFrame:
+        """[ atoms ] section"""
+        return self.from_cache('atoms', lambda: AtomsInfo(
+            ''.join(self.section('atoms')), self.workers).df)
+
+    @functools.cached_property
+    def atoms_index(self) -> 'AtomsIndex':
+        """atoms ids to rows of the atoms, shared by the bonded sections"""
+        return AtomsIndex(self.atoms)
+
+    @functools.cached_property
+    def bonds(self) -> pd.DataFrame:
+        """[ bonds ] section, named by the atoms"""
+        return self.from_cache('bonds', lambda: BondsInfo(
+            atoms=self.atoms,
+            bonds=''.join(self.section('bonds')),
+            index=self.atoms_index,
+            workers=self.workers).df)
+
+    @functools.cached_property
+    def angles(self) -> pd.DataFrame:
+        """[ angles ] section, named by the atoms"""
+        return self.from_cache('angles', lambda: AnglesInfo(
+            atoms=self.atoms,
+            angles=''.join(self.section('angles')),
+            index=self.atoms_index,
+            workers=self.workers).df)
+
+    @functools.cached_property
+    def dihedrals(self) -> pd.DataFrame:
+        """[ dihedrals ] section without the impropers, named by the
+        atoms"""
+        return self.from_cache('dihedrals', lambda: DihedralsInfo(
+            atoms=self.atoms,
+            dihedrals=''.join(DihedralsInfo.drop_impropers(item)
+                              for item in self.section('dihedrals')),
+            index=self.atoms_index,
+            workers=self.workers).df)
+
+    @functools.cached_property
+    def molecules(self) -> pd.DataFrame:
+        """[ moleculetype ] section"""
+        return self.from_cache('molecules', lambda: MoleculeInfo(
+            ''.join(self.section('moleculetype'))).df)
+
+    @functools.cached_property
+    def atomtypes(self) -> pd.DataFrame:
+        """[ atomtypes ] section, empty if not in the file"""
+        return self.from_cache('atomtypes', lambda: AtomsTypes(
+            ''.join(self.section('atomtypes'))).df)
+
+    @functools.cached_property
+    def moleculetypes(self) -> pd.DataFrame:
+        """[ atoms ] of each [ moleculetype ] in the file, in one table
+        with the name of the molecule in the column `moleculetype`"""
+        return self.from_cache('moleculetypes', self.get_moleculetypes)
+
+    @functools.cached_property
+    def includes(self) -> list[str]:
+        """the files of the #include lines, as written in the file"""
+        return self.from_cache('includes', lambda: pd.DataFrame(
+            {'include': [
+                match.group(1) for match in INCLUDE.finditer(self.text)
+                if not self.text[line_start(self.text, match.start()):
+                                 match.start()].strip()]},
+            dtype=str))['include'].tolist()
+
+    def get_moleculetypes(self) -> pd.DataFrame:
+        """split the file by its [ moleculetype ] sections and parse the
+        [ atoms ] of each one"""
+        names: list[str] = []  # Name of each molecule
+        atoms: list[list[str]] = []  # Parts of [ atoms ] of each molecule
+        for name, start, end in self.headers:
+            if name == 'moleculetype':
+                names.append(str(
+                    MoleculeInfo(self.text[start:end]).df['Name'].iloc[0]))
+                atoms.append([])
+            elif name == 'atoms' and names:
+                atoms[-1].append(self.text[start:end])
+        tables: list[pd.DataFrame] = []
+        for name, parts in zip(names, atoms):
+            df_i: pd.DataFrame = AtomsInfo(''.join(parts)).df
+            df_i['moleculetype'] = name
+            tables.append(df_i)
+        if not tables:
+            return pd.DataFrame(columns=AtomsInfo.columns + ['moleculetype'])
+        return pd.concat(tables, ignore_index=True)
 
 
 class AtomsTypes:
     """Get the atomtypes info at the top of the charmm itp files"""
 
+    columns: list[str] = \
+        ['name', 'atom_nr', 'mass', 'charge', 'ptype', 'sigma', 'epsilon']
+
     def __init__(self,
-                 atomtypes: list[str]
+                 atomtypes: str  # Text of the section read by Itp class
                  ) -> None:
         self.df: pd.DataFrame = self.get_atoms_types(atomtypes)
 
     def get_atoms_types(self,
-                        atomtypes: list[str]
+                        atomtypes: str  # Text of the section
                         ) -> pd.DataFrame:
-        """parse the lines"""
-        sparsed_lines: list[dict[str, typing.Any]] = []
-        for line in atomtypes:
-            if line.startswith(';'):
-                pass
-            else:
-                sparsed_lines.append(self._process_line(line))
-        return pd.DataFrame(sparsed_lines)
-
-    def _process_line(self,
-                      line: str
-                      ) -> dict[str, typing.Any]:
-        """sparse lines"""
-        tmp: list[str] = line.split(' ')
-        tmp = [item for item in tmp if item]
-        return {
-            'name': tmp[0],
-            'atom_nr': int(tmp[1]),
-            'mass': float(tmp[2]),
-            'charge': float(tmp[3]),
-            'ptype': tmp[4],
-            'sigma': float(tmp[5]),
-            'epsilon': float(tmp[6]),
-        }
+        """parse the data lines at once"""
+        data: str = split_section(atomtypes)[1]
+        if not data:
+            return pd.DataFrame()
+        values: np.ndarray = read_columns(data, len(self.columns), str)
+        df_types: pd.DataFrame = pd.DataFrame(values, columns=self.columns)
+        df_types['atom_nr'] = df_types['atom_nr'].astype(int)
+        for column in ['mass', 'charge', 'sigma', 'epsilon']:
+            df_types[column] = df_types[column].astype(float)
+        return df_types
 
 
 class MoleculeInfo:
     """get molecules wild information and return the line and its info"""
+
+    columns: list[str] = ['Name', 'nrexcl']
+
     def __init__(self,
-                 molecules: list[str]  # line read by Itp class
+                 molecules: str  # Text of the section read by Itp class
                  ) -> None:
         self.get_molecule_info(molecules)
 
     def get_molecule_info(self,
-                          molecules: list[str]  # line about molecules
+                          molecules: str  # Text of the section
                           ) -> None:
-        """read and return data about molecule"""
-        l_line: list[str]  # Breaking the line chars
-        columns: list[str] = ['Name', 'nrexcl']
-        name: list[str] = []  # Name of the molecules
-        style: list[str] = []
-        for line in molecules:
-            tmp = line.strip().split('\t')
-            tmp = [item for item in tmp if tmp]
-            line = ' '.join(tmp)
-            if line.startswith(';'):
-                l_line = free_char_line(line)
-                if l_line != columns:
-                    sys.exit(f'{bcolors.FAIL}{self.__class__.__name__}:\n'
-                             f'\tError in the [ atoms ] header of the '
-                             f'itp file\n{bcolors.ENDC}')
-            else:
-                l_line = line.split(' ')
-                l_line = [item for item in l_line if item]
-                name.append(l_line[0])
-                style.append(l_line[1])
-        self.df = self.mk_df(name, style, columns)
-
-    @staticmethod
-    def mk_df(name: list[str],  # Name of the molecules
-              style: list[str],  # Style of the interactions(!)
-              columns: list[str]  # Name of the columns
-              ) -> pd.DataFrame:
-        """make a dataframe to save all the data"""
-        df_molecules = pd.DataFrame(columns=columns)
-        df_molecules['Name'] = name
-        df_molecules['nrexcl'] = style
-        return df_molecules
+        """read and return data about molecule, the columns by their
+        positions (the header may be e.g. "; molname nrexcl")"""
+        data: str = split_section(molecules)[1]  # Lines of the molecules
+        values: np.ndarray = read_columns(data, len(self.columns), str)
+        self.df = pd.DataFrame(values, columns=self.columns)
 
 
 class AtomsInfo:
     """get atoms wild information and retrun a DataFrame"""
+
+    columns: list[str] = ['atomnr', 'atomtype', 'resnr', 'resname',
+                          'atomname', 'chargegrp', 'charge', 'mass',
+                          'element']
+    # Columns which must be in each line, mass may be left to [ atomtypes ]
+    n_required: int = 7
+    # Types of the numeric columns, others are strings
+    dtypes: dict[str, type] = {'atomnr': np.int32,
+                               'resnr': np.int32,
+                               'chargegrp': np.int32,
+                               'charge': np.float64,
+                               'mass': np.float64}
+
     def __init__(self,
-                 atoms: list[str]  # lines read by Itp class
+                 atoms: str,  # Text of the section read by Itp class
+                 workers: int = 1  # Processes to parse a large section
                  ) -> None:
-        self.df = self.get_atoms_info(atoms)
+        self.df = self.get_atoms_info(atoms, workers)
 
     def get_atoms_info(self,
-                       atoms: list[str]  # Lines of the atoms' section
+                       atoms: str,  # Text of the atoms' section
+                       workers: int = 1  # Processes to parse the section
                        ) -> pd.DataFrame:
-        """get atoms info from the file"""
-        l_line: list[str]  # Breaking the line chars
-        # Check if header of the atoms section is same as the defeined one
-        columns: list[str]   # columns for the atoms dict, name of each column
-        columns = ['atomnr', 'atomtype', 'resnr', 'resname', 'atomname',
-                   'chargegrp', 'charge', 'mass', 'element']
-        atomnr: list[typing.Any] = []  # list to append info: atoms id
-        atomtype: list[typing.Any] = []  # list to append info: forcefield type
-        resnr: list[typing.Any] = []  # list to append info: res infos
-        resname: list[typing.Any] = []  # list to append info: res number
-        atomname: list[typing.Any] = []  # list to append info: atom name
-        chargegrp: list[typing.Any] = []  # list to append info: charge group
-        charge: list[typing.Any] = []  # list to append info: charge value
-        mass: list[typing.Any] = []  # list to append info: mass value
-        element: list[typing.Any] = []  # list to append info: real name
-        for line in atoms:
-            if line.startswith(';'):  # line start with ';' are commets&header
-                l_line = free_char_line(line)
-                if 'Total' not in l_line:  # Not header!
-                    if l_line != columns:
-                        sys.exit(f'{bcolors.FAIL}{self.__class__.__name__}:\n'
-                                 f'\tError in the [ atoms ] header of the '
-                                 f'itp file\n{bcolors.ENDC}')
-            else:
-                l_line = free_char_line(line)
-                atomnr.append(l_line[0])
-                atomtype.append(l_line[1])
-                resnr.append(l_line[2])
-                resname.append(l_line[3])
-                atomname.append(l_line[4])
-                chargegrp.append(l_line[5])
-                charge.append(l_line[6])
-                mass.append(l_line[7])
-                element.append(l_line[8])
-        df_atoms: pd.DataFrame  # DataFrame from the infos
-        df_atoms = pd.DataFrame(columns=columns)
-        df_atoms['atomnr'] = atomnr
-        df_atoms['atomtype'] = atomtype
-        df_atoms['resnr'] = resnr
-        df_atoms['resname'] = resname
-        df_atoms['atomname'] = atomname
-        df_atoms['chargegrp'] = chargegrp
-        df_atoms['charge'] = charge
-        df_atoms['mass'] = mass
-        df_atoms['element'] = self.drop_dot(element)
-        return df_atoms
+        """get atoms info from the file by the positions of the columns;
+        the mass is read in each line, NaN in the lines without it (e.g.
+        ions.itp), the element is the first word after the ';' of each
+        line, or found by the mass"""
+        values: np.ndarray  # The required columns as strings
+        names: list[str]  # Words after the ';'
+        try:
+            _, values, names = parse_section(
+                atoms, self.n_required, str, workers=workers)
+            masses: np.ndarray = np.asarray(
+                EIGHTH_COLUMN.findall(split_section(atoms)[1]), dtype=str)
+            columns: dict[str, np.ndarray] = {
+                column: values[:, i].astype(self.dtypes.get(column, str))
+                for i, column in enumerate(self.columns[:self.n_required])}
+            columns['mass'] = \
+                np.where(masses == '', 'nan', masses).astype(np.float64)
+        except ValueError as err:
+            sys.exit(f'{bcolors.FAIL}{self.__class__.__name__}:\n'
+                     f'\tError in the [ atoms ] of the itp file, at least '
+                     f'{self.n_required} columns are needed: {err}\n'
+                     f'{bcolors.ENDC}')
+        columns['element'] = self.get_elements(names, columns['mass'])
+        return pd.DataFrame(columns, columns=self.columns)
 
     @staticmethod
-    def drop_dot(chars: list[str]  # to drop . from its items
-                 ) -> list[str]:
-        """drop dot (.) from the string"""
-        return [item.replace('.', '') for item in chars]
+    def get_elements(names: list[str],  # Words after the ';' of lines
+                     masses: np.ndarray  # Masses of the atoms
+                     ) -> np.ndarray:
+        """return the element of each atom: the word after the ';'
+        without dots, if it is of one or two letters (e.g. "O."), else
+        the element of the nearest mass, else empty"""
+        elements: np.ndarray = np.char.replace(
+            np.asarray(names, dtype=str).reshape(-1), '.', '')
+        written: np.ndarray = \
+            np.char.isalpha(elements) & (np.char.str_len(elements) <= 2)
+        symbols: np.ndarray = np.array(list(ELEMENT_MASSES), dtype=str)
+        references: np.ndarray = np.fromiter(ELEMENT_MASSES.values(),
+                                             dtype=np.float64)
+        distances: np.ndarray = \
+            np.abs(masses[:, np.newaxis] - references[np.newaxis, :])
+        nearest: np.ndarray = distances.argmin(axis=1)
+        found: np.ndarray = distances.min(axis=1) <= ELEMENT_TOLERANCE
+        inferred: np.ndarray = np.where(found, symbols[nearest], '')
+        return np.where(written, elements, inferred).astype(str)
+
+
+class AtomsIndex:
+    """Index of the atoms table by the atoms ids: an array from the id
+    to the row of the atom, -1 for the ids not in the table, to get the
+    names of many atoms with one gather"""
 
+    def __init__(self,
+                 atoms: pd.DataFrame  # atoms df from AtomsInfo
+                 ) -> None:
+        atom_ids: np.ndarray = atoms['atomnr'].to_numpy()
+        self.rows: np.ndarray = np.full(
+            atom_ids.max(initial=0) + 1, -1, dtype=np.int64)
+        self.rows[atom_ids] = np.arange(len(atom_ids))
+        self.names: np.ndarray = atoms['atomname'].to_numpy(dtype=str)
+
+    def lookup(self,
+               atom_ids: np.ndarray  # Ids of the atoms to find
+               ) -> np.ndarray:
+        """return the rows of the atoms, -1 for the unknown ids"""
+        rows: np.ndarray = np.full(len(atom_ids), -1, dtype=np.int64)
+        known: np.ndarray = (atom_ids >= 0) & (atom_ids < len(self.rows))
+        rows[known] = self.rows[atom_ids[known]]
+        return rows
+
+
+class BondedInfo:
+    """Common part of the bonds, angles and dihedrals: the atoms ids of
+    each interaction are read at once and the names are made from the
+    atoms names"""
+
+    section: str  # Name of the section in the itp file
+    atoms_columns: list[str]  # Columns of the atoms ids
+    header_columns: list[list[str]]  # Accepted headers of the section
+    max_report: int = 10  # Number of the mismatched names to print
 
-class BondsInfo:
-    """get the bonds list from Itp class and return a dataframe"""
     def __init__(self,
-                 bonds: list[str],  # lines of bonds section read by Itp class
-                 atoms: pd.DataFrame  # atoms df from AtomsInfo to get names
+                 lines: str,  # Text of the section read by Itp class
+                 atoms: pd.DataFrame,  # atoms df from AtomsInfo to get names
+                 index: typing.Optional[AtomsIndex] = None,  # Of atoms df
+                 workers: int = 1  # Processes to parse a large section
                  ) -> None:
-        """get the bonds infos"""
-        self.mk_bonds_df(bonds, atoms)
-
-    def mk_bonds_df(self,
-                    bonds: list[str],  # lines of bonds section
-                    atoms: pd.DataFrame  # atoms df from AtomInfo
-                    ) -> None:
-        """call all the methods to make the bonds DataFrame"""
-        a_i: list[int]  # index of the 1st atoms in the bonds
-        a_j: list[int]  # index of the 2nd atoms in the bonds
-        funct: list[int]  # index of the type of the bonds
-        names: list[str]  # name of the bonds
-        a_i, a_j, funct, names = self.get_bonds(bonds)
-        self.df = self.mk_df(a_i, a_j, funct, names, atoms)
-
-    def get_bonds(self,
-                  bonds: list[str]  # lines of bonds section read by Itp class
-                  ) -> tuple[list[int], list[int], list[int], list[str]]:
-        """return bonds dataframe to make bonds dataframe"""
-        header_columns: list[str]  # Columns of the bonds wild
-        alter_header_columns: list[str]  # Columns of the bonds wild, 2nd
-        header_columns = ['ai', 'aj', 'typ', 'cmt', 'name']
-        alter_header_columns = ['ai', 'aj', 'funct', 'r', 'k', 'name']
-        a_i: list[int] = []  # index of the 1st atoms in the bonds
-        a_j: list[int] = []  # index of the 2nd atoms in the bonds
-        funct: list[int] = []  # Type of the function of the bond
-        names: list[str] = []  # name of the bonds
-        for line in bonds:
-            if line.startswith(';'):  # line start with ';' are commets&header
-                l_line = free_char_line(line)
-                if ('Total' not in l_line and
-                   l_line != header_columns):
-                    header_columns = alter_header_columns.copy()
-                    if l_line != header_columns:
-                        sys.exit(f'{bcolors.FAIL}{self.__class__.__name__}:\n'
-                                 f'\tError in the [ bonds ] header of the '
-                                 f'itp file\n{bcolors.ENDC}')
-            else:
-                tmp = line.split()
-                tmp = [item for item in tmp if item]
-                line = ' '.join(tmp)
-                l_line = free_char_line(line)
-                a_i.append(int(l_line[0]))
-                a_j.append(int(l_line[1]))
-                funct.append(int(l_line[2]))
-                names.append(l_line[3])
-        return a_i, a_j, funct, names
+        self.mismatches: pd.DataFrame  # Names in the file not as atoms
+        self.df: pd.DataFrame = \
+            self.mk_df(lines,
+                       index if index is not None else AtomsIndex(atoms),
+                       workers)
 
     def mk_df(self,
-              a_i: list[int],  # index of the 1st atom in the bonds
-              a_j: list[int],  # index of the 2nd atom in the bonds
-              funct: list[int],  # Index of the type of the bond
-              names: list[str],  # names of the bonds form bonds section
-              atoms: pd.DataFrame  # atoms df from AtomsInfo to cehck the name
-              ) -> pd.DataFrame:  # bonds DataFrame
+              lines: str,  # Text of the section
+              index: AtomsIndex,  # Index of the atoms to get names
+              workers: int = 1  # Processes to parse a large section
+              ) -> pd.DataFrame:
         """make DataFrame and check if they are same as atoms name"""
-        df_bonds: pd.DataFrame  # to save the bonds_df
-        df_bonds = pd.DataFrame(columns=['ai', 'aj', 'typ', 'cmt', 'name'])
-        df_bonds['ai'] = a_i
-        df_bonds['aj'] = a_j
-        df_bonds['name'] = names
-        df_bonds['cmt'] = [';' for _ in a_i]
-        df_bonds['typ'] = funct
-        df_bonds = self.check_names(df_bonds, atoms)
-        df_bonds.index += 1
-        return df_bonds
+        comments: list[list[str]]  # Tokens of the comment lines
+        values: np.ndarray  # Atoms ids and the type of the interactions
+        names: list[str]  # Names in the file
+        comments, values, names = parse_section(
+            lines, len(self.atoms_columns) + 1, np.int64, workers=workers)
+        self.check_header(comments)
+        df_c: pd.DataFrame = pd.DataFrame(
+            values, columns=self.atoms_columns + ['typ'])
+        df_c['cmt'] = ';'
+        df_c['name'] = names
+        df_c = self.check_names(df_c, index)
+        df_c.index += 1
+        return df_c
 
-    @staticmethod
-    def check_names(df_bonds: pd.DataFrame,  # Df to check its names column
-                    atoms: pd.DataFrame  # Df source (mostly atoms df)
-                    ) -> None:
+    def check_header(self,
+                     comments: list[list[str]]  # Tokens of comment lines
+                     ) -> None:
+        """the header of the section must be one of the accepted ones"""
+        for l_line in comments:
+            if 'Total' not in l_line and l_line not in self.header_columns:
+                sys.exit(f'{bcolors.FAIL}{self.__class__.__name__}:\n'
+                         f'\tError in the [ {self.section} ] header of the '
+                         f'itp file\n{bcolors.ENDC}')
+
+    def check_names(self,
+                    df_c: pd.DataFrame,  # Df to check its names column
+                    index: AtomsIndex  # Index of the atoms df
+                    ) -> pd.DataFrame:
         """checks the names column in the source file with comparing it
-        with names from the atoms dataframe name column for each atom"""
-        df_c: pd.DataFrame = df_bonds.copy()
-        ai_name: list[str]  # name of the 1st atom from the list
-        aj_name: list[str]  # name of the 2nd atom from the list
-        ai_name = [atoms.loc[atoms['atomnr'] == str(item)]['atomname'][item-1]
-                   for item in df_bonds['ai']]
-        aj_name = [atoms.loc[atoms['atomnr'] == str(item)]['atomname'][item-1]
-                   for item in df_bonds['aj']]
-        names: list[str] = [f'{i}-{j}' for i, j in zip(ai_name, aj_name)]
-        df_c['name'] = names
+        with names from the atoms dataframe name column for each atom,
+        the names from the atoms are kept"""
+        df_c = df_c.copy()
+        rows: list[np.ndarray] = \
+            [index.lookup(df_c[column].to_numpy())
+             for column in self.atoms_columns]
+        unknown: np.ndarray = np.logical_or.reduce([row < 0 for row in rows])
+        if unknown.any():
+            ids: np.ndarray = np.unique(
+                df_c.loc[unknown, self.atoms_columns].to_numpy())
+            ids = ids[index.lookup(ids) < 0]
+            sys.exit(f'{bcolors.FAIL}{self.__class__.__name__}:\n'
+                     f'\t{unknown.sum()} lines in [ {self.section} ] have '
+                     f'atoms not in [ atoms ], ids: '
+                     f'{ids[:self.max_report].tolist()}\n{bcolors.ENDC}')
+        atoms_names: np.ndarray = index.names[rows[0]]
+        for row in rows[1:]:  # Joined column by column, e.g. SI-OM
+            atoms_names = np.char.add(np.char.add(atoms_names, '-'),
+                                      index.names[row])
+        self.report_mismatches(df_c, atoms_names)
+        df_c['name'] = atoms_names
         return df_c
 
+    def report_mismatches(self,
+                          df_c: pd.DataFrame,  # Names from the file
+                          atoms_names: np.ndarray  # Names from the atoms
+                          ) -> None:
+        """keep and print the lines which their names are not same as
+        the atoms names; only the names with a part for each atom (e.g.,
+        SI-OM) are checked, others are comments"""
+        in_file: np.ndarray = df_c['name'].to_numpy(dtype=object)
+        is_name: np.ndarray = np.char.count(in_file.astype(str), '-') == \
+            len(self.atoms_columns) - 1
+        wrong: np.ndarray = is_name & (in_file != atoms_names)
+        self.mismatches = pd.DataFrame({'in_file': in_file[wrong],
+                                        'atoms': atoms_names[wrong]},
+                                       index=df_c.index[wrong] + 1)
+        if not self.mismatches.empty:
+            print(f'{bcolors.WARNING}{self.__class__.__name__}:\n'
+                  f'\t{len(self.mismatches)} names in [ {self.section} ] '
+                  f'are not same as the atoms names, they are replaced:\n'
+                  f'{self.mismatches.head(self.max_report).to_string()}'
+                  f'{bcolors.ENDC}')
+
+
+class BondsInfo(BondedInfo):
+    """get the bonds list from Itp class and return a dataframe"""
+
+    section: str = 'bonds'
+    atoms_columns: list[str] = ['ai', 'aj']
+    header_columns: list[list[str]] = [
+        ['ai', 'aj', 'typ', 'cmt', 'name'],
+        ['ai', 'aj', 'funct', 'r', 'k', 'name']]
+
+    def __init__(self,
+                 bonds: str,  # Text of bonds section read by Itp class
+                 atoms: pd.DataFrame,  # atoms df from AtomsInfo to get names
+                 index: typing.Optional[AtomsIndex] = None,  # Of atoms df
+                 workers: int = 1  # Processes to parse a large section
+                 ) -> None:
+        """get the bonds infos"""
+        super().__init__(bonds, atoms, index, workers)
+
 
-class AnglesInfo:
+class AnglesInfo(BondedInfo):
     """get the angles list from Itp class and return a dataframe"""
+
+    section: str = 'angles'
+    atoms_columns: list[str] = ['ai', 'aj', 'ak']
+    header_columns: list[list[str]] = [
+        ['ai', 'aj', 'ak', 'typ', 'cmt', 'name'],
+        ['ai', 'aj', 'ak', 'funct', 'theta', 'cth', 'name']]
+
     def __init__(self,
-                 angles: list[str],  # lines of angles section by Itp class
-                 atoms: pd.DataFrame  # atoms df from AtomsInfo to get names
+                 angles: str,  # Text of angles section by Itp class
+                 atoms: pd.DataFrame,  # atoms df from AtomsInfo to get names
+                 index: typing.Optional[AtomsIndex] = None,  # Of atoms df
+                 workers: int = 1  # Processes to parse a large section
                  ) -> None:
         """get the angles infos"""
-        self.mk_angles_df(angles, atoms)
+        super().__init__(angles, atoms, index, workers)
 
-    def mk_angles_df(self,
-                     angles: list[str],  # lines of angles section
-                     atoms: pd.DataFrame  # atoms df from AtomInfo
-                     ) -> None:
-        """call all the methods to make the bonds DataFrame"""
-        a_i: list[int]  # index of the 1st atoms in the angles
-        a_j: list[int]  # index of the 2nd atoms in the angles
-        a_k: list[int]  # index of the 3rd atoms in the angles
-        names: list[str]  # name of the angles
-        a_i, a_j, a_k, funct, names = self.get_angles(angles)
-        self.df = self.mk_df(a_i, a_j, a_k, funct, names, atoms)
-
-    def get_angles(self,
-                   angles: list[str],  # lines of angles section by Itp class
-                   ) -> tuple[list[int], list[int], list[int],
-                              list[int], list[str]]:
-        """return bonds dataframe to make angles dataframe"""
-        columns: list[str]  # Columns of the angles wild
-        columns = ['ai', 'aj', 'ak', 'typ', 'cmt', 'name']
-        alter_columns = ['ai', 'aj', 'ak', 'funct', 'theta', 'cth', 'name']
-        a_i: list[int] = []  # index of the 1st atoms in the angles
-        a_j: list[int] = []  # index of the 2nd atoms in the angles
-        a_k: list[int] = []  # index of the 3rd atoms in the angles
-        funct: list[int] = []  # index of the type (function) the angles
-        names: list[str] = []  # name of the angles
-
-        for line in angles:
-            if line.startswith(';'):  # line start with ';' are commets&header
-                l_line = free_char_line(line)
-                if 'Total' not in l_line and l_line != columns:
-                    if l_line != alter_columns:
-                        sys.exit(f'{bcolors.FAIL}{self.__class__.__name__}:\n'
-                                 f'\tError in the [ angles ] header of the '
-                                 f'itp file\n{bcolors.ENDC}')
-            else:
-                tmp = line.strip().split('\t')
-                tmp = [item for item in tmp if item]
-                line = ' '.join(tmp)
-                l_line = free_char_line(line)
-                a_i.append(int(l_line[0]))
-                a_j.append(int(l_line[1]))
-                a_k.append(int(l_line[2]))
-                funct.append(int(l_line[3]))
-                names.append(l_line[4])
-        return a_i, a_j, a_k, funct, names
 
-    def mk_df(self,
-              a_i: list[int],  # index of the 1st atom in the angles
-              a_j: list[int],  # index of the 2nd atom in the angles
-              a_k: list[int],  # index of the 3rd atom in the angles
-              funct: list[int],  # Type (function) of the angles
-              names: list[str],  # names of the bonds form angles section
-              atoms: pd.DataFrame  # atoms df from AtomsInfo to cehck the name
-              ) -> pd.DataFrame:  # angles DataFrame
-        """make DataFrame and check if they are same as atoms name"""
-        df_angles: pd.DataFrame  # to save the angles_df
-        df_angles = \
-            pd.DataFrame(columns=['ai', 'aj', 'ak', 'typ', 'cmt', 'name'])
-        df_angles['ai'] = a_i
-        df_angles['aj'] = a_j
-        df_angles['ak'] = a_k
-        df_angles['name'] = names
-        df_angles['cmt'] = [';' for _ in a_i]
-        df_angles['typ'] = funct
-        df_angles = self.check_names(df_angles, atoms)
-        df_angles.index += 1
-        return df_angles
-
-    @staticmethod
-    def check_names(df_angles: pd.DataFrame,  # Df to check its names column
-                    atoms: pd.DataFrame  # Df source (mostly atoms df)
-                    ) -> None:
-        """ checks the names column in the source file with comparing it
-        with names from the atoms dataframe name column for each atom"""
-        df_c: pd.DataFrame = df_angles.copy()
-        ai_name: list[str]  # name of the 1st atom from the list
-        aj_name: list[str]  # name of the 2nd atom from the list
-        ak_name: list[str]  # name of the 3rd atom from the list
-        ai_name = [atoms.loc[atoms['atomnr'] == str(item)]['atomname'][item-1]
-                   for item in df_angles['ai']]
-        aj_name = [atoms.loc[atoms['atomnr'] == str(item)]['atomname'][item-1]
-                   for item in df_angles['aj']]
-        ak_name = [atoms.loc[atoms['atomnr'] == str(item)]['atomname'][item-1]
-                   for item in df_angles['ak']]
-        names: list[str] = [f'{i}-{j}-{k}' for i, j, k
-                            in zip(ai_name, aj_name, ak_name)]
-        df_c['name'] = names
-        return df_c
+class DihedralsInfo(BondedInfo):
+    """get the dihdrals list from Itp class and return a dataframe, the
+    lines after an 'impropers' comment are not dihedrals"""
 
+    section: str = 'dihedrals'
+    atoms_columns: list[str] = ['ai', 'aj', 'ak', 'ah']
+    header_columns: list[list[str]] = [
+        ['ai', 'aj', 'ak', 'ah', 'typ', 'cmt', 'name'],
+        ['ai', 'aj', 'ak', 'ah', 'funct',
+         'C0', 'C1', 'C2', 'C3', 'C4', 'C5', 'name']]
 
-class DihedralsInfo:
-    """get the dihdrals list from Itp class and return a dataframe"""
     def __init__(self,
-                 dihedrals: list[str],  # lines of dihedrals section by Itp
-                 atoms: pd.DataFrame  # atoms df from AtomsInfo to get names
+                 dihedrals: str,  # Text of dihedrals section by Itp
+                 atoms: pd.DataFrame,  # atoms df from AtomsInfo to get names
+                 index: typing.Optional[AtomsIndex] = None,  # Of atoms df
+                 workers: int = 1  # Processes to parse a large section
                  ) -> None:
         """get the dihedrals infos"""
-        self.mk_dihedrals_df(dihedrals, atoms)
-
-    def mk_dihedrals_df(self,
-                        dihedrals: list[str],  # lines of dihedrals section
-                        atoms: pd.DataFrame  # atoms df from AtomInfo
-                        ) -> None:
-        """call all the methods to make the bonds DataFrame"""
-        a_i: list[int]  # index of the 1st atoms in the dihedrals
-        a_j: list[int]  # index of the 2nd atoms in the dihedrals
-        a_k: list[int]  # index of the 3rd atoms in the dihedrals
-        a_h: list[int]  # index of the 4th atoms in the dihedrals
-        funct: list[int]  # index of the type of the dihedrals
-        names: list[str]  # name of the dihedrals
-        a_i, a_j, a_k, a_h, funct, names = self.get_dihedrals(dihedrals)
-        self.df = self.mk_df(a_i, a_j, a_k, a_h, funct, names, atoms)
-
-    def get_dihedrals(self,
-                      dihedrals: list[str],  # lines of dihedrals section
-                      ) -> pd.DataFrame:  # DataFrame of the dihedrals
-        """return bonds dataframe to make dihedrals dataframe"""
-        columns: list[str]  # Columns of the dihedrals wild
-        columns = ['ai', 'aj', 'ak', 'ah', 'typ', 'cmt', 'name']
-        alter_columns: list[str] = ['ai', 'aj', 'ak', 'ah', 'funct',
-                                    'C0', 'C1', 'C2', 'C3', 'C4', 'C5', 'name']
-        a_i: list[int] = []  # index of the 1st atoms in the dihedrals
-        a_j: list[int] = []  # index of the 2nd atoms in the dihedrals
-        a_k: list[int] = []  # index of the 3rd atoms in the dihedrals
-        a_h: list[int] = []  # index of the 4th atoms in the dihedrals
-        funct: list[int] = []  # index of the type of the dihedrals
-        names: list[str] = []  # name of the dihedrals
-        for line in dihedrals:
-            if line.startswith(';'):  # line start with ';' are commets&header
-                l_line = free_char_line(line)
-                if 'Total' not in l_line and l_line != columns:
-                    if l_line != alter_columns:
-                        sys.exit(f'{bcolors.FAIL}{self.__class__.__name__}:\n'
-                                 f'\tError in the [ dihedrals ] header of the'
-                                 f' itp file\n{bcolors.ENDC}')
-            else:
-                tmp = line.strip().split('\t')
-                tmp = [item for item in tmp if item]
-                line = ' '.join(tmp)
-                l_line = free_char_line(line)
-                a_i.append(int(l_line[0]))
-                a_j.append(int(l_line[1]))
-                a_k.append(int(l_line[2]))
-                a_h.append(int(l_line[3]))
-                funct.append(int(l_line[4]))
-                names.append(l_line[5])
-        return a_i, a_j, a_k, a_h, funct, names
-
-    def mk_df(self,
-              a_i: list[int],  # index of the 1st atom in the dihedrals
-              a_j: list[int],  # index of the 2nd atom in the dihedrals
-              a_k: list[int],  # index of the 3rd atom in the dihedrals
-              a_h: list[int],  # index of the 4th atom in the dihedrals
-              funct: list[int],  # types of the function
-              names: list[str],  # names form dihedrals section
-              atoms: pd.DataFrame  # atoms df from AtomsInfo to cehck the name
-              ) -> pd.DataFrame:  # dihedrals DataFrame
-        """make DataFrame and check if they are same as atoms name"""
-        df_dihedrals: pd.DataFrame  # to save the dihedrals_df
-        df_dihedrals = pd.DataFrame(
-            columns=['ai', 'aj', 'ak', 'ah', 'typ', 'cmt', 'name'])
-        df_dihedrals['ai'] = a_i
-        df_dihedrals['aj'] = a_j
-        df_dihedrals['ak'] = a_k
-        df_dihedrals['ah'] = a_h
-        df_dihedrals['name'] = names
-        df_dihedrals['cmt'] = [';' for _ in a_i]
-        df_dihedrals['typ'] = funct
-        df_dihedrals = self.check_names(df_dihedrals, atoms)
-        df_dihedrals.index += 1
-        return df_dihedrals
+        super().__init__(dihedrals, atoms, index, workers)
 
     @staticmethod
-    def check_names(df_dihedrals: pd.DataFrame,  # Df to check its names column
-                    atoms: pd.DataFrame  # Df source (mostly atoms df)
-                    ) -> None:
-        """ checks the names column in the source file with comparing it
-        with names from the atoms dataframe name column for each atom"""
-        df_c: pd.DataFrame = df_dihedrals.copy()
-        ai_name: list[str]  # name of the 1st atom from the list
-        aj_name: list[str]  # name of the 2nd atom from the list
-        ak_name: list[str]  # name of the 3rd atom from the list
-        ah_name: list[str]  # name of the 4th atom from the list
-        ai_name = [atoms.loc[atoms['atomnr'] == str(item)]['atomname'][item-1]
-                   for item in df_dihedrals['ai']]
-        aj_name = [atoms.loc[atoms['atomnr'] == str(item)]['atomname'][item-1]
-                   for item in df_dihedrals['aj']]
-        ak_name = [atoms.loc[atoms['atomnr'] == str(item)]['atomname'][item-1]
-                   for item in df_dihedrals['ak']]
-        ah_name = [atoms.loc[atoms['atomnr'] == str(item)]['atomname'][item-1]
-                   for item in df_dihedrals['ah']]
-        names: list[str] = [f'{i}-{j}-{k}-{h}' for i, j, k, h
-                            in zip(ai_name, aj_name, ak_name, ah_name)]
-        df_c['name'] = names
-        return df_c
+    def drop_impropers(dihedrals: str  # Text of the section
+                       ) -> str:
+        """return the lines of a part of the section before its first
+        'impropers' line"""
+        for match in re.finditer('impropers', dihedrals):
+            start: int = line_start(dihedrals, match.start())
+            end: int = dihedrals.find('\n', match.end())
+            if 'impropers' in free_char_line(
+               dihedrals[start:end if end >= 0 else len(dihedrals)]):
+                return dihedrals[:start]
+        return dihedrals
 
 
 if __name__ == '__main__':
-    itp = Itp(sys.argv[1])
+    itp = Itp(sys.argv[1], sections=Itp.attributes)
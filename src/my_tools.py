@@ -2,33 +2,113 @@
 import os
 import re
 import sys
+import bz2
+import gzip
+import lzma
 import typing
-from common import logger
-from common.colors_text import TextColor as bcolors
+import logger
+from colors_text import TextColor as bcolors
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Compressed files are (de)compressed on the fly, chosen by the extension
+COMPRESSIONS: dict[str, str] = {
+    '.gz': 'gzip',
+    '.bz2': 'bz2',
+    '.xz': 'lzma',
+    '.zst': 'zstandard'  # Only if the zstandard package is installed
+}
 
 
 class InvalidFileExtensionError(Exception):
     """file extension error"""
 
 
+def open_file(fname: str,  # Name of the file, maybe compressed
+              mode: str = 'r'  # 'r', 'w', 'rb', 'wb', ...
+              ) -> typing.IO[typing.Any]:
+    """open a plain or compressed file, text modes are utf8"""
+    compression: typing.Optional[str] = \
+        COMPRESSIONS.get(os.path.splitext(fname)[1])
+    opener: typing.Callable[..., typing.IO[typing.Any]]
+    if compression is None:
+        opener = open
+    elif compression == 'gzip':
+        opener = gzip.open
+    elif compression == 'bz2':
+        opener = bz2.open
+    elif compression == 'lzma':
+        opener = lzma.open
+    elif zstandard is not None:
+        opener = zstandard.open
+    else:
+        raise ModuleNotFoundError(
+            f'{bcolors.FAIL}{__name__}: reading or writing `{fname}` '
+            f'needs the `zstandard` package{bcolors.ENDC}')
+    if 'b' in mode:
+        return opener(fname, mode)
+    return opener(fname, f'{mode.replace("t", "")}t', encoding='utf8')
+
+
+def cache_dir(name: str  # Name of the cache, e.g. 'itp'
+              ) -> str:
+    """return the directory of a cache of struct2apbs, in the user cache
+    directory of the XDG base directory specification: XDG_CACHE_HOME
+    if it is set, otherwise ~/.cache"""
+    cache_home: str = os.environ.get('XDG_CACHE_HOME', '') or \
+        os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'struct2apbs', name)
+
+
+def is_compressed(fname: str  # Name of the file
+                  ) -> bool:
+    """True if the file is (de)compressed by its extension"""
+    return os.path.splitext(fname)[1] in COMPRESSIONS
+
+
+def split_extension(fname: str  # Name of the file to split
+                    ) -> tuple[str, str]:
+    """return the name and the extension of the file, a compression
+    extension is part of it: `a/x.pdb.gz` -> (`a/x`, `pdb.gz`)"""
+    root: str
+    extension: str
+    root, extension = os.path.splitext(fname)
+    if extension in COMPRESSIONS:
+        root, inner = os.path.splitext(root)
+        extension = f'{inner}{extension}'
+    return root, extension.lstrip('.')
+
+
 def check_file_exist(fname: str,  # Name of the file to check
                      log: logger.logging.Logger  # log the error
-                     ) -> None:
-    """check if the file exist, other wise exit"""
+                     ) -> str:
+    """check if the file exist, other wise exit. If only a compressed
+    version of it exists (e.g. `fname.gz`), that name is returned"""
     if not os.path.exists(fname):
+        for compression in COMPRESSIONS:
+            if os.path.exists(compressed := f'{fname}{compression}'):
+                log.info(f'Using the compressed `{compressed}`')
+                return check_file_exist(compressed, log)
         log.error(f'Error! `{fname}` dose not exist.')
         sys.exit(f'{bcolors.FAIL}{__name__}: '
                  f'(Error! `{fname}` dose not '
                  f'exist \n{bcolors.ENDC}')
     log.info(msg := f'Checking: `{fname}`')
     print(f'{bcolors.OKBLUE}my_tools:\n\t{msg}{bcolors.ENDC}\n')
+    return fname
 
 def check_file_extension(fname: str,  # Name of the file to check
                          extension: str,  # Extension of expected file
                          log: logger.logging.Logger
                          ) -> None:
-    """check if the file name is a correct one"""
-    if (fname_exten := fname.split('.')[1]) == extension:
+    """check if the file name is a correct one, compressed files are
+    checked by their inner extension: `x.pdb.gz` is a `pdb` file"""
+    fname_exten: str = split_extension(fname)[1]
+    if fname_exten.split('.')[0] == extension:
         pass
     else:
         msg = (f'\tThe provided file has the extension: `{fname_exten}` '
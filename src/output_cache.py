@@ -0,0 +1,315 @@
+"""Manifest of the pqr files and a content-addressed store of them, to
+convert again only the structures whose inputs changed.
+The manifest (a json file) keeps for each structure the key of its
+inputs and its outputs, and for each output the hashes of its inputs
+(structure, topology, force fields, options and tool version), the
+hash of its contents, and its size and time. The hash of an input
+file is kept with its size and time and computed again only if they
+changed, so a rerun reads only the changed files.
+A structure with the same key is not converted: its outputs which are
+as they were written are kept, the others (removed or changed) are
+copied from the store, where a copy of each output is kept by the hash
+of its contents; the hash of the stored file is checked before it is
+copied, a changed one is removed and the structure is converted. The
+least recently used files of the store are removed when it is larger
+than its size.
+
+    usage:
+        python output_cache.py <manifest> [clear]
+    the outputs in the manifest and the size of the store are printed,
+    or all the files of the store are removed.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import typing
+import hashlib
+import tempfile
+
+import pandas as pd
+
+import my_tools
+import itp_to_df
+import assignment_plan
+import parse_charmm_data
+from colors_text import TextColor as bcolors
+
+
+# Version of the pqr files, with the versions of the parsers; a part of
+# the key of the inputs, a new one converts all the structures again
+TOOL_VERSION: str = (f'pqr-1/itp-{itp_to_df.PARSER_VERSION}/'
+                     f'{parse_charmm_data.FF_VERSION}')
+MANIFEST_VERSION: int = 1
+# The store directory can be moved with the STRUCT2APBS_STORE variable,
+# otherwise it is in XDG_CACHE_HOME (~/.cache if not set)
+STORE_DIR: str = \
+    os.environ.get('STRUCT2APBS_STORE') or my_tools.cache_dir('pqr')
+STORE_SIZE: int = 1 << 32  # Largest size of the store in bytes (4 GiB)
+HASH_CHUNK: int = 1 << 20  # Bytes read at once to hash a file
+
+
+def file_digest(fname: str  # Name of the file
+                ) -> str:
+    """return the sha256 of the contents of the file"""
+    digest = hashlib.sha256()
+    with open(fname, 'rb') as f_r:
+        while chunk := f_r.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def shared_digests(itp: pd.DataFrame,  # Atoms of the topology
+                   files: list[str],  # Force fields and their aliases
+                   options: dict[str, str]  # Options which set the pqr
+                   ) -> dict[str, str]:
+    """return the hashes of the inputs of all the structures: the atoms
+    of the topology (with its included files), the contents of the
+    force field files and the options"""
+    topology = hashlib.sha256()
+    assignment_plan.update_digest(
+        topology, itp, assignment_plan.TOPOLOGY_COLUMNS)
+    return {'topology': topology.hexdigest(),
+            'force_fields': '/'.join(map(file_digest, files)),
+            'options': hashlib.sha256(json.dumps(
+                options, sort_keys=True).encode()).hexdigest()}
+
+
+class OutputCache:
+    """Skip the structures whose outputs are up to date"""
+
+    def __init__(self,
+                 manifest_file: str,  # The manifest, .json
+                 store_dir: str = STORE_DIR,  # Directory of the store
+                 max_size: int = STORE_SIZE  # Bytes kept in the store
+                 ) -> None:
+        self.manifest_file: str = manifest_file
+        self.store_dir: str = store_dir
+        self.max_size: int = max_size
+        self.manifest: dict[str, typing.Any] = self.read_manifest()
+        self.stored: int = 0  # Files added to the store in this run
+        self.changed: bool = False  # If the manifest is to be written
+
+    def read_manifest(self) -> dict[str, typing.Any]:
+        """return the manifest, an empty one if there is none or it is
+        of an other version"""
+        manifest: dict[str, typing.Any] = {}
+        try:
+            with open(self.manifest_file, 'r', encoding='utf8') as f_r:
+                manifest = json.load(f_r)
+        except (OSError, ValueError):
+            pass
+        if manifest.get('version') != MANIFEST_VERSION:
+            manifest = {'version': MANIFEST_VERSION,
+                        'inputs': {},
+                        'structures': {},
+                        'outputs': {}}
+        return manifest
+
+    def save(self) -> None:
+        """write the manifest if it changed and remove the old files of
+        the store"""
+        if not self.changed:
+            return
+        directory: str = os.path.dirname(os.path.abspath(self.manifest_file))
+        with tempfile.NamedTemporaryFile('w',
+                                         dir=directory,
+                                         suffix='.tmp',
+                                         encoding='utf8',
+                                         delete=False) as f_w:
+            f_w.write(json.dumps(self.manifest))  # One string is faster
+        os.replace(f_w.name, self.manifest_file)
+        self.changed = False
+        if self.stored:
+            self.evict()
+            self.stored = 0
+
+    def input_digest(self,
+                     fname: str  # Name of an input file
+                     ) -> str:
+        """return the hash of the file, from the manifest if its size and
+        time are the same"""
+        path: str = os.path.abspath(fname)
+        stat: os.stat_result = os.stat(path)
+        entry: typing.Optional[dict[str, typing.Any]] = \
+            self.manifest['inputs'].get(path)
+        if entry is None or entry['size'] != stat.st_size or \
+           entry['mtime_ns'] != stat.st_mtime_ns:
+            entry = {'sha256': file_digest(path),
+                     'size': stat.st_size,
+                     'mtime_ns': stat.st_mtime_ns}
+            self.manifest['inputs'][path] = entry
+            self.changed = True
+        return entry['sha256']
+
+    def inputs(self,
+               structure_files: list[str],  # Structure (and trajectory)
+               shared: dict[str, str]  # From shared_digests
+               ) -> dict[str, str]:
+        """return the hashes of the inputs of a structure"""
+        return {'structure': '/'.join(map(self.input_digest,
+                                          structure_files)),
+                **shared,
+                'tool': TOOL_VERSION}
+
+    @staticmethod
+    def key(inputs: dict[str, str]  # From inputs
+            ) -> str:
+        """return the key of the inputs of a structure"""
+        return hashlib.sha256(
+            json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+    def blob(self,
+             digest: str  # Hash of the contents of an output
+             ) -> str:
+        """return the name of the file in the store"""
+        return os.path.join(self.store_dir, digest[:2], digest)
+
+    def restore(self,
+                structure: str,  # Name of the structure file
+                key: str  # From key
+                ) -> bool:
+        """if the outputs of the structure are of the same inputs: the
+        changed or removed ones are taken from the store; False if the
+        structure must be converted"""
+        entry: typing.Optional[dict[str, typing.Any]] = \
+            self.manifest['structures'].get(os.path.abspath(structure))
+        if entry is None or entry['key'] != key:
+            return False
+        for output in entry['outputs']:
+            record: typing.Optional[dict[str, typing.Any]] = \
+                self.manifest['outputs'].get(output)
+            if record is None:
+                return False
+            try:
+                stat: os.stat_result = os.stat(output)
+                if stat.st_size == record['size'] and \
+                   stat.st_mtime_ns == record['mtime_ns']:
+                    continue
+            except FileNotFoundError:
+                pass
+            blob: str = self.blob(record['sha256'])
+            if not self.is_intact(blob, record):
+                return False
+            self.copy(blob, output)
+            self.touch(blob)
+            self.set_record(output, record['inputs'], record['sha256'])
+        return True
+
+    @staticmethod
+    def is_intact(blob: str,  # Name of the file in the store
+                  record: dict[str, typing.Any]  # Of the output
+                  ) -> bool:
+        """if the file in the store has the size and hash of the output;
+        a changed file is removed from the store"""
+        try:
+            if os.path.getsize(blob) == record['size'] and \
+               file_digest(blob) == record['sha256']:
+                return True
+            os.remove(blob)
+        except FileNotFoundError:
+            pass
+        return False
+
+    def record(self,
+               structure: str,  # Name of the structure file
+               inputs: dict[str, str],  # From inputs
+               outputs: list[str]  # Files written for the structure
+               ) -> None:
+        """add the outputs to the manifest and to the store"""
+        paths: list[str] = [os.path.abspath(item) for item in outputs]
+        for output in paths:
+            digest: str = file_digest(output)
+            blob: str = self.blob(digest)
+            if not os.path.isfile(blob):  # The same contents are kept once
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                self.copy(output, blob)
+                self.stored += 1
+            self.touch(blob)
+            self.set_record(output, inputs, digest)
+        self.manifest['structures'][os.path.abspath(structure)] = \
+            {'key': self.key(inputs), 'outputs': paths}
+        self.changed = True
+
+    def set_record(self,
+                   output: str,  # Absolute name of the output
+                   inputs: dict[str, str],  # From inputs
+                   digest: str  # Hash of its contents
+                   ) -> None:
+        """keep the hashes, size and time of the output"""
+        stat: os.stat_result = os.stat(output)
+        self.changed = True
+        self.manifest['outputs'][output] = {'inputs': inputs,
+                                            'sha256': digest,
+                                            'size': stat.st_size,
+                                            'mtime_ns': stat.st_mtime_ns}
+
+    @staticmethod
+    def copy(source: str,  # Existing file
+             target: str  # Name of the copy, replaced if it exists
+             ) -> None:
+        """copy the file with its time, through a temporary file; the
+        copy is not a link, so editing one of them keeps the other"""
+        tmp_file: str = f'{target}.tmp{os.getpid()}'
+        shutil.copy2(source, tmp_file)
+        os.replace(tmp_file, target)
+
+    @staticmethod
+    def touch(blob: str  # Name of the file in the store
+              ) -> None:
+        """mark the file of the store as used: its access time is now,
+        its time is kept"""
+        os.utime(blob, ns=(time.time_ns(), os.stat(blob).st_mtime_ns))
+
+    def entries(self) -> list[os.DirEntry]:
+        """return the files of the store, the least recently used first"""
+        files: list[os.DirEntry] = []
+        try:
+            with os.scandir(self.store_dir) as groups:
+                for group in groups:
+                    if group.is_dir():
+                        with os.scandir(group.path) as items:
+                            files.extend(item for item in items
+                                         if item.is_file())
+        except FileNotFoundError:
+            return []
+        return sorted(files, key=lambda item: item.stat().st_atime_ns)
+
+    def size(self) -> int:
+        """return the size of all the files of the store in bytes"""
+        return sum(item.stat().st_size for item in self.entries())
+
+    def evict(self) -> None:
+        """remove the least recently used files until the store is not
+        larger than max_size; the outputs are copies and are kept"""
+        files: list[os.DirEntry] = self.entries()
+        total: int = sum(item.stat().st_size for item in files)
+        for item in files:
+            if total <= self.max_size:
+                break
+            total -= item.stat().st_size
+            try:
+                os.remove(item.path)
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        """remove all the files of the store"""
+        for item in self.entries():
+            try:
+                os.remove(item.path)
+            except FileNotFoundError:
+                pass
+
+
+if __name__ == '__main__':
+    CACHE = OutputCache(sys.argv[1])
+    if 'clear' in sys.argv[2:]:
+        CACHE.clear()
+    print(f'{bcolors.OKCYAN}{CACHE.manifest_file}: '
+          f'{len(CACHE.manifest["structures"])} structures, '
+          f'{len(CACHE.manifest["outputs"])} outputs\n'
+          f'{CACHE.store_dir}: {len(CACHE.entries())} files, '
+          f'{CACHE.size() / 2**20:.1f} MiB{bcolors.ENDC}')
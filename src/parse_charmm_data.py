@@ -1,57 +1,163 @@
 """
 Read the data of the radius and charges from charmm data of the
 APBS server
+
+Other force fields in the same format (e.g. AMBER.DAT or PARSE.DAT of
+the server) can be registered by their names; ForceFieldRegistry reads
+each of them on its first use and keeps it compiled, so one run can
+use all of them.
 """
 
+import io
+import os
 import sys
 import typing
+import warnings
+import numpy as np
 import pandas as pd
 
 import logger
+import my_tools
+import itp_cache
+import charmm_names
 from colors_text import TextColor as bcolors
 
 
+# Version of the table made from the file, a part of its cache key
+FF_VERSION: str = 'ff-1'
+
+# Files of the force fields by their names: (table, aliases of names);
+# only the ones whose files are in data/, others are registered
+FORCE_FIELDS: dict[str, tuple[str, str]] = {
+    'CHARMM': ('CHARMM.DAT', 'CHARMM.names'),
+}
+
+
+class ForceField:
+    """Compiled lookup of the force field: the (resname, atom_name)
+    pairs are indexed to the rows of the table, and the charges and
+    radii are in arrays; the values of many atoms are found by one
+    gather. The first row of a repeated key is used.
+    The pairs not in the table are looked for by their aliases, once
+    for each different pair."""
+
+    def __init__(self,
+                 table: pd.DataFrame,  # Rows of the file, see ParseData
+                 aliases: typing.Optional[charmm_names.NameAliases] = None
+                 ) -> None:
+        self.table: pd.DataFrame = table
+        self.aliases: typing.Optional[charmm_names.NameAliases] = aliases
+        self.charge: np.ndarray = table['charge'].to_numpy(dtype=float)
+        self.radius: np.ndarray = table['radius'].to_numpy(dtype=float)
+        pairs: pd.MultiIndex = pd.MultiIndex.from_arrays(
+            [table['resname'].to_numpy(dtype=str),
+             table['atom_name'].to_numpy(dtype=str)])
+        first: np.ndarray = ~pairs.duplicated()
+        self.pairs: pd.MultiIndex = pairs[first]
+        self.pair_rows: np.ndarray = np.flatnonzero(first)
+
+    def pair_ids(self,
+                 resnames: typing.Any,  # Residue names, array-like
+                 atom_names: typing.Any  # Atom names, array-like
+                 ) -> np.ndarray:
+        """return the rows of the pairs, -1 for the ones not found"""
+        keys: pd.MultiIndex = pd.MultiIndex.from_arrays([resnames, atom_names])
+        found: np.ndarray = self.pairs.get_indexer(keys)
+        ids: np.ndarray = np.where(found >= 0, self.pair_rows[found], -1)
+        missing: np.ndarray = ids < 0
+        if self.aliases is not None and missing.any():
+            codes, uniques = keys[missing].factorize()
+            ids[missing] = np.array(
+                [self.alias_id(str(resname), str(atom_name))
+                 for resname, atom_name in uniques], dtype=ids.dtype)[codes]
+        return ids
+
+    def alias_id(self,
+                 resname: str,  # Name of the residue, not in the table
+                 atom_name: str  # Name of the atom
+                 ) -> int:
+        """return the row of the first alias of the pair in the table,
+        -1 if none of them is in it"""
+        for pair in self.aliases.candidates(resname, atom_name):
+            found: int = self.pairs.get_indexer([pair])[0]
+            if found >= 0:
+                return int(self.pair_rows[found])
+        return -1
+
+    def radii(self,
+              ids: np.ndarray  # Rows from pair_ids
+              ) -> np.ndarray:
+        """return the radii of the rows, NaN for -1"""
+        return np.where(ids >= 0, self.radius[ids], np.nan)
+
+    def charges(self,
+                ids: np.ndarray  # Rows from pair_ids
+                ) -> np.ndarray:
+        """return the charges of the rows, NaN for -1"""
+        return np.where(ids >= 0, self.charge[ids], np.nan)
+
+
 class ParseData:
     """get the data"""
     info_msg = 'Message from ParseData:\n'
+    columns: list[str] = \
+        ['resname', 'atom_name', 'charge', 'radius', 'atom_type']
 
     def __init__(self,
                  fname: str,
-                 log: logger.logging.Logger
+                 log: logger.logging.Logger,
+                 cache: typing.Optional[itp_cache.ItpCache] = None,
+                 names_file: str = ''  # Aliases of the names, e.g. .names
                  ) -> None:
 
-        self.radius_df: pd.DataFrame = self.read_file(fname)
+        self.radius_df: pd.DataFrame = self.get_table(fname, cache)
+        aliases: typing.Optional[charmm_names.NameAliases] = None
+        if names_file:
+            aliases = charmm_names.NameAliases(names_file, log)
+        self.force_field: ForceField = ForceField(self.radius_df, aliases)
         self.write_msg(log)
 
+    def get_table(self,
+                  fname: str,
+                  cache: typing.Optional[itp_cache.ItpCache]
+                  ) -> pd.DataFrame:
+        """return the table from the cache by the hash of the file, or
+        parse the file and save it in the cache"""
+        with my_tools.open_file(fname, 'rb') as f_r:
+            raw: bytes = f_r.read()
+        if cache is None:
+            return self.read_file(fname, raw)
+        key: str = cache.key(raw, FF_VERSION)
+        table: typing.Optional[pd.DataFrame] = cache.load(key, 'forcefield')
+        if table is not None:
+            self.info_msg += f'\tUsing the cached table of {fname}\n'
+            return table
+        table = self.read_file(fname, raw)
+        cache.save(key, 'forcefield', table)
+        return table
+
     def read_file(self,
-                  fname: str
+                  fname: str,
+                  raw: bytes  # Contents of the file
                   ) -> pd.DataFrame:
-        """parse the file and return the data"""
-        lines: list[dict[str, typing.Any]] = []
+        """parse the file and return the data, tab separated columns"""
         self.info_msg += f'\tReading {fname}\n'
-        with open(fname, 'r', encoding='utf8') as f_r:
-            while True:
-                line: str = f_r.readline().strip()
-                if line.startswith("#"):
-                    pass
-                elif len(line) > 1:
-                    lines.append(self._process_line(line))
-                if not line:
-                    break
-        return pd.DataFrame(lines)
-
-    def _process_line(self,
-                      line: str
-                      ) -> dict[str, typing.Any]:
-        """parse a line and return them"""
-        tmp: list[str] = line.split("\t")
-        return {
-            'resname': tmp[0],
-            'atom_name': tmp[1],
-            'charge': float(tmp[2]),
-            'radius': float(tmp[3]),
-            'atom_type': tmp[4]
-        }
+        with warnings.catch_warnings():
+            # The comment lines at the top of the file have no data
+            warnings.simplefilter('ignore', UserWarning)
+            values: np.ndarray = np.loadtxt(
+                io.StringIO(raw.decode('utf8')),
+                dtype=str,
+                delimiter='\t',
+                comments='#',
+                usecols=range(len(self.columns)),
+                ndmin=2)
+        table: pd.DataFrame = pd.DataFrame(
+            {column: np.char.strip(values[:, i])
+             for i, column in enumerate(self.columns)})
+        for column in ['charge', 'radius']:
+            table[column] = table[column].astype(float)
+        return table
 
     def write_msg(self,
                    log: logger.logging.Logger  # To log
@@ -61,5 +167,51 @@ class ParseData:
               f'\t{self.info_msg}{bcolors.ENDC}')
         log.info(self.info_msg)
 
+
+class ForceFieldRegistry:
+    """The force fields by name, each is read once when it is asked
+    for and kept in memory"""
+
+    def __init__(self,
+                 log: logger.logging.Logger,
+                 cache: typing.Optional[itp_cache.ItpCache] = None,
+                 directory: str = '.'  # Of the files of FORCE_FIELDS
+                 ) -> None:
+        self.log: logger.logging.Logger = log
+        self.cache: typing.Optional[itp_cache.ItpCache] = cache
+        self.files: dict[str, tuple[str, str]] = \
+            {name: (os.path.join(directory, ff_file),
+                    os.path.join(directory, names_file))
+             for name, (ff_file, names_file) in FORCE_FIELDS.items()}
+        self.loaded: dict[str, ForceField] = {}
+
+    def register(self,
+                 name: str,  # Name to ask for the force field
+                 ff_file: str,  # Table, in the format of CHARMM.DAT
+                 names_file: str = ''  # Aliases of the names, or none
+                 ) -> None:
+        """add a force field, or replace the files of one"""
+        self.files[name] = (ff_file, names_file)
+        self.loaded.pop(name, None)
+
+    def get(self,
+            name: str  # Name of a registered force field
+            ) -> ForceField:
+        """return the force field, read it on the first call"""
+        if name not in self.loaded:
+            if name not in self.files:
+                self.log.error(msg := (f'\tUnknown force field `{name}`, '
+                                       f'known: {sorted(self.files)}\n'))
+                sys.exit(f'{bcolors.FAIL}{self.__module__}:\n{msg}'
+                         f'{bcolors.ENDC}')
+            ff_file, names_file = self.files[name]
+            ff_file = my_tools.check_file_exist(ff_file, self.log)
+            if names_file and not os.path.exists(names_file):
+                names_file = ''  # The names are used as they are
+            self.loaded[name] = ParseData(
+                ff_file, self.log, self.cache, names_file).force_field
+        return self.loaded[name]
+
+
 if __name__ == '__main__':
     ParseData(sys.argv[1], log=logger.setup_logger('parse_charmm.log'))
@@ -6,13 +6,219 @@
     scrips."""
 
 
+import os
 import sys
+import mmap
 import typing
+import itertools
+import numpy as np
 import pandas as pd
 import logger
+import my_tools
 from colors_text import TextColor as bcolors
 
 
+# Spans (0-based, end exclusive) of the fields in the ATOM and HETATM
+# records; the order of the keys is the order of the pdb_df columns
+PDB_COLUMNS: dict[str, tuple[int, int]] = {
+    'records': (0, 6),
+    'atom_id': (6, 11),
+    'atom_name': (12, 16),
+    'residue_name': (17, 20),
+    'residue_number': (22, 26),
+    'insertion_code': (26, 27),
+    'x': (30, 39),
+    'y': (39, 47),
+    'z': (47, 55),
+    'occupancy': (55, 61),
+    'temperature': (61, 67),
+    'atom_symbol': (76, 78)
+}
+# Chars of the residue names, the four-char names are cut (TIP3 is TIP)
+RESNAME_WIDTH: int = \
+    PDB_COLUMNS['residue_name'][1] - PDB_COLUMNS['residue_name'][0]
+LINE_WIDTH: int = 80  # Width of a record, longer lines are cut
+ATOM_LINE_LEN: int = 78  # Length of ATOM lines, without the newline
+BLOCK_SIZE: int = 1 << 22  # Most bytes read from the file at once
+MIN_BLOCK_SIZE: int = 1 << 16  # Least bytes read at once
+INDEX_EXT: str = '.fidx.npz'  # Sidecar file of the models' byte offsets
+
+# Selection of models: one index, a range (e.g. every 50th) or a list
+FrameSelection = typing.Union[int, slice, list[int]]
+
+RECORD_TYPES: list[str] = ['ATOM', 'HETATM']  # Codes of `records` column
+
+# Fixed-width view of a record, each field is a bytes string
+RECORD_DTYPE: np.dtype = np.dtype({
+    'names': list(PDB_COLUMNS),
+    'formats': [f'S{end - start}' for start, end in PDB_COLUMNS.values()],
+    'offsets': [start for start, _ in PDB_COLUMNS.values()],
+    'itemsize': LINE_WIDTH})
+
+
+def parse_fixed_numbers(field: np.ndarray  # Bytes strings of one column
+                        ) -> np.ndarray:
+    """Decode a fixed width column of decimal numbers, e.g. '  -9.657',
+    with integer arithmetic on the characters. Empty fields are NaN and
+    anything else than digits, sign and point is left to numpy"""
+    width: int = field.dtype.itemsize
+    # One row per character position, so each step is a contiguous vector
+    chars: np.ndarray = np.ascontiguousarray(field).view(
+        np.uint8).reshape(-1, width).T.copy()
+    digits: np.ndarray = chars - ord('0')
+    is_digit: np.ndarray = digits <= 9
+    is_point: np.ndarray = chars == ord('.')
+    is_minus: np.ndarray = chars == ord('-')
+    is_blank: np.ndarray = (chars == ord(' ')) | (chars == 0)
+    if not (is_digit | is_point | is_minus | is_blank).all():
+        values: np.ndarray = np.char.strip(field)
+        filled: np.ndarray = values != b''
+        result: np.ndarray = np.full(len(values), np.nan)
+        result[filled] = values[filled].astype(np.float64)
+        return result
+    n_rows: int = chars.shape[1]
+    mantissa: np.ndarray = np.zeros(n_rows, dtype=np.int64)
+    decimals: np.ndarray = np.zeros(n_rows, dtype=np.int64)
+    points: np.ndarray = np.zeros(n_rows, dtype=np.int64)
+    for col in range(width):
+        mantissa = np.where(is_digit[col],
+                            mantissa * 10 + digits[col],
+                            mantissa)
+        decimals += is_digit[col] & (points > 0)
+        points += is_point[col]
+    if (points > 1).any():
+        return field.astype(np.float64)
+    # Dividing two exact integers gives the correctly rounded float
+    result = mantissa / (10.0 ** np.arange(width))[decimals]
+    result[is_minus.any(axis=0)] *= -1
+    result[~is_digit.any(axis=0)] = np.nan
+    return result
+
+
+def parse_fixed_integers(field: np.ndarray,  # Bytes strings of one column
+                         name: str  # Name of the column, for the message
+                         ) -> np.ndarray:
+    """Decode a fixed width column of integers to int32; a blank field,
+    or one with anything else than digits and a sign, is an error"""
+    chars: np.ndarray = np.ascontiguousarray(field).view(
+        np.uint8).reshape(len(field), field.dtype.itemsize)
+    is_digit: np.ndarray = (chars >= ord('0')) & (chars <= ord('9'))
+    is_valid: np.ndarray = is_digit.any(axis=1) & \
+        (is_digit | (chars == ord(' ')) | (chars == ord('-')) |
+         (chars == 0)).all(axis=1)
+    if not is_valid.all():
+        row: int = int(np.flatnonzero(~is_valid)[0])
+        sys.exit(f'{bcolors.FAIL}{__name__}:\n\tThe {name} '
+                 f'`{field[row].decode(errors="replace")}` of the atom '
+                 f'{row + 1} is not an integer{bcolors.ENDC}')
+    return parse_fixed_numbers(field).astype(np.int32)
+
+
+def intern_names(field: np.ndarray  # Bytes strings of one column
+                 ) -> pd.Categorical:
+    """Return a column of names as categorical: each distinct name is
+    decoded once and every row keeps only a small integer code"""
+    padded: np.ndarray = np.zeros(len(field), dtype='S8')
+    padded[:] = field
+    # Names up to 8 chars are hashed as integers
+    codes: np.ndarray
+    uniques: np.ndarray
+    codes, uniques = pd.factorize(padded.view(np.uint64))
+    names: np.ndarray = np.char.strip(uniques.view('S8')).astype(str)
+    categories: np.ndarray
+    remap: np.ndarray
+    categories, remap = np.unique(names, return_inverse=True)
+    return pd.Categorical.from_codes(remap[codes], categories=categories)
+
+
+def select_frames(frames: FrameSelection,  # Index, range or list of frames
+                  n_frames: int  # Number of frames in the file
+                  ) -> list[int]:
+    """return the indices of the selected frames, negative indices
+    count from the last frame"""
+    all_frames: range = range(n_frames)
+    if isinstance(frames, slice):
+        return list(all_frames[frames])
+    if isinstance(frames, int):
+        frames = [frames]
+    return [all_frames[item] for item in frames]
+
+
+def block_size_of(fname: str  # Name of the file
+                  ) -> int:
+    """return the bytes to read at once: the size of a small file (a
+    read allocates all its size first), at most BLOCK_SIZE"""
+    if my_tools.is_compressed(fname):
+        return BLOCK_SIZE
+    return min(max(os.path.getsize(fname) + 1, MIN_BLOCK_SIZE), BLOCK_SIZE)
+
+
+def padded_bytes(*chunks: typing.Union[bytes, memoryview]  # Joined
+                 ) -> np.ndarray:
+    """return the bytes of the chunks followed by LINE_WIDTH zeros, so
+    each line can be viewed at its full width"""
+    size: int = sum(len(item) for item in chunks)
+    data: np.ndarray = np.zeros(size + LINE_WIDTH, dtype=np.uint8)
+    position: int = 0
+    for chunk in chunks:
+        data[position:position + len(chunk)] = \
+            np.frombuffer(chunk, dtype=np.uint8)
+        position += len(chunk)
+    return data
+
+
+def line_spans(data: np.ndarray  # Bytes from padded_bytes
+               ) -> tuple[np.ndarray, np.ndarray]:
+    """return the start and length (without the newline) of each line"""
+    size: int = len(data) - LINE_WIDTH
+    ends: np.ndarray = np.flatnonzero(data[:size] == ord('\n'))
+    if size and data[size - 1] != ord('\n'):
+        ends = np.append(ends, size)  # The last line has no newline
+    starts: np.ndarray = np.zeros(len(ends), dtype=np.int64)
+    starts[1:] = ends[:-1] + 1
+    lengths: np.ndarray = ends - starts
+    # Lines ending with \r\n, as by splitlines
+    lengths -= (lengths > 0) & (data[np.maximum(ends - 1, 0)] == ord('\r'))
+    return starts, lengths
+
+
+def starts_with(data: np.ndarray,  # Bytes from padded_bytes
+                starts: np.ndarray,  # Start of each line
+                lengths: np.ndarray,  # Length of each line
+                prefix: bytes  # The record name, e.g. b'ATOM'
+                ) -> np.ndarray:
+    """return if each line starts with the prefix"""
+    found: np.ndarray = lengths >= len(prefix)
+    for i, char in enumerate(prefix):
+        found &= data[starts + i] == char
+    return found
+
+
+def fixed_lines(data: np.ndarray,  # Bytes from padded_bytes
+                starts: np.ndarray,  # Start of each selected line
+                lengths: np.ndarray  # Length of each of them
+                ) -> np.ndarray:
+    """return the lines as fixed width strings, longer lines are cut;
+    they are copied from a strided view of the bytes (a window at each
+    byte), without a list of the lines"""
+    windows: np.ndarray = np.lib.stride_tricks.as_strided(
+        data,
+        shape=(len(data) - LINE_WIDTH + 1, LINE_WIDTH),
+        strides=(1, 1),
+        writeable=False)
+    lines: np.ndarray = windows[starts]
+    lines[np.arange(LINE_WIDTH) >= lengths[:, np.newaxis]] = 0
+    return lines.view(f'S{LINE_WIDTH}').ravel()
+
+
+def slice_columns(columns: dict[str, typing.Any],  # Decoded records
+                  start: int,  # First row
+                  stop: typing.Optional[int]  # End, None for the last
+                  ) -> dict[str, typing.Any]:
+    """return the rows of the decoded records"""
+    return {name: values[start:stop] for name, values in columns.items()}
+
+
 class Pdb:
     """
     The PDB file consider is in standard PDB format.
@@ -77,13 +283,32 @@ class Pdb:
     """
 
     info_msg: str = 'Message:\n'  # Message to pass for logging and writing
+    resname_width: int = RESNAME_WIDTH  # Chars of the residue names
 
     def __init__(self,
                  fname: str,  # PDB file name
-                 log: logger.logging.Logger
+                 log: logger.logging.Logger,
+                 stream: bool = False,  # Iterate over the models instead
+                 frames: typing.Optional[FrameSelection] = None  # Models
                  ) -> None:
         self.info_msg += f"\tReading '{fname}' ...\n"
-        self.pdb_df: pd.DataFrame = self.get_data(fname)
+        if frames is not None:
+            # Random access to the models through their byte offsets
+            index = FrameIndex(fname, log)
+            self.frame_ids: typing.Iterable[int] = index.select(frames)
+            self.info_msg += f'\tSelected models: {len(self.frame_ids)}\n'
+        if stream:
+            self.info_msg += '\tThe models are read one by one\n'
+            if frames is None:
+                self.frame_ids = itertools.count()
+                self.frames: typing.Iterator[pd.DataFrame] = \
+                    self.iter_frames(fname)
+            else:
+                self.frames = index.iter_frames(self.frame_ids)
+        elif frames is None:
+            self.pdb_df: pd.DataFrame = self.get_data(fname)
+        else:
+            self.pdb_df = index.read_frame(index.select(frames)[-1])
         self.__write_msg(log)
         self.info_msg = ''  # Empety the msg
 
@@ -91,124 +316,131 @@ class Pdb:
                  fname: str  # PDB file name
                  ) -> pd.DataFrame:
         """Read and get the atomic strcuture in lammps`"""
-        # Read PDB file and return a list of list
-        data = self.read_pdb(fname)
-        # Convert the list to DataFrame
-        return self.mk_df(data)
+        # Each block of the file is decoded to columns as it is read, so
+        # only one block of raw records is in memory at a time
+        parts: list[dict[str, typing.Any]] = [
+            columns for columns, _ in
+            self.iter_records(fname, block_size_of(fname))]
+        self.info_msg += \
+            f'\tNumber of atoms: {sum(len(item["x"]) for item in parts)}\n'
+        return self.mk_frame_df(parts)
 
-    def read_pdb(self,
-                 fname: str  # PDB file name
-                 ) -> list:
-        """Reading line by line of the pdb file"""
-        data_list: list[typing.Any] = []
-        with open(fname, 'r', encoding='utf8') as f_i:
-            while True:
-                line = f_i.readline()
-                if line.strip().startswith("ATOM"):
-                    data_list.append(self.__process_atom(line))
-                elif line.strip().startswith("HETATM"):
-                    data_list.append(self.__process_hetatm(line))
-                else:
-                    pass
-                if not line:
-                    break
-        return data_list
+    def iter_frames(self,
+                    fname: str  # PDB file name
+                    ) -> typing.Iterator[pd.DataFrame]:
+        """Yield the models (MODEL ... ENDMDL) of the file one by one,
+        so only one frame and one block are kept in memory. A file
+        without MODEL records is a single frame"""
+        frame: list[dict[str, typing.Any]] = []  # Parts of the model
+        for columns, bounds in \
+                self.iter_records(fname, block_size_of(fname)):
+            start: int = 0
+            for bound in bounds:
+                frame.append(slice_columns(columns, start, bound))
+                if sum(len(item['x']) for item in frame):
+                    yield self.mk_frame_df(frame)
+                frame = []
+                start = bound
+            frame.append(slice_columns(columns, start, None))
+        if sum(len(item['x']) for item in frame):
+            yield self.mk_frame_df(frame)
 
     @staticmethod
-    def __process_atom(line: str) -> list:
-        """Process the line on based on the PDB file, started with ATOM"""
-        # first check the length of the line MUST be equal to 79
-        if len(line) != 79:
-            exit(f"ERROR! wrong line length: {len(line)} != 79")
-        records: str = line[0:6].strip()
-        atom_id: int = int(line[6:11].strip())
-        atom_name: str = line[12:16].strip()
-        residue_name: str = line[17:20].strip()
-        residue_number: str = line[22:27].strip()
-        x_i: float = float(line[30:39].strip())
-        y_i: float = float(line[39:47].strip())
-        z_i: float = float(line[47:55].strip())
-        occupancy: float = float(line[55:61])
-        temperature: float = float(line[61:67])
-        atom_symbol: str = line[76:78].strip()
-        return [records,
-                atom_id,
-                atom_name,
-                residue_name,
-                residue_number,
-                x_i,
-                y_i,
-                z_i,
-                occupancy,
-                temperature,
-                atom_symbol]
+    def iter_records(fname: str,  # PDB file name
+                     block_size: int  # Bytes per read
+                     ) -> typing.Iterator[tuple[dict[str, typing.Any],
+                                                np.ndarray]]:
+        """Read the file in blocks of complete lines and yield the
+        decoded records of each, see decode_block"""
+        tail: bytes = b''  # Unfinished line at the end of a block
+        with my_tools.open_file(fname, 'rb') as f_i:
+            while block := f_i.read(block_size):
+                cut: int = block.rfind(b'\n') + 1
+                if not cut:
+                    tail += block
+                    continue
+                data: np.ndarray = padded_bytes(tail, memoryview(block)[:cut])
+                tail = block[cut:]
+                del block  # The raw bytes are in data
+                yield Pdb.decode_block(data)
+        yield Pdb.decode_block(padded_bytes(tail))
 
     @staticmethod
-    def __process_hetatm(line: str) -> list:
-        """Process the line on based on the PDB file, started with HATATM"""
-        records: str = line[0:6].strip()
-        atom_id: int = int(line[6:11].strip())
-        atom_name: str = line[12:16].strip()
-        residue_name: str = line[17:20].strip()
-        residue_number: str = line[22:27].strip()
-        x_i: float = float(line[30:39].strip())
-        y_i: float = float(line[39:47].strip())
-        z_i: float = float(line[47:55].strip())
-        atom_symbol: str = line[76:78].strip()
-        return [records,
-                atom_id,
-                atom_name,
-                residue_name,
-                residue_number,
-                x_i,
-                y_i,
-                z_i,
-                atom_symbol]
+    def decode_block(data: np.ndarray  # Lines of the file, padded_bytes
+                     ) -> tuple[dict[str, typing.Any], np.ndarray]:
+        """Decode the ATOM and HETATM records of the lines, and return
+        the number of records before each MODEL and ENDMDL line"""
+        starts: np.ndarray
+        lengths: np.ndarray
+        starts, lengths = line_spans(data)
+        is_atom: np.ndarray = starts_with(data, starts, lengths, b'ATOM')
+        is_record: np.ndarray = \
+            is_atom | starts_with(data, starts, lengths, b'HETATM')
+        # Same check as for the per-line parser of the ATOM records
+        if (wrong := lengths[is_atom & (lengths != ATOM_LINE_LEN)]).size:
+            exit(f"ERROR! wrong line length: {wrong[0] + 1} != "
+                 f"{ATOM_LINE_LEN + 1}")
+        is_bound: np.ndarray = \
+            starts_with(data, starts, lengths, b'MODEL') | \
+            starts_with(data, starts, lengths, b'ENDMDL')
+        bounds: np.ndarray = np.cumsum(is_record)[is_bound]
+        return (Pdb.decode_records(fixed_lines(
+                    data, starts[is_record], lengths[is_record])),
+                bounds)
 
     @staticmethod
-    def mk_df(data: list[list]) -> pd.DataFrame:
-        """Making DataFrame from PDB file"""
-        columns: list[str] = ['records',
-                              'atom_id',
-                              'atom_name',
-                              'residue_name',
-                              'residue_number',
-                              'x',
-                              'y',
-                              'z',
-                              'occupancy',
-                              'temperature',
-                              'atom_symbol']
-        df_i = pd.DataFrame(data, columns=columns)
-        return df_i
+    def mk_frame_df(parts: list[dict[str, typing.Any]]  # Decoded columns
+                    ) -> pd.DataFrame:
+        """Join the decoded columns of the parts of one model into a
+        DataFrame"""
+        filled: list[dict[str, typing.Any]] = \
+            [item for item in parts if len(item['x'])] or parts[:1]
+        columns: dict[str, typing.Any] = {}
+        for name in PDB_COLUMNS:
+            values: list[typing.Any] = [item[name] for item in filled]
+            if len(values) == 1:
+                columns[name] = values[0]
+            elif isinstance(values[0], pd.Categorical):
+                columns[name] = pd.api.types.union_categoricals(
+                    values, sort_categories=True)
+            else:
+                columns[name] = np.concatenate(values)
+        return pd.DataFrame(columns, columns=list(PDB_COLUMNS), copy=False)
+
+    @staticmethod
+    def decode_records(lines: np.ndarray  # ATOM/HETATM fixed width lines
+                       ) -> dict[str, typing.Any]:
+        """Decode the fixed columns of all the records at once into a
+        compact table: int8 record type (index of RECORD_TYPES),
+        categorical names, integer ids and float32 coordinates; the
+        insertion code of the residue (column 27) is a name of its own"""
+        fields: np.ndarray = lines.view(RECORD_DTYPE)
+        columns: dict[str, typing.Any] = {}
+        columns['records'] = np.char.startswith(
+            fields['records'], RECORD_TYPES[1].encode()).astype(np.int8)
+        for name in ['atom_name', 'residue_name', 'insertion_code',
+                     'atom_symbol']:
+            columns[name] = intern_names(fields[name])
+        for name in ['atom_id', 'residue_number']:
+            columns[name] = parse_fixed_integers(fields[name], name)
+        for name in ['x', 'y', 'z', 'occupancy', 'temperature']:
+            columns[name] = \
+                parse_fixed_numbers(fields[name]).astype(np.float32)
+        return columns
 
     @staticmethod
     def check_residue_number(df_i: pd.DataFrame) -> pd.DataFrame:
         """The residue number in the PDB file created by VMD usually
         does not have the correct order, and the numbering is almost
         random.
-        Here we check that and if needed will be replaced with correct
-        one.
+        Here the residues get new numbers (column 'mol') from 1, in the
+        order they first appear in the file; atoms with the same
+        residue number keep the same 'mol'. It is one hashing pass over
+        the residue numbers.
         """
-        # Make sure the residue type is integer
-        df_i = df_i.astype({'residue_number': int})
-        # Get the uniqe numbers of residues
-        df_reduced: pd.DataFrame = df_i.groupby(df_i.residue_number).mean()
-        # add a new index from 1
-        df_reduced = df_reduced.reset_index()
-        df_reduced.index += 1
-        # make a dict from the new index and the residue
-        residue_dict: dict[int, int] = dict(zip(df_reduced.residue_number,
-                                                df_reduced.index))
-        # Make a list of new residue number for the main DataFrame
-        # I call it 'mol'
-        mol: list[int] = []
-        for _, row in df_i.iterrows():
-            mol.append(residue_dict[row['residue_number']])
-        # Add the new mol numbers to the DataFrame
-        df_i['mol'] = mol
-        del df_reduced
-        del residue_dict
+        codes: np.ndarray
+        codes, _ = pd.factorize(df_i['residue_number'], sort=False)
+        df_i['mol'] = (codes + 1).astype(np.int32)
         return df_i
 
     def __write_msg(self,
@@ -220,5 +452,125 @@ class Pdb:
         log.info(self.info_msg)
 
 
+class FrameIndex:
+    """Byte offsets of the models (MODEL records) of a PDB file.
+    The offsets are found by one scan of the file and saved in a small
+    sidecar file (fname.fidx.npz), which is used as long as the size and
+    modification time of the PDB file are unchanged. A model is read by
+    memory-mapping the file and decoding only its bytes.
+    """
+
+    info_msg: str = 'Message from FrameIndex:\n'
+
+    def __init__(self,
+                 fname: str,  # PDB file name
+                 log: logger.logging.Logger
+                 ) -> None:
+        self.fname: str = fname
+        self.index_file: str = f'{fname}{INDEX_EXT}'
+        # Start of each model and the end of the last one
+        self.offsets: np.ndarray = self.get_offsets(log)
+        self.info_msg += f'\tNumber of models: {len(self)}\n'
+        self.write_msg(log)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get_offsets(self,
+                    log: logger.logging.Logger
+                    ) -> np.ndarray:
+        """load the offsets from the sidecar file, or scan the PDB"""
+        stamp: np.ndarray = self._file_stamp()
+        if os.path.isfile(self.index_file):
+            with np.load(self.index_file) as index:
+                if np.array_equal(index['stamp'], stamp):
+                    self.info_msg += f'\tUsing `{self.index_file}`\n'
+                    return index['offsets']
+        offsets: np.ndarray = self.scan()
+        try:
+            with open(self.index_file, 'wb') as f_w:
+                np.savez(f_w, stamp=stamp, offsets=offsets)
+            self.info_msg += f'\tThe index is saved in `{self.index_file}`\n'
+        except OSError as err:
+            log.warning(f'\tThe index could not be saved: {err}\n')
+        return offsets
+
+    def scan(self,
+             block_size: int = BLOCK_SIZE  # Bytes per read
+             ) -> np.ndarray:
+        """read the file once and record the offset of each MODEL"""
+        marker: bytes = b'\nMODEL'
+        offsets: list[int] = []
+        tail: bytes = b'\n'  # End of the previous block, the file starts
+        position: int = 0  # Offset of the current block in the file
+        with my_tools.open_file(self.fname, 'rb') as f_i:
+            while block := f_i.read(block_size):
+                data: bytes = tail + block
+                base: int = position - len(tail)
+                found: int = data.find(marker)
+                while found != -1:
+                    offsets.append(base + found + 1)
+                    found = data.find(marker, found + 1)
+                # A marker may be split between two blocks
+                tail = data[-(len(marker) - 1):]
+                position += len(block)
+        if not offsets:  # A single model without MODEL record
+            offsets.append(0)
+        offsets.append(position)
+        self.info_msg += f'\tScanned `{self.fname}` for the models\n'
+        return np.asarray(offsets, dtype=np.int64)
+
+    def select(self,
+               frames: FrameSelection  # Index, range or list of models
+               ) -> list[int]:
+        """return the indices of the selected models, negative indices
+        count from the last model"""
+        return select_frames(frames, len(self))
+
+    def read_frame(self,
+                   frame: int  # Index of the model
+                   ) -> pd.DataFrame:
+        """read one model"""
+        return next(self.iter_frames([frame]))
+
+    def iter_frames(self,
+                    frames: typing.Iterable[int]  # Indices of the models
+                    ) -> typing.Iterator[pd.DataFrame]:
+        """yield the selected models, decoding only their bytes"""
+        for block in self.iter_bytes(frames):
+            yield Pdb.mk_frame_df([Pdb.decode_block(padded_bytes(block))[0]])
+
+    def iter_bytes(self,
+                   frames: typing.Iterable[int]  # Indices of the models
+                   ) -> typing.Iterator[bytes]:
+        """yield the bytes of the selected models from a memory map of
+        the file; compressed files can not be mapped, there the offsets
+        are in the decompressed stream and reached by seeking"""
+        if my_tools.is_compressed(self.fname):
+            with my_tools.open_file(self.fname, 'rb') as f_i:
+                for frame in frames:
+                    f_i.seek(self.offsets[frame])
+                    yield f_i.read(
+                        self.offsets[frame + 1] - self.offsets[frame])
+            return
+        with open(self.fname, 'rb') as f_i, \
+             mmap.mmap(f_i.fileno(), 0, access=mmap.ACCESS_READ) as f_map:
+            for frame in frames:
+                yield f_map[self.offsets[frame]:self.offsets[frame + 1]]
+
+    def _file_stamp(self) -> np.ndarray:
+        """size and modification time, to check the index is valid"""
+        stat: os.stat_result = os.stat(self.fname)
+        return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    def write_msg(self,
+                  log: logger.logging.Logger  # To log
+                  ) -> None:
+        """write and log messages"""
+        print(f'{bcolors.OKCYAN}{FrameIndex.__name__}:\n'
+              f'\t{self.info_msg}{bcolors.ENDC}')
+        log.info(self.info_msg)
+
+
 if __name__ == '__main__':
     pdb = Pdb(sys.argv[1], log=logger.setup_logger('pdb2df.log'))
@@ -0,0 +1,142 @@
+"""
+Write the pqr of many frames of the same atoms, e.g. of a trajectory:
+everything of an atom but its coordinates (ids, names, residue, chain,
+charge and radius) is the same in all the frames, so its text is made
+once and kept as one buffer of bytes, with a hole for the coordinates
+of each atom. The coordinates of a frame are formatted at once with
+NumPy, from tables of the texts of their parts, into the holes and the
+buffer is written as it is.
+The text is the one of %8.3f: float32 coordinates times 1000 are exact
+in float64, so rounding them half to even is what Python does. A frame
+with a coordinate which is not finite or does not fit in 8 chars is
+formatted by Python.
+"""
+
+import typing
+
+import numpy as np
+import pandas as pd
+
+import my_tools
+
+
+# Parts of the line of an atom in the pqr, its static text around the
+# coordinates
+PQR_PREFIX: str = 'ATOM  %5s %-4s %-3s %1s %5s '
+PQR_COORDINATES: str = '%8.3f%8.3f%8.3f'
+PQR_SUFFIX: str = ' %7.4f %6.4f\n'
+PQR_END: str = 'TER\nEND\n'
+COORDINATE_WIDTH: int = 8  # Chars of each of x, y, z
+# Coordinates, in 1/1000, which fit in the width: -999.999 to 9999.999
+MILLI_RANGE: tuple[int, int] = (-999_999, 9_999_999)
+# Text of the whole part of the coordinates, of its value and then of
+# 10000 + its value for the negatives, and of the point and decimals;
+# 4 bytes each, as uint32 to gather them at once
+WHOLE_TEXT: np.ndarray = np.frombuffer(
+    (''.join(f'{i:4d}' for i in range(10000)) +
+     ''.join(f'{"-" + str(i):>4}' for i in range(1000))).encode('ascii'),
+    dtype=np.uint32)
+DECIMAL_TEXT: np.ndarray = np.frombuffer(
+    ''.join(f'.{i:03d}' for i in range(1000)).encode('ascii'),
+    dtype=np.uint32)
+
+
+def format_coordinates(coordinates: np.ndarray  # (atoms, 3), float32
+                       ) -> typing.Optional[np.ndarray]:
+    """return the %8.3f text of the coordinates as bytes, (atoms, 24);
+    None if they are not float32 or any of them does not fit"""
+    if coordinates.dtype != np.float32:
+        return None
+    values: np.ndarray = coordinates.astype(np.float64) * 1000
+    if not np.isfinite(values).all():
+        return None
+    milli: np.ndarray = np.rint(values)  # Half to even, as Python
+    if len(milli) and \
+       (milli.min() < MILLI_RANGE[0] or milli.max() > MILLI_RANGE[1]):
+        return None
+    digits: np.ndarray = np.abs(milli).astype(np.int32)
+    text: np.ndarray = np.empty(values.shape + (2,), dtype=np.uint32)
+    # The sign is kept for the negatives rounded to zero, e.g. -0.000
+    text[..., 0] = WHOLE_TEXT[digits // 1000 + 10000 * np.signbit(values)]
+    text[..., 1] = DECIMAL_TEXT[digits % 1000]
+    return text.view(np.uint8).reshape(len(coordinates),
+                                       3 * COORDINATE_WIDTH)
+
+
+class PqrFrames:
+    """The static text of the atoms of a pqr, written with the
+    coordinates of each frame"""
+
+    def __init__(self,
+                 pqr_df: pd.DataFrame  # See PdbToPqr.mk_pqr_df
+                 ) -> None:
+        prefix_columns: list[str] = ['atom_id', 'atom_name', 'residue_name',
+                                     'chain_id', 'residue_number']
+        self.prefixes: list[str] = list(map(
+            PQR_PREFIX.__mod__,
+            zip(*[pqr_df[column].tolist() for column in prefix_columns])))
+        self.suffixes: list[str] = list(map(
+            PQR_SUFFIX.__mod__,
+            zip(pqr_df['charge'].tolist(), pqr_df['radius'].tolist())))
+        hole: str = ' ' * 3 * COORDINATE_WIDTH
+        # The holes are filled in place for each frame
+        self.text: np.ndarray = np.frombuffer(bytearray(
+            ''.join(map(''.join, zip(self.prefixes,
+                                     [hole] * len(self.prefixes),
+                                     self.suffixes))).encode('utf8')),
+            dtype=np.uint8)
+        prefix_sizes: np.ndarray = self.byte_sizes(self.prefixes)
+        line_sizes: np.ndarray = \
+            prefix_sizes + len(hole) + self.byte_sizes(self.suffixes)
+        # Where the coordinates of each atom start in the text
+        self.holes: np.ndarray = \
+            np.cumsum(line_sizes) - line_sizes + prefix_sizes
+        # Lines of the same size (the usual) are a 2D view of the text,
+        # otherwise the holes are filled by their indices
+        self.line_size: int = 0
+        if len(line_sizes) and (line_sizes == line_sizes[0]).all():
+            self.line_size = int(line_sizes[0])
+        else:
+            self.holes = (self.holes[:, np.newaxis] +
+                          np.arange(len(hole))).ravel()
+
+    @staticmethod
+    def byte_sizes(texts: list[str]  # Texts of the atoms
+                   ) -> np.ndarray:
+        """return the size of each text in utf8"""
+        return np.fromiter((len(item.encode('utf8')) for item in texts),
+                           dtype=np.int64,
+                           count=len(texts))
+
+    def render(self,
+               coordinates: np.ndarray,  # (atoms, 3) of the frame
+               coordinate_text: typing.Optional[np.ndarray] = None
+               ) -> np.ndarray:
+        """return the bytes of the atoms with the coordinates, valid
+        until the next frame; the text of the coordinates, from
+        format_coordinates, may be given to share it between the pqr
+        of a frame"""
+        if coordinate_text is None:
+            coordinate_text = format_coordinates(coordinates)
+        if coordinate_text is None:
+            return np.frombuffer(''.join(map(''.join, zip(
+                self.prefixes,
+                map(PQR_COORDINATES.__mod__, map(tuple, coordinates.tolist())),
+                self.suffixes))).encode('utf8'), dtype=np.uint8)
+        if self.line_size:
+            start: int = int(self.holes[0])
+            self.text.reshape(-1, self.line_size)[
+                :, start:start + coordinate_text.shape[1]] = coordinate_text
+        else:
+            self.text[self.holes] = coordinate_text.ravel()
+        return self.text
+
+    def write(self,
+              pqr_file_name: str,  # Maybe compressed, by its extension
+              coordinates: np.ndarray,  # (atoms, 3) of the frame
+              coordinate_text: typing.Optional[np.ndarray] = None
+              ) -> None:
+        """write the pqr of the frame"""
+        with my_tools.open_file(pqr_file_name, 'wb') as f_w:
+            f_w.write(self.render(coordinates, coordinate_text).data)
+            f_w.write(PQR_END.encode('utf8'))
@@ -3,33 +3,239 @@ make the data from the pdb and itp
 
 """
 
+import os
 import sys
+import typing
 from dataclasses import dataclass, field
 
+import numpy as np
 import pandas as pd
 
 import logger
 import itp_to_df
+import itp_cache
+import top_to_df
 import pdb_to_df
+import pqr_frames
+import output_cache
+import gro_to_df
+import binary_trajectory
 import my_tools
 import parse_charmm_data
+import assignment_plan
+import residue_templates
 from colors_text import TextColor as bcolors
 
 
+# Line of an atom in the pqr, the %-formats of the f-strings of the atoms
+PQR_LINE: str = pqr_frames.PQR_PREFIX + pqr_frames.PQR_COORDINATES + \
+    pqr_frames.PQR_SUFFIX
+PQR_BLOCK: int = 1 << 16  # Atoms formatted and written at once
+# Chain identifiers of the residues by name, ' ' for the others
+CHAIN_IDS: dict[str, str] = {'COR': 'A', 'APT': 'B'}
+# Columns of a model which set the static text of its pqr (the chains
+# are set by the residue names), see PdbToPqr.convert_frames
+STATIC_COLUMNS: list[str] = \
+    assignment_plan.LAYOUT_COLUMNS + ['insertion_code']
+# Options of the configs which set the pqr files, in the manifest key
+OUTPUT_OPTIONS: list[str] = [
+    'force_fields', 'pqr_compression', 'trajectory', 'frames',
+    'renumber_residues', 'chain_ids', 'radius_by_atomtype']
+
+
 @dataclass
 class FileConfig:
     """Set the name of the input files"""
-    pdb_file: str = field(init=False)  # Structure file
-    itp_file: str = 'APT_COR.itp'  # FF of nanoparticle
+    pdb_file: str = field(init=False)  # Structure file, .pdb or .gro
+    # FF of nanoparticle, or a .top of the whole system (with its
+    # #include files) whose atoms are in the order of the structure
+    itp_file: str = 'APT_COR.itp'
     ff_file: str = 'CHARMM.DAT'  # Radius of the atoms in CAHRMM
+    # Aliases of the residue and atom names not in ff_file (e.g., WAT,
+    # HIP); skipped if the file does not exist, empty for none
+    names_file: str = 'CHARMM.names'
+    # Names in parse_charmm_data.FORCE_FIELDS (e.g. ['CHARMM']) or the
+    # ff_file, one pqr each, name_CHARMM.pqr, ..., from one read of the
+    # structure and topology; empty for only the ff_file
+    force_fields: list[str] = field(default_factory=list)
+    ff_dir: str = '.'  # Directory of the files of the force_fields
     pqr_file: str = field(init=False)  # The output file to write, ext.: pqr
+    # Compress the output on the fly, e.g. '.gz' to write name.pqr.gz;
+    # inputs are decompressed by their extension, e.g. name.pdb.xz
+    pqr_compression: str = ''
+
+
+@dataclass
+class TrajectoryConfig:
+    """Set the options for multi-model structure files"""
+    # Write one pqr per MODEL: name_0000.pqr, name_0001.pqr, ...
+    trajectory: bool = False
+    # Models to convert, e.g. -1 for the last one or slice(0, None, 50);
+    # they are read through an index of their byte offsets (fname.fidx.npz)
+    frames: typing.Optional[pdb_to_df.FrameSelection] = None
+    # Binary trajectory (.trr or .dcd, uncompressed) whose frames are
+    # written with the names, charges and radii of the pdb_file
+    traj_file: str = ''
+
+
+@dataclass
+class StageConfig:
+    """Set the optional stages of the conversion"""
+    # Number the residues 1, 2, ... in order of appearance before setting
+    # the charges, e.g. for the almost random numbers in files from VMD
+    renumber_residues: bool = False
+    # Processes to parse the large sections of the itp files, 0 for all
+    # the CPUs; only sections larger than itp_to_df.PARALLEL_SIZE
+    itp_workers: int = 1
+
+
+@dataclass
+class CacheConfig:
+    """Set the cache of the parsed itp files"""
+    # Load the parsed sections of an itp file seen before (same contents)
+    # from the cache instead of parsing its text; off by default, as it
+    # writes in cache_dir (STRUCT2APBS_CACHE, or struct2apbs/itp in
+    # XDG_CACHE_HOME or ~/.cache)
+    cache_itp: bool = False
+    cache_dir: str = itp_cache.CACHE_DIR
+    cache_size: int = itp_cache.CACHE_SIZE  # In bytes, LRU entries removed
+    # Assignment plan (.npz) of the charges and radii: used if it is of
+    # the layout of the structure and topology, and written after the run
+    plan_file: str = ''
+    # Manifest (.json) of the outputs and the hashes of their inputs: a
+    # structure whose inputs did not change is not converted again and
+    # its removed or changed outputs are copied from the store of the
+    # outputs; empty for none
+    manifest_file: str = ''
+    store_dir: str = output_cache.STORE_DIR
+    store_size: int = output_cache.STORE_SIZE  # In bytes, LRU removed
+
+
+@dataclass
+class ResidueConfig:
+    """Set the residues, they are matched to the templates of the itp
+    by their names and the ordered names of their atoms (a .top sets
+    all the atoms in order); the residues without one are not written"""
+    chain_ids: dict[str, str] = field(
+        default_factory=lambda: dict(CHAIN_IDS))
+    # Residues whose radii are found by the atomtype of their atoms in
+    # the itp instead of their names, e.g. COR rows of the force field
+    radius_by_atomtype: list[str] = field(default_factory=lambda: ['COR'])
 
 
 @dataclass
-class AllConfig(FileConfig):
+class AllConfig(FileConfig,
+                TrajectoryConfig,
+                StageConfig,
+                CacheConfig,
+                ResidueConfig):
     """set all the configs"""
 
 
+def is_topology(itp_file: str  # Name of the itp or top file
+                ) -> bool:
+    """if the itp_file is a .top file of the whole system"""
+    return my_tools.split_extension(itp_file)[1].split('.')[0] == 'top'
+
+
+def optional_file(fname: str,  # Name of the file to check
+                  log: logger.logging.Logger
+                  ) -> str:
+    """return the checked name of the file, or an empty one if it (or a
+    compressed version of it) does not exist"""
+    if any(os.path.exists(f'{fname}{item}')
+           for item in ['', *my_tools.COMPRESSIONS]):
+        return my_tools.check_file_exist(fname, log)
+    print(f'{bcolors.WARNING}{__name__}:\n\tSkipped `{fname}`: not found'
+          f'{bcolors.ENDC}\n')
+    log.warning(f'\t`{fname}` is not found\n')
+    return ''
+
+
+def structure_files(pdb_file: str,  # Name of the structure file
+                    configs: AllConfig
+                    ) -> list[str]:
+    """return the input files of a structure: it and the trajectory, if
+    any, which set its pqr files with the shared inputs"""
+    return [pdb_file] + ([configs.traj_file] if configs.traj_file else [])
+
+
+@dataclass
+class SharedInputs:
+    """The topology and force fields of the structures, read once and
+    used for all of them (e.g., by the processes of batch_pqr)"""
+    itp: pd.DataFrame  # Atoms of the itp, or of the system of a .top
+    force_fields: parse_charmm_data.ForceFieldRegistry
+    # Plans of the layouts of the structures, by their key
+    plans: dict[str, assignment_plan.AssignmentPlan] = \
+        field(default_factory=dict)
+    # Hashes of the inputs, see shared_digests
+    digests: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def read(cls,
+             configs: AllConfig,
+             log: logger.logging.Logger
+             ) -> 'SharedInputs':
+        """check the files of the configs and read the topology; the
+        force fields are read when they are first used, ff_file only if
+        it is one of them (or there are none)"""
+        uses_ff_file: bool = \
+            not configs.force_fields or configs.ff_file in configs.force_fields
+        ff_file: str = configs.ff_file  # Maybe found compressed
+        if uses_ff_file:
+            ff_file = my_tools.check_file_exist(configs.ff_file, log)
+        configs.itp_file = my_tools.check_file_exist(configs.itp_file, log)
+        if configs.names_file:
+            configs.names_file = optional_file(configs.names_file, log)
+        cache: typing.Optional[itp_cache.ItpCache] = None
+        if configs.cache_itp:
+            cache = itp_cache.ItpCache(configs.cache_dir, configs.cache_size)
+        force_fields: parse_charmm_data.ForceFieldRegistry = \
+            parse_charmm_data.ForceFieldRegistry(log, cache, configs.ff_dir)
+        if uses_ff_file:
+            force_fields.register(configs.ff_file,
+                                  ff_file,
+                                  configs.names_file)
+        return cls(cls.read_topology(configs, cache, log), force_fields)
+
+    def shared_digests(self,
+                       configs: AllConfig
+                       ) -> dict[str, str]:
+        """return the hashes of the inputs of all the structures, for
+        the manifest of the outputs; made once"""
+        if not self.digests:
+            files: list[str] = []
+            for name in configs.force_fields or [configs.ff_file]:
+                files.extend(item for item in
+                             self.force_fields.files.get(name, ('', ''))
+                             if item and os.path.isfile(item))
+            options: dict[str, str] = \
+                {item: repr(getattr(configs, item))
+                 for item in OUTPUT_OPTIONS}
+            options['topology'] = repr(is_topology(configs.itp_file))
+            self.digests = \
+                output_cache.shared_digests(self.itp, files, options)
+        return self.digests
+
+    @staticmethod
+    def read_topology(configs: AllConfig,
+                      cache: typing.Optional[itp_cache.ItpCache],
+                      log: logger.logging.Logger
+                      ) -> pd.DataFrame:
+        """return the atoms of the itp file, or of the whole system if
+        it is a .top file"""
+        if is_topology(configs.itp_file):
+            return top_to_df.Top(configs.itp_file,
+                                 log,
+                                 cache,
+                                 workers=configs.itp_workers).atoms
+        return itp_to_df.Itp(configs.itp_file,
+                             sections=['atoms'],
+                             cache=cache,
+                             workers=configs.itp_workers).atoms
+
+
 class PdbToPqr:
     """
     preapre the file with positions, charges and radii
@@ -41,84 +247,342 @@ class PdbToPqr:
     def __init__(self,
                  pdb_file: str,  # Name of the structure file
                  log: logger.logging.Logger,
-                 configs: AllConfig = AllConfig()
+                 configs: AllConfig = AllConfig(),
+                 # Topology and force fields already read, e.g. for the
+                 # structures of a batch; read from the configs if None
+                 inputs: typing.Optional[SharedInputs] = None,
+                 # Manifest of the outputs shared by many structures, it
+                 # is saved by the caller; read from the configs if None
+                 cache: typing.Optional[output_cache.OutputCache] = None
                  ) -> None:
         configs.pdb_file = pdb_file
         self.configs = configs
-        self.initiate(log)
+        self.outputs: list[str] = []  # Files written, in order
+        self.initiate(log, inputs, cache)
         self.write_msg(log)
 
     def initiate(self,
-                 log: logger.logging.Logger
+                 log: logger.logging.Logger,
+                 inputs: typing.Optional[SharedInputs] = None,
+                 cache: typing.Optional[output_cache.OutputCache] = None
                  ) -> pd.DataFrame:
-        """get all the infos"""
+        """get all the infos; the manifest is saved here only if it is
+        read here, and only if it changed"""
 
         self.check_all_file(log)
-
-        itp: pd.DataFrame = itp_to_df.Itp(self.configs.itp_file).atoms
-        pdb: pd.DataFrame = pdb_to_df.Pdb(self.configs.pdb_file, log).pdb_df
-        force_field: pd.DataFrame = \
-            parse_charmm_data.ParseData(self.configs.ff_file, log).radius_df
-
-        pdb_with_charges: pd.DataFrame = self.get_charges(pdb, itp)
-        pdb_with_charge_radii: pd.DataFrame = \
-            self.set_radii(pdb_with_charges, force_field, itp)
-
-        pdb_df: pd.DataFrame = self.add_chain_identifier(pdb_with_charge_radii)
-        pqr_df: pd.DataFrame = self.mk_pqr_df(pdb_df)
+        if inputs is None:
+            inputs = SharedInputs.read(self.configs, log)
+        itp: pd.DataFrame = inputs.itp
+        force_fields: parse_charmm_data.ForceFieldRegistry = \
+            inputs.force_fields
+        # Plans of the layouts of the structures, by their key
+        self.plans: dict[str, assignment_plan.AssignmentPlan] = inputs.plans
 
         self._set_outfile_name()
-        self.write_pqr(self.configs.pqr_file, pqr_df)
-
-    def check_all_file(self,
-                       log: logger.logging.Logger
-                       ) -> None:
-        """check all the existence of the all files"""
-        for file in [self.configs.ff_file,
-                     self.configs.itp_file,
-                     self.configs.pdb_file]:
-            my_tools.check_file_exist(file, log)
-
-    def get_charges(self,
+        saves_cache: bool = cache is None  # Else saved by the caller
+        if cache is None and self.configs.manifest_file:
+            cache = output_cache.OutputCache(self.configs.manifest_file,
+                                             self.configs.store_dir,
+                                             self.configs.store_size)
+        if cache is not None:
+            hashes: dict[str, str] = cache.inputs(
+                structure_files(self.configs.pdb_file, self.configs),
+                inputs.shared_digests(self.configs))
+            if cache.restore(self.configs.pdb_file, cache.key(hashes)):
+                self.info_msg += '\tThe outputs are up to date\n'
+                if saves_cache:
+                    cache.save()
+                return
+        if self.configs.traj_file:
+            self.convert_trajectory(itp, force_fields, log)
+        elif self.configs.trajectory:
+            self.convert_frames(itp, force_fields, log)
+        else:
+            pdb: pd.DataFrame = self._structure_reader()(
+                self.configs.pdb_file, log, frames=self.configs.frames).pdb_df
+            self.write_force_fields(
+                pdb, itp, force_fields, self.configs.pqr_file)
+        if self.configs.plan_file and self.plans:
+            list(self.plans.values())[-1].save(self.configs.plan_file)
+        if cache is not None:
+            cache.record(self.configs.pdb_file, hashes, self.outputs)
+            if saves_cache:
+                cache.save()
+
+    def _is_topology(self) -> bool:
+        """if the itp_file is a .top file of the whole system"""
+        return is_topology(self.configs.itp_file)
+
+    def set_charges(self,
                     pdb: pd.DataFrame,
                     itp: pd.DataFrame
-                    ) -> pd.DataFrame:
-        """get charges of the atoms in the pdb file"""
-        aptes_with_charges: pd.DataFrame = self.set_aptes_charges(pdb, itp)
-        cores_with_charges: pd.DataFrame = self.set_cores_charges(pdb, itp)
-        return pd.concat(
-            [cores_with_charges, aptes_with_charges], axis=0, ignore_index=True
-            )
-
-    def set_radii(self,
+                    ) -> tuple[pd.DataFrame,
+                               assignment_plan.AssignmentPlan]:
+        """set the charges and chains of the structure, they are the
+        same for all the force fields; return it with its plan"""
+        if self.configs.renumber_residues:
+            pdb = pdb_to_df.Pdb.check_residue_number(pdb)
+            pdb['residue_number'] = pdb.pop('mol')
+        plan: assignment_plan.AssignmentPlan = self.get_plan(pdb, itp)
+        if len(plan.rows) != len(pdb):
+            # Atoms without charge (other residues) are not written
+            pdb = pdb.take(plan.rows)
+        pdb['charge'] = plan.charges(itp)
+        self.add_chain_identifier(pdb, self.configs.chain_ids)
+        return pdb, plan
+
+    def add_radii(self,
                   pdb_with_charges: pd.DataFrame,
-                  force_field: pd.DataFrame,
-                  itp: pd.DataFrame
+                  plan: assignment_plan.AssignmentPlan,
+                  name: str,  # Name of the force field
+                  force_field: parse_charmm_data.ForceField
                   ) -> pd.DataFrame:
-        """set the radii for all"""
-        aptes_df: pd.DataFrame = \
-            self.set_radii_for_aptes(pdb_with_charges, force_field)
-        cores_df: pd.DataFrame = \
-            self.set_radii_for_cores(pdb_with_charges, force_field, itp)
-        return pd.concat([cores_df, aptes_df], axis=0, ignore_index=True)
+        """set the radii of the force field and return the pqr table"""
+        pdb_with_charges['radius'] = plan.radii(name, force_field)
+        return self.mk_pqr_df(pdb_with_charges)
+
+    def write_force_fields(self,
+                           pdb: pd.DataFrame,
+                           itp: pd.DataFrame,
+                           force_fields: parse_charmm_data.ForceFieldRegistry,
+                           pqr_file: str  # Output, a name per force field
+                           ) -> None:
+        """write the pqr of the structure with each of the force fields,
+        the charges are set once"""
+        plan: assignment_plan.AssignmentPlan
+        pdb, plan = self.set_charges(pdb, itp)
+        for name in self._force_field_names():
+            self.outputs.append(
+                self._force_field_outfile_name(pqr_file, name))
+            self.write_pqr(
+                self.outputs[-1],
+                self.add_radii(pdb, plan, name, force_fields.get(name)))
+
+    def _force_field_names(self) -> list[str]:
+        """names of the force fields in the registry to write"""
+        return self.configs.force_fields or [self.configs.ff_file]
+
+    def _force_field_outfile_name(self,
+                                  pqr_file: str,  # Name of the output
+                                  name: str  # Of the force field
+                                  ) -> str:
+        """name of the output of a force field, e.g., name_CHARMM.pqr
+        (of CHARMM or of the ff_file CHARMM.DAT); the same name if only
+        the ff_file is used"""
+        if not self.configs.force_fields:
+            return pqr_file
+        root, extension = my_tools.split_extension(pqr_file)
+        label: str = my_tools.split_extension(os.path.basename(name))[0]
+        return f'{root}_{label}.{extension}'
+
+    def convert_frames(self,
+                       itp: pd.DataFrame,
+                       force_fields: parse_charmm_data.ForceFieldRegistry,
+                       log: logger.logging.Logger
+                       ) -> None:
+        """write one pqr per model of the structure file, the models
+        are read and written one at a time; the charges and the static
+        text of the atoms are made once for the models of the same
+        layout (compared to the last one by their arrays), and only the
+        coordinates of the written atoms are taken from the others"""
+        structure = self._structure_reader()(self.configs.pdb_file,
+                                             log,
+                                             stream=True,
+                                             frames=self.configs.frames)
+        n_frames: int = 0
+        layout: typing.Optional[pd.DataFrame] = None  # Of the last model
+        rows: np.ndarray = np.empty(0, dtype=np.int64)  # Written atoms
+        writers: dict[str, pqr_frames.PqrFrames] = {}
+        for frame, pdb in zip(structure.frame_ids, structure.frames):
+            if layout is None or \
+               not assignment_plan.same_layout(pdb, layout, STATIC_COLUMNS):
+                layout = pdb[STATIC_COLUMNS].copy()
+                plan: assignment_plan.AssignmentPlan
+                pdb_with_charges: pd.DataFrame
+                pdb_with_charges, plan = self.set_charges(pdb, itp)
+                rows = plan.rows
+                writers = self.mk_frame_writers(
+                    pdb_with_charges, plan, force_fields)
+            coordinates: np.ndarray = pdb[['x', 'y', 'z']].to_numpy()
+            if len(rows) != len(pdb):
+                coordinates = coordinates[rows]
+            self.write_frame(writers, frame, coordinates)
+            n_frames += 1
+        self.info_msg += f'\tNumber of models written: {n_frames}\n'
+
+    def convert_trajectory(self,
+                           itp: pd.DataFrame,
+                           force_fields: parse_charmm_data.ForceFieldRegistry,
+                           log: logger.logging.Logger
+                           ) -> None:
+        """write one pqr per selected frame of the binary trajectory:
+        the table and the static text of the atoms are made once from
+        the reference structure and only the coordinates are taken from
+        the memory-mapped frames and formatted"""
+        pdb: pd.DataFrame = self._structure_reader()(
+            self.configs.pdb_file, log).pdb_df
+        traj: binary_trajectory.BinaryTrajectory = \
+            binary_trajectory.open_trajectory(self.configs.traj_file, log)
+        if traj.n_atoms != len(pdb):
+            log.error(msg := (f'\tThe trajectory has {traj.n_atoms} atoms '
+                              f'but the structure has {len(pdb)}\n'))
+            sys.exit(f'{bcolors.FAIL}{msg}{bcolors.ENDC}')
+        plan: assignment_plan.AssignmentPlan
+        pdb, plan = self.set_charges(pdb, itp)
+        writers: dict[str, pqr_frames.PqrFrames] = \
+            self.mk_frame_writers(pdb, plan, force_fields)
+        atoms: np.ndarray = pdb.index.to_numpy()  # Rows in the frames
+        frames: list[int] = traj.select(self.configs.frames)
+        for frame in frames:
+            self.write_frame(writers, frame, np.column_stack(
+                [(positions[atoms] * traj.scale).astype(np.float32)
+                 for positions in traj.coordinates(frame)]))
+        self.info_msg += f'\tNumber of frames written: {len(frames)}\n'
+
+    def mk_frame_writers(self,
+                         pdb: pd.DataFrame,  # With charges, see set_charges
+                         plan: assignment_plan.AssignmentPlan,
+                         force_fields: parse_charmm_data.ForceFieldRegistry
+                         ) -> dict[str, pqr_frames.PqrFrames]:
+        """make the static text of the atoms with each force field, the
+        same for all the frames of the layout"""
+        return {name: pqr_frames.PqrFrames(
+                    self.add_radii(pdb, plan, name, force_fields.get(name)))
+                for name in self._force_field_names()}
+
+    def write_frame(self,
+                    writers: dict[str, pqr_frames.PqrFrames],
+                    frame: int,  # Index of the frame
+                    coordinates: np.ndarray  # (atoms, 3) of the frame
+                    ) -> None:
+        """write the pqr of the frame with each force field, the
+        coordinates are formatted once"""
+        coordinate_text: typing.Optional[np.ndarray] = \
+            pqr_frames.format_coordinates(coordinates)
+        for name, writer in writers.items():
+            self.outputs.append(self._force_field_outfile_name(
+                self._frame_outfile_name(frame), name))
+            writer.write(self.outputs[-1], coordinates, coordinate_text)
+
+    def _structure_reader(self
+                          ) -> typing.Union[type[pdb_to_df.Pdb],
+                                            type[gro_to_df.Gro]]:
+        """choose the reader of the structure file by its extension"""
+        extension: str = \
+            my_tools.split_extension(self.configs.pdb_file)[1].split('.')[0]
+        if extension == 'gro':
+            return gro_to_df.Gro
+        return pdb_to_df.Pdb
+
+    def check_all_file(self,
+                       log: logger.logging.Logger
+                       ) -> None:
+        """check all the existence of the all files, a compressed
+        version is used if the plain one does not exist; the files of
+        the topology and force fields are checked by SharedInputs.read"""
+        self.configs.pdb_file = \
+            my_tools.check_file_exist(self.configs.pdb_file, log)
+        if self.configs.traj_file:
+            self.configs.traj_file = \
+                my_tools.check_file_exist(self.configs.traj_file, log)
+
+    def get_plan(self,
+                 pdb: pd.DataFrame,
+                 itp: pd.DataFrame
+                 ) -> assignment_plan.AssignmentPlan:
+        """return the plan of the layout of the structure, it is made
+        (or read from the plan_file) for the first structure of it"""
+        key: str = assignment_plan.layout_key(pdb, itp)
+        if key in self.plans:
+            return self.plans[key]
+        if self.configs.plan_file and os.path.exists(self.configs.plan_file):
+            plan: assignment_plan.AssignmentPlan = \
+                assignment_plan.AssignmentPlan.load(self.configs.plan_file)
+            if plan.key == key:
+                self.info_msg += \
+                    f'\tUsing the plan of `{self.configs.plan_file}`\n'
+                self.plans[key] = plan
+                return plan
+        self.plans[key] = self.mk_plan(pdb, itp, key)
+        return self.plans[key]
+
+    def mk_plan(self,
+                pdb: pd.DataFrame,
+                itp: pd.DataFrame,
+                key: str  # Of the layout
+                ) -> assignment_plan.AssignmentPlan:
+        """find the written atoms, their rows in the itp and their
+        names in the force fields"""
+        rows: np.ndarray
+        itp_rows: np.ndarray
+        if self._is_topology():
+            rows, itp_rows = self.topology_rows(pdb, itp)
+        else:
+            rows, itp_rows = self.template_rows(pdb, itp)
+        # Names of the topology, not cut to three chars as in the pdb
+        residue_names: np.ndarray = itp['resname'].to_numpy(dtype=str)
+        atom_names: np.ndarray = np.where(
+            np.isin(residue_names, self.configs.radius_by_atomtype),
+            itp['atomtype'].to_numpy(dtype=str),
+            itp['atomname'].to_numpy(dtype=str))
+        return assignment_plan.AssignmentPlan(
+            key, rows, itp_rows, residue_names[itp_rows],
+            atom_names[itp_rows])
+
+    def template_rows(self,
+                      pdb: pd.DataFrame,
+                      itp: pd.DataFrame
+                      ) -> tuple[np.ndarray, np.ndarray]:
+        """return the positions of the atoms of the residues with a
+        template in the itp and their rows in it, for their charges"""
+        templates = residue_templates.ResidueTemplates(itp)
+        residue_names: np.ndarray = pdb['residue_name'].to_numpy(dtype=str)
+        itp_rows: np.ndarray = templates.match(
+            residue_names,
+            pdb['residue_number'].to_numpy(),
+            pdb['atom_name'].to_numpy(dtype=str),
+            self._structure_reader().resname_width)
+        rows: np.ndarray = np.flatnonzero(itp_rows >= 0)
+        self.info_msg += (f'\tAtoms matched to the residues of the itp: '
+                          f'{len(rows)}\n')
+        if len(rows) != len(pdb):
+            skipped: pd.Series = pd.Series(
+                residue_names[itp_rows < 0]).value_counts(sort=False)
+            self.info_msg += ('\tAtoms of residues without template, not '
+                              f'written: {skipped.to_dict()}\n')
+        return rows, itp_rows[rows]
 
     def _set_outfile_name(self) -> str:
-        """set the name of the output based on the structure file"""
-        struct_name: str = self.configs.pdb_file.split('.')[0]
-        self.configs.pqr_file = f'{struct_name}.pqr'
+        """set the name of the output based on the structure file, or
+        on the binary trajectory"""
+        struct_name: str = my_tools.split_extension(
+            self.configs.traj_file or self.configs.pdb_file)[0]
+        self.configs.pqr_file = \
+            f'{struct_name}.pqr{self.configs.pqr_compression}'
         self.info_msg += \
             f'\tThe output will be save as: `{self.configs.pqr_file}`\n'
+        if self.configs.trajectory or self.configs.traj_file:
+            self.info_msg += \
+                f'\tOne file per model: `{self._frame_outfile_name(0)}`, ...\n'
+
+    def _frame_outfile_name(self,
+                            frame: int  # Index of the model
+                            ) -> str:
+        """name of the output of a model, e.g., name_0001.pqr"""
+        struct_name: str = my_tools.split_extension(self.configs.pqr_file)[0]
+        return f'{struct_name}_{frame:04d}.pqr{self.configs.pqr_compression}'
 
     @staticmethod
-    def add_chain_identifier(pdb_df: pd.DataFrame
+    def add_chain_identifier(pdb_df: pd.DataFrame,
+                             chain_ids: typing.Optional[dict[str, str]] = None
                              ) -> pd.DataFrame:
-        """add the column"""
-        chain_identifier_map = {
-            'COR': 'A',
-            'APT': 'B'
-        }
+        """add the column by the residue names, ' ' for the others"""
+        chain_ids = CHAIN_IDS if chain_ids is None else chain_ids
+        found: np.ndarray = pd.Index(list(chain_ids)).get_indexer(
+            pdb_df['residue_name'].to_numpy(dtype=str))
+        # The names not in the map (-1) take the last one, ' '
         pdb_df['chain_id'] = \
-            pdb_df['residue_name'].map(chain_identifier_map)
+            np.array(list(chain_ids.values()) + [' '])[found]
         return pdb_df
 
     @staticmethod
@@ -132,140 +596,52 @@ class PdbToPqr:
                               'chain_id',
                               'residue_number',
                               'x', 'y', 'z', 'charge', 'radius']
-        float_columns: list[str] = ['x', 'y', 'z', 'charge', 'radius']
-        df_i: pd.DataFrame = pdb_with_charge_radii[columns].copy()
-        df_i[float_columns] = df_i[float_columns].astype(float)
-        return df_i
+        # Selecting the columns does not copy them
+        pqr_df: pd.DataFrame = pdb_with_charge_radii[columns]
+        codes: typing.Optional[pd.Series] = \
+            pdb_with_charge_radii.get('insertion_code')
+        if codes is not None and (codes.astype(str) != '').any():
+            # Written after the number, e.g. 52A, as in the structure
+            pqr_df = pqr_df.assign(residue_number=(
+                pqr_df['residue_number'].astype(str) + codes.astype(str)))
+        return pqr_df
 
     @staticmethod
     def write_pqr(pqr_file_name: str,
                   pqr_df: pd.DataFrame
                   ) -> None:
-        """writing the pqr to a file"""
-        with open(pqr_file_name, 'w', encoding='utf8') as f_w:
-            for _, row in pqr_df.iterrows():
-                line = f"ATOM  {row['atom_id']:>5} " \
-                       f"{row['atom_name']:<4} " \
-                       f"{row['residue_name']:<3} " \
-                       f"{row['chain_id']:>1} " \
-                       f"{row['residue_number']:>5} " \
-                       f"{row['x']:>8.3f}" \
-                       f"{row['y']:>8.3f}" \
-                       f"{row['z']:>8.3f} " \
-                       f"{row['charge']:>7.4f} " \
-                       f"{row['radius']:>6.4f}\n"
-                f_w.write(line)
+        """writing the pqr to a file, the atoms are formatted a block of
+        the columns at a time and each block is written at once"""
+        columns: list[str] = ['atom_id', 'atom_name', 'residue_name',
+                              'chain_id', 'residue_number',
+                              'x', 'y', 'z', 'charge', 'radius']
+        with my_tools.open_file(pqr_file_name, 'w') as f_w:
+            for start in range(0, len(pqr_df), PQR_BLOCK):
+                block: pd.DataFrame = pqr_df.iloc[start:start + PQR_BLOCK]
+                # Python values, formatted as by the f-strings of a row
+                values: list[list[typing.Any]] = \
+                    [block[column].tolist() for column in columns]
+                f_w.write(''.join(map(PQR_LINE.__mod__, zip(*values))))
             f_w.write('TER\n')
             f_w.write('END\n')
 
     @staticmethod
-    def set_radii_for_aptes(pdb_with_charges: pd.DataFrame,
-                            force_field: pd.DataFrame
-                            ) -> pd.DataFrame:
-        """get the radius from the file"""
-        aptes_radii: pd.DataFrame = \
-            force_field[force_field['resname'] == 'APT'].copy()
-        aptes_df = pd.DataFrame = \
-            pdb_with_charges[pdb_with_charges['residue_name'] == 'APT'].copy()
-        aptes_df = pd.merge(aptes_df,
-                            aptes_radii[['atom_name', 'radius']],
-                            on='atom_name',
-                            how='left')
-        return aptes_df
-
-    @staticmethod
-    def set_radii_for_cores(pdb_with_charges: pd.DataFrame,
-                            force_field: pd.DataFrame,
-                            itp: pd.DataFrame
-                            ) -> pd.DataFrame:
-        """get the radius from the file"""
-        cores_radii: pd.DataFrame = \
-            force_field[force_field['resname'] == 'COR'].copy()
-        cores_df = pd.DataFrame = \
-            pdb_with_charges[pdb_with_charges['residue_name'] == 'COR'].copy()
-        cores_df['atomtype'] = itp[itp['resname'] == 'COR']['atomtype'].copy()
-        cores_df = pd.merge(cores_df,
-                            cores_radii[['atom_name', 'radius']],
-                            left_on='atomtype',
-                            right_on='atom_name',
-                            how='left')
-        cores_df['atom_name'] = cores_df['atom_name_x'].copy()
-        return cores_df.drop(
-            ['atomtype', 'atom_name_x', 'atom_name_y'], axis=1)
-
-    def set_aptes_charges(self,
-                          pdb: pd.DataFrame,
-                          itp: pd.DataFrame
-                          ) -> pd.DataFrame:
-        """get charges for different aptes longs"""
-        itp_df: pd.DataFrame = itp[itp['resname'] == 'APT']
-        apt_df: pd.DataFrame = pdb[pdb['residue_name'] == 'APT']
-        pro_charges: pd.DataFrame
-        unpro_charges: pd.DataFrame
-        pro_charges, unpro_charges = self.get_aptes_charges(itp_df)
-        dfs_with_charges: list[pd.DataFrame] = []
-        for _, group in apt_df.groupby('residue_number'):
-            if len(group) == 13:
-                dfs_with_charges.append(self.add_charge_column_to_df(
-                    group, pro_charges))
-            elif len(group) == 12:
-                dfs_with_charges.append(self.add_charge_column_to_df(
-                    group, unpro_charges))
-        return pd.concat(dfs_with_charges, axis=0, ignore_index=True)
-
-    def set_cores_charges(self,
-                          pdb: pd.DataFrame,
-                          itp: pd.DataFrame
-                          ) -> pd.DataFrame:
-        """set the charges for the core atoms of the nano particles
-        since only the charges on the shell is important, only those
-        are checked
-        """
-        itp_df: pd.DataFrame = itp[itp['resname'] == 'COR'].copy()
-        cor_df: pd.DataFrame = pdb[pdb['residue_name'] == 'COR'].copy()
-        if not cor_df['atom_name'].equals(itp_df['atomname']):
-            sys.exit("The columns name are different!\n")
-        cor_charges: pd.DataFrame = itp[['atomnr', 'charge']].copy()
-        cor_charges['atomnr'] = cor_charges['atomnr'].astype(str)
-        cor_df['atom_id'] = cor_df['atom_id'].astype(str)
-        cor_df = pd.merge(cor_df,
-                          cor_charges[['atomnr', 'charge']],
-                          left_on='atom_id',
-                          right_on='atomnr',
-                          how='left')
-        return cor_df.drop('atomnr', axis=1)
-
-    @staticmethod
-    def add_charge_column_to_df(main_df: pd.DataFrame,
-                                charge_df: pd.DataFrame
-                                ) -> pd.DataFrame:
-        """add charge column to the dataframe"""
-        tmp_df = main_df.copy()
-        tmp_df = pd.merge(tmp_df,
-                          charge_df[['atomname', 'charge']],
-                          left_on='atom_name',
-                          right_on='atomname',
-                          how='left')
-        return tmp_df.drop('atomname', axis=1)
-
-    @staticmethod
-    def get_aptes_charges(itp_df: pd.DataFrame
-                          ) -> tuple[pd.DataFrame, pd.DataFrame]:
-        """return charges for pro- and unprotonated aptes"""
-        pro_found: bool = False
-        unpro_found: bool = False
-        for _, group in itp_df.groupby('resnr'):
-            if len(group) == 13 and not pro_found:
-                pro_charges: pd.DataFrame = \
-                    group[['atomname', 'charge']].copy()
-                pro_found = True
-            elif len(group) == 12 and not unpro_found:
-                unpro_charges: pd.DataFrame = \
-                    group[['atomname', 'charge']].copy()
-                unpro_found = True
-            if pro_found and unpro_found:
-                break
-        return pro_charges, unpro_charges
+    def topology_rows(pdb: pd.DataFrame,
+                      itp: pd.DataFrame
+                      ) -> tuple[np.ndarray, np.ndarray]:
+        """all the atoms take their charges from the topology of the
+        system, atom by atom in the order of the structure"""
+        if len(pdb) != len(itp):
+            sys.exit(f'{bcolors.FAIL}The topology has {len(itp)} atoms '
+                     f'but the structure has {len(pdb)}\n{bcolors.ENDC}')
+        wrong: np.ndarray = np.flatnonzero(
+            pdb['atom_name'].to_numpy(dtype=str) !=
+            itp['atomname'].to_numpy(dtype=str))
+        if len(wrong):
+            sys.exit(f'{bcolors.FAIL}{len(wrong)} atoms names are different '
+                     f'in the structure and the topology, e.g., atoms: '
+                     f'{(wrong[:10] + 1).tolist()}\n{bcolors.ENDC}')
+        return np.arange(len(pdb)), np.arange(len(itp))
 
     def write_msg(self,
                    log: logger.logging.Logger  # To log
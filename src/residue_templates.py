@@ -0,0 +1,127 @@
+"""
+Templates of the residues of an itp: each residue (a run of atoms with
+the same residue name and number) is known by its signature, a hash of
+its name and of the ordered names of its atoms. The first residue of
+each signature in the itp is the template of all the residues with it,
+in the itp or in a structure, e.g.:
+    the core of each nanoparticle of a kind, the protonated (13 atoms)
+    and unprotonated (12 atoms) APT, the waters and the ions.
+The signatures of all the residues are computed at once with NumPy and
+found by a hash lookup; the names of the matched atoms are checked
+against their template, so a collision of the hashes is not matched.
+The residue names of the itp are cut to the width of the residue name
+field of the structure file, e.g. TIP3 is TIP in a pdb, and compared
+whole, so CLA does not match a CL of a pdb.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+HASH_BASE: np.uint64 = np.uint64(1099511628211)  # Powers by the position
+HASH_NAME: np.uint64 = np.uint64(0x9E3779B97F4A7C15)  # Of residue name
+HASH_SIZE: np.uint64 = np.uint64(0xC2B2AE3D27D4EB4F)  # Of number of atoms
+
+
+def residue_starts(resnames: np.ndarray,  # Residue name of each atom
+                   residue_numbers: np.ndarray  # Residue number of each
+                   ) -> np.ndarray:
+    """return the first atom of each residue, the runs of atoms with the
+    same residue name and number"""
+    change: np.ndarray = np.ones(len(resnames), dtype=bool)
+    change[1:] = (resnames[1:] != resnames[:-1]) | \
+        (residue_numbers[1:] != residue_numbers[:-1])
+    return np.flatnonzero(change)
+
+
+class ResidueTemplates:
+    """The residues of the itp by their signatures"""
+
+    def __init__(self,
+                 itp: pd.DataFrame  # Atoms of the itp, AtomsInfo
+                 ) -> None:
+        self.resnames: np.ndarray = itp['resname'].to_numpy(dtype=str)
+        self.atom_names: np.ndarray = itp['atomname'].to_numpy(dtype=str)
+        # Codes of the atom names, the names not in the itp are -1
+        self.name_codes: pd.Index = pd.Index(pd.unique(self.atom_names))
+        self.residues: np.ndarray = \
+            residue_starts(self.resnames, itp['resnr'].to_numpy())
+        # The templates by the width of the residue names
+        self.templates: dict[int, tuple[pd.Index, pd.Index,
+                                        np.ndarray, np.ndarray]] = {}
+
+    def get_templates(self,
+                      width: int  # Number of chars of the residue names
+                      ) -> tuple[pd.Index, pd.Index, np.ndarray, np.ndarray]:
+        """return the codes of the residue names, the signatures of the
+        templates, and their first rows and lengths"""
+        if width not in self.templates:
+            resnames: np.ndarray = self.resnames.astype(f'<U{width}')
+            resname_codes: pd.Index = pd.Index(pd.unique(resnames))
+            signatures: np.ndarray = self.signatures(
+                resnames, self.atom_names, self.residues, resname_codes)
+            unique: np.ndarray
+            first: np.ndarray
+            unique, first = np.unique(signatures, return_index=True)
+            lengths: np.ndarray = \
+                np.diff(np.append(self.residues, len(self.resnames)))
+            self.templates[width] = (resname_codes,
+                                     pd.Index(unique),
+                                     self.residues[first],
+                                     lengths[first])
+        return self.templates[width]
+
+    def signatures(self,
+                   resnames: np.ndarray,  # Residue name of each atom
+                   atom_names: np.ndarray,  # Atom name of each atom
+                   starts: np.ndarray,  # First atom of each residue
+                   resname_codes: pd.Index  # Codes of the residue names
+                   ) -> np.ndarray:
+        """return the hash of each residue (uint64, with wraparound)"""
+        codes: np.ndarray = \
+            self.name_codes.get_indexer(atom_names).astype(np.uint64) + \
+            np.uint64(2)
+        lengths: np.ndarray = np.diff(np.append(starts, len(atom_names)))
+        position: np.ndarray = np.arange(len(atom_names)) - \
+            np.repeat(starts, lengths)
+        with np.errstate(over='ignore'):
+            terms: np.ndarray = codes * np.power(
+                HASH_BASE, position.astype(np.uint64) + np.uint64(1))
+            hashes: np.ndarray = np.add.reduceat(terms, starts) \
+                if len(starts) else np.zeros(0, dtype=np.uint64)
+            names: np.ndarray = resname_codes.get_indexer(
+                resnames[starts]).astype(np.uint64) + np.uint64(2)
+            return hashes ^ (names * HASH_NAME) ^ \
+                (lengths.astype(np.uint64) * HASH_SIZE)
+
+    def match(self,
+              resnames: np.ndarray,  # Residue name of each atom
+              residue_numbers: np.ndarray,  # Residue number of each atom
+              atom_names: np.ndarray,  # Atom name of each atom
+              width: int  # Chars of the residue names in the structure
+              ) -> np.ndarray:
+        """return the row in the itp of each atom, by the template of its
+        residue; -1 for the atoms of residues without a template"""
+        resname_codes: pd.Index
+        signature_index: pd.Index
+        first_rows: np.ndarray
+        sizes: np.ndarray
+        resname_codes, signature_index, first_rows, sizes = \
+            self.get_templates(width)
+        starts: np.ndarray = residue_starts(resnames, residue_numbers)
+        lengths: np.ndarray = np.diff(np.append(starts, len(atom_names)))
+        found: np.ndarray = signature_index.get_indexer(
+            self.signatures(resnames, atom_names, starts, resname_codes))
+        residue: np.ndarray = np.repeat(np.arange(len(starts)), lengths)
+        template: np.ndarray = found[residue]
+        is_found: np.ndarray = (template >= 0) & \
+            (lengths[residue] == sizes[template])
+        rows: np.ndarray = first_rows[template] + \
+            np.arange(len(atom_names)) - starts[residue]
+        rows[~is_found] = 0
+        is_found &= (self.atom_names[rows] == atom_names) & \
+            (self.resnames[rows].astype(f'<U{width}') == resnames)
+        if len(starts):
+            # A residue is matched only if all its atoms are
+            is_found = np.logical_and.reduceat(is_found, starts)[residue]
+        return np.where(is_found, rows, -1)
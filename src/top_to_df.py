@@ -0,0 +1,180 @@
+"""Reading a GROMACS topology (.top) and returning the atoms of the whole
+system in the table of itp_to_df.AtomsInfo.
+
+    The topology includes the itp files of the molecules:
+        #include "APT_COR.itp"
+        #include "tip3p.itp"
+
+        [ system ]
+        ...
+        [ molecules ]
+        ; Compound  #mols
+        APT_COR     1
+        SOL         100000
+    Each included file is parsed once (and kept in the itp cache, if it
+    is given), and the [ atoms ] of each molecule are repeated by its
+    count with numpy: the atom, residue and charge-group numbers of each
+    copy are shifted after the previous ones, as in the structure file.
+
+    NONTE:
+    The included files are searched next to the file which includes
+    them and then in the include directories (the GMXLIB directories
+    by default); the files not found (e.g., of a force field, or of the
+    position restraints) are skipped with a warning. The #ifdef blocks
+    are not evaluated, all the #include lines are followed.
+"""
+
+import os
+import sys
+import typing
+
+import numpy as np
+import pandas as pd
+
+import logger
+import itp_cache
+import itp_to_df
+from colors_text import TextColor as bcolors
+
+
+# Directories to search for the included files after the including one
+INCLUDE_DIRS: list[str] = \
+    [item for item in os.environ.get('GMXLIB', '').split(os.pathsep) if item]
+
+
+class Top:
+    """Read the topology and its included files and make the atoms
+    table of the system from [ molecules ]"""
+
+    info_msg: str = 'Message from Top:\n'
+    # Numbers of the copies are shifted after the previous ones
+    numbered_columns: list[str] = ['atomnr', 'resnr', 'chargegrp']
+
+    def __init__(self,
+                 fname: str,  # Name of the top file
+                 log: logger.logging.Logger,
+                 cache: typing.Optional[itp_cache.ItpCache] = None,
+                 include_dirs: typing.Optional[list[str]] = None,
+                 workers: int = 1  # Processes for large sections, 0: all
+                 ) -> None:
+        self.cache: typing.Optional[itp_cache.ItpCache] = cache
+        self.workers: int = workers
+        self.include_dirs: list[str] = \
+            INCLUDE_DIRS if include_dirs is None else include_dirs
+        self.itps: dict[str, itp_to_df.Itp] = {}  # Parsed files by path
+        self.info_msg += f"\tReading '{fname}' ...\n"
+        self.read_file(os.path.realpath(fname), log)
+        top: itp_to_df.Itp = self.itps[os.path.realpath(fname)]
+        self.molecules: pd.DataFrame = self.get_molecules(top)
+        self.moleculetypes: dict[str, pd.DataFrame] = \
+            self.get_moleculetypes(log)
+        self.atoms: pd.DataFrame = self.tile_molecules(log)
+        self.info_msg += (f'\tNumber of files: {len(self.itps)}\n'
+                          f'\tNumber of molecules: '
+                          f'{self.molecules["count"].sum()}\n'
+                          f'\tNumber of atoms: {len(self.atoms)}\n')
+        self.write_msg(log)
+
+    def read_file(self,
+                  fname: str,  # Real path of the file
+                  log: logger.logging.Logger
+                  ) -> None:
+        """parse the file and the files it includes, once each"""
+        if fname in self.itps:
+            return
+        self.itps[fname] = \
+            itp_to_df.Itp(fname, cache=self.cache, workers=self.workers)
+        for include in self.itps[fname].includes:
+            path: typing.Optional[str] = \
+                self.find_include(include, os.path.dirname(fname))
+            if path is None:
+                self.info_msg += f'\tSkipped `{include}`: not found\n'
+                log.warning(f'\t`{include}` of `{fname}` is not found\n')
+            else:
+                self.read_file(path, log)
+
+    def find_include(self,
+                     include: str,  # Name in the #include line
+                     directory: str  # Directory of the including file
+                     ) -> typing.Optional[str]:
+        """return the real path of the included file, None if it is not
+        in the directories"""
+        for item in [directory] + self.include_dirs:
+            path: str = os.path.join(item, include)
+            if os.path.isfile(path):
+                return os.path.realpath(path)
+        return None
+
+    @staticmethod
+    def get_molecules(top: itp_to_df.Itp  # The top file
+                      ) -> pd.DataFrame:
+        """return the names and counts of [ molecules ] in order"""
+        data: str = itp_to_df.split_section(
+            ''.join(top.section('molecules')))[1]
+        values: np.ndarray = itp_to_df.read_columns(data, 2, str)
+        return pd.DataFrame({'name': values[:, 0],
+                             'count': values[:, 1].astype(np.int64)})
+
+    def get_moleculetypes(self,
+                          log: logger.logging.Logger
+                          ) -> dict[str, pd.DataFrame]:
+        """return the atoms of each molecule defined in the files, the
+        first definition of a name is used"""
+        moleculetypes: dict[str, pd.DataFrame] = {}
+        for itp in self.itps.values():
+            for name, df_i in itp.moleculetypes.groupby('moleculetype',
+                                                        sort=False):
+                moleculetypes.setdefault(str(name), df_i)
+        missing: list[str] = \
+            sorted(set(self.molecules['name']) - set(moleculetypes))
+        if missing:
+            log.error(msg := (f'\tMolecules in [ molecules ] without '
+                              f'[ moleculetype ]: {missing}\n'))
+            sys.exit(f'{bcolors.FAIL}{self.__module__}:\n{msg}{bcolors.ENDC}')
+        return moleculetypes
+
+    def tile_molecules(self,
+                       log: logger.logging.Logger
+                       ) -> pd.DataFrame:
+        """repeat the atoms of each molecule by its count, the numbers of
+        each copy are after the ones of the previous copy"""
+        columns: dict[str, list[np.ndarray]] = \
+            {column: [] for column in itp_to_df.AtomsInfo.columns}
+        offsets: dict[str, int] = \
+            {column: 0 for column in self.numbered_columns}
+        for name, count in zip(self.molecules['name'],
+                               self.molecules['count']):
+            df_i: pd.DataFrame = self.moleculetypes[name]
+            if df_i.empty or count < 1:
+                continue
+            for column in itp_to_df.AtomsInfo.columns:
+                values: np.ndarray = df_i[column].to_numpy()
+                if column not in self.numbered_columns:
+                    columns[column].append(np.tile(values, count))
+                    continue
+                # Numbers from 1 in a copy, each copy after the last one
+                local: np.ndarray = values - values.min() + 1
+                step: int = int(local.max())
+                shift: np.ndarray = offsets[column] + \
+                    step * np.arange(count, dtype=np.int64)
+                columns[column].append(
+                    (np.tile(local, count) +
+                     np.repeat(shift, len(values))).astype(np.int32))
+                offsets[column] += step * int(count)
+        if not columns['atomnr']:
+            log.error(msg := '\tNo atoms in [ molecules ]\n')
+            sys.exit(f'{bcolors.FAIL}{self.__module__}:\n{msg}{bcolors.ENDC}')
+        return pd.DataFrame({column: np.concatenate(arrays)
+                             for column, arrays in columns.items()})
+
+    def write_msg(self,
+                  log: logger.logging.Logger  # To log
+                  ) -> None:
+        """write and log messages"""
+        print(f'{bcolors.OKCYAN}{self.__class__.__name__}:\n'
+              f'\t{self.info_msg}{bcolors.ENDC}')
+        log.info(self.info_msg)
+
+
+if __name__ == '__main__':
+    Top(sys.argv[1], log=logger.setup_logger('top2df.log'))
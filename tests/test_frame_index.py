@@ -0,0 +1,92 @@
+"""The offsets of the models of a PDB file (pdb_to_df.FrameIndex) are
+kept in a sidecar file, which is used only while the PDB file has the
+same size and modification time."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import logger  # noqa: E402
+import pdb_to_df  # noqa: E402
+
+
+def mk_models(shifts: list[float]  # x of the first atom of each model
+              ) -> str:
+    """return a PDB text with a model of two atoms for each shift"""
+    lines: list[str] = []
+    for model, shift in enumerate(shifts):
+        lines.append(f'MODEL     {model + 1:4d}\n')
+        for i, name in enumerate(['OH2', 'H1']):
+            lines.append(
+                f'ATOM  {i + 1:5d} {name:<4s} TIP3    1    '
+                f'{shift + i:8.3f}{2:8.3f}{3:8.3f}{1:6.2f}{0:6.2f}'
+                f'          {name[0]:>2s}\n')
+        lines.append('ENDMDL\n')
+    return ''.join(lines) + 'END\n'
+
+
+@pytest.fixture(name='pdb_file')
+def fixture_pdb_file(tmp_path):
+    """a PDB file of three models"""
+    fname = tmp_path / 'models.pdb'
+    fname.write_text(mk_models([1.0, 2.0, 3.0]), encoding='utf8')
+    return fname
+
+
+def frame_index(pdb_file) -> pdb_to_df.FrameIndex:
+    """index the file, logging next to it"""
+    return pdb_to_df.FrameIndex(
+        str(pdb_file),
+        logger.setup_logger(str(pdb_file.parent / 'index.log')))
+
+
+def test_sidecar_reused(pdb_file):
+    """the first index is saved, the second one is loaded from it"""
+    first = frame_index(pdb_file)
+    assert 'Scanned' in first.info_msg
+    assert os.path.isfile(f'{pdb_file}{pdb_to_df.INDEX_EXT}')
+    second = frame_index(pdb_file)
+    assert 'Using' in second.info_msg
+    assert 'Scanned' not in second.info_msg
+    np.testing.assert_array_equal(first.offsets, second.offsets)
+    assert len(second) == 3
+
+
+def test_rewritten_pdb(pdb_file):
+    """a rewritten PDB file is scanned again, the models are the new
+    ones"""
+    frame_index(pdb_file)
+    pdb_file.write_text(mk_models([10.0, 20.0, 30.0, 40.0]),
+                        encoding='utf8')
+    index = frame_index(pdb_file)
+    assert 'Scanned' in index.info_msg
+    assert len(index) == 4
+    assert index.read_frame(3)['x'].iloc[0] == pytest.approx(40.0)
+
+
+def test_same_size_rewrite(pdb_file):
+    """a PDB file of the same size but a new modification time is
+    scanned again"""
+    frame_index(pdb_file)
+    stat = os.stat(pdb_file)
+    pdb_file.write_text(mk_models([4.0, 5.0, 6.0]), encoding='utf8')
+    os.utime(pdb_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert os.stat(pdb_file).st_size == stat.st_size
+    index = frame_index(pdb_file)
+    assert 'Scanned' in index.info_msg
+    assert index.read_frame(0)['x'].iloc[0] == pytest.approx(4.0)
+
+
+def test_stale_sidecar_replaced(pdb_file):
+    """the sidecar of the old file is replaced, the next index is
+    loaded from the new one"""
+    frame_index(pdb_file)
+    pdb_file.write_text(mk_models([1.0, 2.0]), encoding='utf8')
+    frame_index(pdb_file)
+    index = frame_index(pdb_file)
+    assert 'Using' in index.info_msg
+    assert len(index) == 2
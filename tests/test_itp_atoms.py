@@ -0,0 +1,128 @@
+"""The [ atoms ] of the stock GROMACS itp files (e.g. tip3p.itp and
+ions.itp of the force fields) are read by the positions of the columns,
+without an element column."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import logger  # noqa: E402
+import top_to_df  # noqa: E402
+import itp_to_df  # noqa: E402
+
+
+# As in share/gromacs/top/charmm27.ff/tip3p.itp
+TIP3P_ITP: str = """[ moleculetype ]
+; molname\tnrexcl
+SOL\t\t2
+
+[ atoms ]
+; id\tat type\tres nr \tresidu name\tat name\t\tcg nr\tcharge
+1       OWT3     1       SOL       OW       1       -0.834   15.9994
+2       HWT3     1       SOL       HW1      1        0.417    1.008
+3       HWT3     1       SOL       HW2      1        0.417    1.008
+
+#ifndef FLEXIBLE
+[ settles ]
+; OW\tfunct\tdoh\tdhh
+1\t1\t0.09572\t0.15139
+
+[ exclusions ]
+1\t2\t3
+2\t1\t3
+3\t1\t2
+#endif
+"""
+
+# As in ions.itp, the second one without the mass
+IONS_ITP: str = """[ moleculetype ]
+; molname\tnrexcl
+NA\t\t1
+
+[ atoms ]
+; id\tat type\t\tres nr\tresidu name\tat name  cg nr\tcharge\tmass
+1\tNA\t\t1\tNA\t\tNA\t 1\t1\t22.9898
+
+[ moleculetype ]
+; molname\tnrexcl
+CL\t\t1
+
+[ atoms ]
+; id\tat type\t\tres nr\tresidu name\tat name  cg nr\tcharge
+1\tCL\t\t1\tCL\t\tCL\t 1\t-1
+"""
+
+SYSTEM_TOP: str = """#include "tip3p.itp"
+#include "ions.itp"
+
+[ system ]
+water and ions
+
+[ molecules ]
+SOL 2
+NA 1
+CL 1
+"""
+
+
+@pytest.fixture(name='stock_dir')
+def fixture_stock_dir(tmp_path):
+    """directory with the stock itp files and a topology of them"""
+    for fname, text in [('tip3p.itp', TIP3P_ITP),
+                        ('ions.itp', IONS_ITP),
+                        ('system.top', SYSTEM_TOP)]:
+        (tmp_path / fname).write_text(text, encoding='utf8')
+    return tmp_path
+
+
+def test_stock_water(stock_dir):
+    """the water is read by positions, the element by the mass"""
+    atoms = itp_to_df.Itp(str(stock_dir / 'tip3p.itp')).atoms
+    assert atoms['atomname'].tolist() == ['OW', 'HW1', 'HW2']
+    assert atoms['atomtype'].tolist() == ['OWT3', 'HWT3', 'HWT3']
+    np.testing.assert_allclose(atoms['charge'], [-0.834, 0.417, 0.417])
+    np.testing.assert_allclose(atoms['mass'], [15.9994, 1.008, 1.008])
+    assert atoms['element'].tolist() == ['O', 'H', 'H']
+
+
+def test_stock_ions(stock_dir):
+    """an ion without the mass has NaN mass and no element"""
+    moleculetypes = itp_to_df.Itp(str(stock_dir / 'ions.itp')).moleculetypes
+    assert moleculetypes['moleculetype'].tolist() == ['NA', 'CL']
+    assert moleculetypes['element'].tolist() == ['Na', '']
+    assert np.isnan(moleculetypes['mass'].iloc[1])
+    np.testing.assert_allclose(moleculetypes['charge'], [1.0, -1.0])
+
+
+def test_stock_ions_atoms(stock_dir):
+    """the mass is read in each line, in one [ atoms ] table of all the
+    moleculetypes of the file"""
+    atoms = itp_to_df.Itp(str(stock_dir / 'ions.itp')).atoms
+    assert atoms['atomname'].tolist() == ['NA', 'CL']
+    assert atoms['mass'].iloc[0] == pytest.approx(22.9898)
+    assert np.isnan(atoms['mass'].iloc[1])
+    assert atoms['element'].tolist() == ['Na', '']
+
+
+def test_stock_topology(stock_dir):
+    """a topology of the stock files is tiled by [ molecules ]"""
+    top = top_to_df.Top(str(stock_dir / 'system.top'),
+                        log=logger.setup_logger(str(stock_dir / 'top.log')))
+    assert len(top.atoms) == 8
+    assert top.atoms['atomnr'].tolist() == list(range(1, 9))
+    assert top.atoms['resnr'].tolist() == [1, 1, 1, 2, 2, 2, 3, 4]
+    assert top.atoms['atomname'].tolist()[-2:] == ['NA', 'CL']
+
+
+def test_repo_format_element():
+    """the element after the ';' is kept, without the dot"""
+    atoms = itp_to_df.AtomsInfo(
+        '; atomnr atomtype resnr resname atomname chargegrp charge mass '
+        'element\n'
+        '1 OT 1 TIP3 OH2 1 -0.834 15.9994 ; O.\n'
+        '2 HT 1 TIP3 H1 1 0.417 1.008 ; H.\n').df
+    assert atoms['element'].tolist() == ['O', 'H']
@@ -0,0 +1,107 @@
+"""The cache of the parsed itp sections (itp_cache.ItpCache): the key
+follows the contents of the file and the version of the parser, and the
+least recently used entries are removed first."""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import itp_cache  # noqa: E402
+import itp_to_df  # noqa: E402
+
+
+WATER_ITP: str = """[ moleculetype ]
+; Name nrexcl
+TIP3 2
+
+[ atoms ]
+; atomnr atomtype resnr resname atomname chargegrp charge mass element
+1 OT 1 TIP3 OH2 1 -0.834 15.9994 ; O.
+2 HT 1 TIP3 H1 1 0.417 1.008 ; H.
+3 HT 1 TIP3 H2 1 0.417 1.008 ; H.
+"""
+
+
+def mk_section(rows: int  # Number of rows
+               ) -> pd.DataFrame:
+    """return a small section with numbers and names"""
+    return pd.DataFrame({'atomnr': range(1, rows + 1),
+                         'atomname': [f'C{i}' for i in range(rows)]})
+
+
+def set_used(cache: itp_cache.ItpCache,
+             key: str,  # Key of the entry
+             time_s: int  # Last use, seconds
+             ) -> None:
+    """set the last use of an entry, not to depend on the clock"""
+    os.utime(cache.path(key, 'atoms'), (time_s, time_s))
+
+
+def test_key():
+    """the key changes with the contents and with the version"""
+    raw: bytes = WATER_ITP.encode()
+    key = itp_cache.ItpCache.key(raw, '1')
+    assert key == itp_cache.ItpCache.key(raw, '1')
+    assert key != itp_cache.ItpCache.key(raw + b'\n', '1')
+    assert key != itp_cache.ItpCache.key(raw, '2')
+
+
+def test_round_trip(tmp_path):
+    """a saved section is loaded as it was, a missing one is None"""
+    cache = itp_cache.ItpCache(str(tmp_path / 'cache'))
+    assert cache.load('none', 'atoms') is None
+    section = mk_section(4)
+    cache.save('file', 'atoms', section)
+    loaded = cache.load('file', 'atoms')
+    pd.testing.assert_frame_equal(loaded, section, check_dtype=False)
+    assert loaded['atomname'].tolist() == section['atomname'].tolist()
+
+
+def test_lru_eviction(tmp_path):
+    """when the cache is full the least recently used entry is removed,
+    a loaded entry is recently used"""
+    cache = itp_cache.ItpCache(str(tmp_path / 'cache'))
+    for i, key in enumerate(['old', 'used', 'new']):
+        cache.save(key, 'atoms', mk_section(50))
+        set_used(cache, key, 1_000_000 + i)
+    assert cache.load('old', 'atoms') is not None  # Now the most recent
+    size: int = cache.size()
+    cache.max_size = size - 1
+    cache.evict()
+    names: list[str] = [item.name for item in cache.entries()]
+    assert names == [f'new_atoms{itp_cache.CACHE_EXT}',
+                     f'old_atoms{itp_cache.CACHE_EXT}']
+    assert cache.size() <= cache.max_size
+
+
+def test_save_evicts(tmp_path):
+    """saving in a full cache keeps only what fits, the new entry
+    first"""
+    cache = itp_cache.ItpCache(str(tmp_path / 'cache'))
+    cache.save('first', 'atoms', mk_section(50))
+    set_used(cache, 'first', 1_000_000)
+    cache.max_size = cache.size() + 1
+    cache.save('second', 'atoms', mk_section(50))
+    assert [item.name for item in cache.entries()] == \
+        [f'second_atoms{itp_cache.CACHE_EXT}']
+
+
+def test_itp_uses_cache(tmp_path):
+    """an itp file read again is loaded from the cache, an edited file
+    is parsed again"""
+    fname = tmp_path / 'water.itp'
+    fname.write_text(WATER_ITP, encoding='utf8')
+    cache = itp_cache.ItpCache(str(tmp_path / 'cache'))
+    atoms = itp_to_df.Itp(str(fname), cache=cache).atoms
+    assert len(cache.entries()) == 1
+    again = itp_to_df.Itp(str(fname), cache=cache)
+    assert again.cache_key == cache.entries()[0].name.split('_')[0]
+    pd.testing.assert_frame_equal(again.atoms, atoms, check_dtype=False)
+    fname.write_text(WATER_ITP.replace('-0.834', '-0.800'), encoding='utf8')
+    edited = itp_to_df.Itp(str(fname), cache=cache).atoms
+    assert edited['charge'].iloc[0] == pytest.approx(-0.8)
+    assert len(cache.entries()) == 2
@@ -0,0 +1,138 @@
+"""The manifest of the outputs and their store (output_cache): a
+structure whose inputs did not change is not converted again, its
+removed or changed outputs are copied from the store, and a changed
+input converts it again."""
+
+import os
+import sys
+import shutil
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import logger  # noqa: E402
+import pqr_from_pdb  # noqa: E402
+import output_cache  # noqa: E402
+
+
+DATA_DIR: str = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+WATER_ITP: str = """[ moleculetype ]
+; Name nrexcl
+TIP3 2
+
+[ atoms ]
+; atomnr atomtype resnr resname atomname chargegrp charge mass element
+1 OT 1 TIP3 OH2 1 -0.834 15.9994 ; O.
+2 HT 1 TIP3 H1 1 0.417 1.008 ; H.
+3 HT 1 TIP3 H2 1 0.417 1.008 ; H.
+"""
+
+WATER_PDB: str = ''.join(
+    f'ATOM  {i + 1:5d} {name:<4s} TIP3 {i // 3 + 1:4d}    '
+    f'{x:8.3f}{y:8.3f}{z:8.3f}{1:6.2f}{0:6.2f}          {name[0]:>2s}\n'
+    for i, (name, x, y, z) in enumerate(
+        [('OH2', 1.0, 2.0, 3.0), ('H1', 1.5, 2.0, 3.0), ('H2', 1.0, 2.5, 3.0),
+         ('OH2', 5.0, 6.0, 7.0), ('H1', 5.5, 6.0, 7.0), ('H2', 5.0, 6.5, 7.0)]
+    )) + 'END\n'
+
+
+@pytest.fixture(name='work_dir')
+def fixture_work_dir(tmp_path, monkeypatch):
+    """directory with a structure of two waters, its topology and a
+    copy of the force field; it is the working directory"""
+    (tmp_path / 'water.itp').write_text(WATER_ITP, encoding='utf8')
+    (tmp_path / 'water.pdb').write_text(WATER_PDB, encoding='utf8')
+    shutil.copy(os.path.join(DATA_DIR, 'CHARMM.DAT'), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def convert(work_dir) -> pqr_from_pdb.PdbToPqr:
+    """convert the structure with the manifest and store of the dir"""
+    return pqr_from_pdb.PdbToPqr(
+        'water.pdb',
+        logger.setup_logger(str(work_dir / 'test.log')),
+        pqr_from_pdb.AllConfig(itp_file='water.itp',
+                               names_file='',
+                               manifest_file='manifest.json',
+                               store_dir=str(work_dir / 'store')))
+
+
+def test_converted_and_stored(work_dir):
+    """the first run writes the pqr, the manifest and a copy in the
+    store"""
+    converter = convert(work_dir)
+    assert 'up to date' not in converter.info_msg
+    pqr = work_dir / 'water.pqr'
+    assert pqr.read_text(encoding='utf8').count('ATOM') == 6
+    assert (work_dir / 'manifest.json').is_file()
+    blobs = output_cache.OutputCache(
+        'manifest.json', str(work_dir / 'store')).entries()
+    assert len(blobs) == 1
+    assert os.stat(blobs[0].path).st_ino != os.stat(pqr).st_ino
+
+
+def test_skip_up_to_date(work_dir):
+    """a second run keeps the pqr and does not write the manifest"""
+    convert(work_dir)
+    pqr_stat = os.stat(work_dir / 'water.pqr')
+    manifest_stat = os.stat(work_dir / 'manifest.json')
+    converter = convert(work_dir)
+    assert 'up to date' in converter.info_msg
+    assert os.stat(work_dir / 'water.pqr').st_mtime_ns == \
+        pqr_stat.st_mtime_ns
+    assert os.stat(work_dir / 'manifest.json').st_mtime_ns == \
+        manifest_stat.st_mtime_ns
+
+
+def test_restore_deleted(work_dir):
+    """a removed pqr is copied back from the store"""
+    convert(work_dir)
+    text = (work_dir / 'water.pqr').read_bytes()
+    os.remove(work_dir / 'water.pqr')
+    converter = convert(work_dir)
+    assert 'up to date' in converter.info_msg
+    assert (work_dir / 'water.pqr').read_bytes() == text
+
+
+def test_restore_modified(work_dir):
+    """a pqr changed in place is restored, the store is not changed"""
+    convert(work_dir)
+    text = (work_dir / 'water.pqr').read_bytes()
+    with open(work_dir / 'water.pqr', 'ab') as f_w:
+        f_w.write(b'REMARK edited\n')
+    converter = convert(work_dir)
+    assert 'up to date' in converter.info_msg
+    assert (work_dir / 'water.pqr').read_bytes() == text
+
+
+def test_corrupted_store(work_dir):
+    """a changed file of the store is not restored: it is removed and
+    the structure is converted again"""
+    convert(work_dir)
+    text = (work_dir / 'water.pqr').read_bytes()
+    cache = output_cache.OutputCache('manifest.json', str(work_dir / 'store'))
+    blob = cache.entries()[0].path
+    with open(blob, 'ab') as f_w:
+        f_w.write(b'REMARK corrupted\n')
+    os.remove(work_dir / 'water.pqr')
+    converter = convert(work_dir)
+    assert 'up to date' not in converter.info_msg
+    assert (work_dir / 'water.pqr').read_bytes() == text
+    with open(blob, 'rb') as f_r:
+        assert f_r.read() == text
+
+
+def test_reconvert_force_field(work_dir):
+    """a changed force field converts the structure again"""
+    convert(work_dir)
+    force_field = work_dir / 'CHARMM.DAT'
+    force_field.write_text(
+        force_field.read_text(encoding='utf8').replace(
+            'TIP3\tOH2\t-0.834\t1.768200', 'TIP3\tOH2\t-0.834\t1.900000'),
+        encoding='utf8')
+    converter = convert(work_dir)
+    assert 'up to date' not in converter.info_msg
+    assert '1.9000' in (work_dir / 'water.pqr').read_text(encoding='utf8')
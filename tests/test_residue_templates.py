@@ -0,0 +1,50 @@
+"""The residues of a structure are matched to the templates of the itp
+(residue_templates.ResidueTemplates) with the residue names cut to the
+width of the field of the structure file, not of its longest name."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pdb_to_df  # noqa: E402
+import residue_templates  # noqa: E402
+
+
+# A water and a chloride of CHARMM (residue CLA, atom CL)
+ITP_ATOMS: pd.DataFrame = pd.DataFrame({
+    'resnr': [1, 1, 1, 2],
+    'resname': ['TIP3', 'TIP3', 'TIP3', 'CLA'],
+    'atomname': ['OH2', 'H1', 'H2', 'CL']})
+
+
+def match(resnames: list[str],  # Of each atom of the structure
+          atom_names: list[str]  # Of each atom of the structure
+          ) -> np.ndarray:
+    """return the itp rows of the atoms of a pdb, one residue each"""
+    templates = residue_templates.ResidueTemplates(ITP_ATOMS)
+    starts: list[int] = [i for i, name in enumerate(resnames)
+                         if i == 0 or name != resnames[i - 1]]
+    numbers: np.ndarray = np.searchsorted(
+        starts, np.arange(len(resnames)), side='right')
+    return templates.match(np.array(resnames), numbers,
+                           np.array(atom_names), pdb_to_df.RESNAME_WIDTH)
+
+
+def test_cut_names():
+    """the four-char name of the itp matches its cut name in a pdb"""
+    np.testing.assert_array_equal(
+        match(['TIP', 'TIP', 'TIP', 'CLA'], ['OH2', 'H1', 'H2', 'CL']),
+        [0, 1, 2, 3])
+
+
+def test_short_names_only():
+    """a structure of only short names does not match a longer name of
+    the itp cut to them"""
+    np.testing.assert_array_equal(match(['CL'], ['CL']), [-1])
+    np.testing.assert_array_equal(
+        match(['TIP', 'TIP', 'TIP', 'CL'], ['OH2', 'H1', 'H2', 'CL']),
+        [0, 1, 2, -1])